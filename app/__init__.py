@@ -1,4 +1,5 @@
 from flask import Flask, request
+from flask_socketio import join_room, leave_room
 from app.core.config import Config
 from app.core.extensions import init_extensions, db, socketio
 from app.api import *
@@ -21,18 +22,45 @@ def create_app():
     def handle_invoice_disconnect():
         print(f"Cliente desconectado del namespace /invoices: {request.sid}")
 
+    # Rooms por factura (invoice_<id>) para eventos de progreso y edición de preview
+    @socketio.on('join', namespace='/invoices')
+    def handle_invoice_join(data):
+        room = (data or {}).get('room')
+        if room:
+            join_room(room)
+
+    @socketio.on('leave', namespace='/invoices')
+    def handle_invoice_leave(data):
+        room = (data or {}).get('room')
+        if room:
+            leave_room(room)
+
     # Importar modelos aquí para que Flask-Migrate los detecte
-    from app.models import Invoice, InvoiceLog, Company, CompanyPrompt
+    from app.models import Invoice, InvoiceLog, Company, CompanyPrompt, InvoiceCheckpoint, InvoiceSearchIndex, InvoiceData, InvoiceStatusDaily, InvoiceItem, InvoicePayload, InvoicePayloadArchive, InvoiceFingerprint, UploadSession
+    from app.services.status_counter_service import StatusCounterService
+
+    # Contadores por estado: se actualizan en cada flush que cambia el estado de una factura
+    StatusCounterService.register_listeners()
 
     # Views
-    from app.models import InvoiceData, InvoiceStatusSummary
+    from app.models import InvoiceStatusSummary
 
     with app.app_context():
+        # invoices_data pasó de vista a tabla: eliminar la vista anterior antes de create_all
+        invoices_data_migrated = InvoiceData.drop_legacy_view()
+
         db.create_all()
         db.session.commit()
 
+        if invoices_data_migrated:
+            from app.services.invoice_data_service import InvoiceDataService
+            InvoiceDataService.backfill()
+
+        # Primera ejecución con invoice_status_daily vacía: poblar los contadores desde invoices
+        if not InvoiceStatusDaily.query.first() and Invoice.query.first():
+            StatusCounterService.reconcile()
+
         # Crear vistas si no existen
-        InvoiceData.create_view()
         InvoiceStatusSummary.create_view()
         db.session.commit()
 
@@ -46,7 +74,16 @@ def create_app():
     app.register_blueprint(invoice_data_bp)
     app.register_blueprint(invoice_download_bp)
     app.register_blueprint(invoice_preview_update_bp)
+    app.register_blueprint(invoice_logs_bp)
+    app.register_blueprint(invoice_search_bp)
+    app.register_blueprint(invoice_export_bp)
+    app.register_blueprint(invoice_analytics_bp)
+    app.register_blueprint(invoice_items_bp)
+    app.register_blueprint(invoice_upload_bp)
+    app.register_blueprint(invoice_bulk_bp)
+    app.register_blueprint(invoice_review_queue_bp)
     app.register_blueprint(company_bp)
     app.register_blueprint(invoice_trends_bp)
+    app.register_blueprint(metrics_bp)
     
     return app
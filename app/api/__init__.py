@@ -1,14 +1,23 @@
 from .company_api import company_bp
+from .invoice_analytics_api import invoice_analytics_bp
 from .invoice_api import invoice_bp
+from .invoice_bulk_api import invoice_bulk_bp
 from .invoice_confirm_api import invoice_confirm_bp
 from .invoice_data_api import invoice_data_bp
 from .invoice_download_api import invoice_download_bp
+from .invoice_export_api import invoice_export_bp
+from .invoice_items_api import invoice_items_bp
 from .invoice_list_api import invoice_list_bp
+from .invoice_logs_api import invoice_logs_bp
 from .invoice_preview_update_api import invoice_preview_update_bp
 from .invoice_reject_api import invoice_reject_bp
 from .invoice_retry_api import invoice_retry_bp
+from .invoice_search_api import invoice_search_bp
 from .invoice_status_summary_api import invoice_summary_bp
 from .invoice_trends_api import invoice_trends_bp
+from .invoice_upload_api import invoice_upload_bp
+from .invoice_review_queue_api import invoice_review_queue_bp
+from .metrics_api import metrics_bp
 
 # all blueprints + url_prefix
 all_blueprints = {
@@ -16,11 +25,14 @@ all_blueprints = {
         'blueprints': [company_bp]
     },
     'invoice': {
-        'blueprints': [invoice_confirm_bp, invoice_reject_bp, invoice_list_bp, invoice_retry_bp, invoice_summary_bp, invoice_data_bp, invoice_download_bp, invoice_preview_update_bp]
+        'blueprints': [invoice_confirm_bp, invoice_reject_bp, invoice_list_bp, invoice_retry_bp, invoice_summary_bp, invoice_data_bp, invoice_download_bp, invoice_preview_update_bp, invoice_logs_bp, invoice_search_bp, invoice_export_bp, invoice_analytics_bp, invoice_items_bp, invoice_upload_bp, invoice_bulk_bp, invoice_review_queue_bp]
     },
     'invoice_trends': {
         'blueprints': [invoice_trends_bp]
     },
+    'metrics': {
+        'blueprints': [metrics_bp]
+    },
     'invoice_bp': {
         'blueprints': [invoice_bp],
         'url_prefix': '/api'
@@ -0,0 +1,41 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.api.invoice_data_api import parse_data_filters
+from app.services.analytics_service import AnalyticsService, GROUP_DIMENSIONS
+import time
+
+invoice_analytics_bp = Blueprint('invoice_analytics_bp', __name__)
+
+class InvoiceAnalyticsAPI(MethodView):
+    def get(self):
+        group_by = [dimension.strip() for dimension in request.args.get('group_by', 'company').split(',') if dimension.strip()]
+        invalid = [dimension for dimension in group_by if dimension not in GROUP_DIMENSIONS]
+        if invalid:
+            return jsonify({"error": f"Dimensiones no soportadas: {', '.join(invalid)}. Permitidas: {', '.join(GROUP_DIMENSIONS)}"}), 400
+        group_by = list(dict.fromkeys(group_by))
+
+        try:
+            percentiles = [float(value) for value in request.args.get('percentiles', '50,90,99').split(',') if value.strip()]
+        except ValueError:
+            return jsonify({"error": "El parámetro 'percentiles' debe ser una lista de números separados por coma."}), 400
+        if any(value < 0 or value > 100 for value in percentiles):
+            return jsonify({"error": "Los percentiles deben estar entre 0 y 100."}), 400
+
+        try:
+            filters = parse_data_filters(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        start_time = time.time()
+        try:
+            result = AnalyticsService.aggregate(filters, group_by, percentiles)
+        except Exception as e:
+            print(f"Error al calcular analíticas de facturas: {e}")
+            return jsonify({"error": "Error al calcular las analíticas"}), 500
+
+        return jsonify({
+            **result,
+            "took_ms": round((time.time() - start_time) * 1000, 2)
+        }), 200
+
+invoice_analytics_bp.add_url_rule('/api/invoices/analytics', view_func=InvoiceAnalyticsAPI.as_view('invoice_analytics'), methods=['GET'])
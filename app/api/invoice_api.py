@@ -2,55 +2,57 @@ from flask import Blueprint, request, jsonify
 from flask.views import MethodView
 from app.services.ocr_service import OCRService
 import os
+import zipfile
 from werkzeug.utils import secure_filename
 from datetime import datetime
 
 from app.models.invoice import Invoice
 from app.services.company_service import CompanyService # Importar CompanyService para validación
-from sqlalchemy import func
-from app.core.extensions import db
-# Importar el context manager
-from app.tasks.invoice_tasks import db_session_context_with_event
+from app.core.config import Config
+from app.utils.file_storage import save_stream_with_hash, ALLOWED_MIME_TYPES
+from app.utils.file_extractor import extract_invoices_from_zip, remove_extracted, ZipLimitExceeded
+from app.services.upload_service import UploadService
 
 invoice_bp = Blueprint('invoice_bp', __name__)
 ocr_service = OCRService(lang="spa")
-UPLOAD_FOLDER = "uploads/"
+UPLOAD_FOLDER = Config.UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Definir tipos de archivo permitidos
-ALLOWED_MIME_TYPES = {'application/pdf', 'image/jpeg', 'image/png'}
+def _target_company_id():
+    """Company ID opcional del formulario; devuelve (company_id, respuesta de error o None)."""
+    company_id_str = request.form.get('company_id')
+    if not company_id_str:
+        return None, None
+    try:
+        target_company_id = int(company_id_str)
+    except ValueError:
+        return None, (jsonify({"error": "El campo 'company_id' debe ser un número entero."}), 400)
+    # Validar si la empresa existe
+    if not CompanyService.get_company_by_id(target_company_id):
+        return None, (jsonify({"error": f"El company_id '{target_company_id}' no corresponde a una empresa existente."}), 400)
+    print(f"Archivos serán asociados a la empresa ID: {target_company_id}")
+    return target_company_id, None
 
 class InvoiceOCRAPI(MethodView):
     def post(self):
         if 'file' not in request.files:
             return jsonify({"error": "No se encontraron archivos"}), 400
 
-        # --- Obtener Company ID (opcional) --- 
-        company_id_str = request.form.get('company_id')
-        target_company_id = None
-        if company_id_str:
-            try:
-                target_company_id = int(company_id_str)
-                # Validar si la empresa existe
-                company = CompanyService.get_company_by_id(target_company_id)
-                if not company:
-                     return jsonify({"error": f"El company_id '{target_company_id}' no corresponde a una empresa existente."}), 400
-                print(f"Archivos serán asociados a la empresa ID: {target_company_id}")
-            except ValueError:
-                return jsonify({"error": "El campo 'company_id' debe ser un número entero."}), 400
-        # --- Fin Obtener Company ID --- 
+        target_company_id, error = _target_company_id()
+        if error:
+            return error
 
         files = request.files.getlist("file")
         results = [] 
-        invoices_to_add = [] # Facturas nuevas para procesar
-        invoices_duplicated = [] # Facturas duplicadas detectadas
         today_folder = datetime.utcnow().strftime("%Y-%m-%d")
         upload_dir = os.path.join(UPLOAD_FOLDER, today_folder)
         os.makedirs(upload_dir, exist_ok=True)
 
+        saved_files = [] # Archivos guardados, a registrar en lote
+        saved_indexes = [] # Posición de cada uno en results
+
         for file in files:
             filename = secure_filename(file.filename)
-            filepath = os.path.join(upload_dir, filename)
 
             # 1. Validación de tipo MIME
             if file.content_type not in ALLOWED_MIME_TYPES:
@@ -61,11 +63,11 @@ class InvoiceOCRAPI(MethodView):
                 })
                 continue
 
-            # 2. Manejo de errores al guardar
+            # 2. Guardar en disco calculando el SHA-256 en el mismo recorrido
             try:
-                file.save(filepath)
+                filepath, content_hash, _ = save_stream_with_hash(file.stream, upload_dir, filename)
             except Exception as e: # Captura genérica, podría ser más específica (ej. IOError)
-                # Considerar loguear el error 'e' para depuración
+                print(f"Error al guardar el archivo {filename}: {e}")
                 results.append({
                     "filename": filename,
                     "status": "error",
@@ -73,103 +75,25 @@ class InvoiceOCRAPI(MethodView):
                 })
                 continue # Saltar al siguiente archivo
 
-            # Check de existencia previa
-            existing_invoice = Invoice.query.filter(func.lower(Invoice.filename) == filename.lower()).first()
-
-            if existing_invoice:
-                # Crear registro duplicado
-                invoice = Invoice(
-                    filename=filename,
-                    file_path=filepath, # Guardamos la ruta donde se intentó guardar/se guardó
-                    status="duplicated"
-                )
-                invoices_duplicated.append(invoice) # Añadir a lista de duplicados
-
-                results.append({
-                    "invoice_id": None, # O el ID existente si se quiere devolver
-                    "filename": invoice.filename,
-                    "status": invoice.status,
-                    "message": "Factura ya fue procesada anteriormente (detectado por nombre)."
-                })
-                continue
+            saved_indexes.append(len(results))
+            saved_files.append({"filename": filename, "filepath": filepath, "content_hash": content_hash})
+            results.append(None) # Se completa al registrar el lote
 
-            # Crear nueva factura para procesamiento CON company_id
-            invoice = Invoice(
-                filename=filename,
-                file_path=filepath,
-                status="pending_processing",
-                company_id=target_company_id # Asignar el company_id obtenido
-            )
-            invoices_to_add.append(invoice) # Añadir a la lista para commit único
-
-            # El ID no estará disponible hasta después del commit,
-            # así que lo recuperaremos después si es necesario para la respuesta
-            # o lo dejaremos como None/pendiente en la respuesta inmediata.
-
-            results.append({
-                "invoice_id": None, # ID se asignará después del commit
-                "filename": invoice.filename,
-                "company_id": invoice.company_id, # Incluir company_id en la respuesta
-                "status": invoice.status,
-                "message": "La factura ha sido aceptada para procesamiento."
-            })
-
-        # 3. Transacción única de BD usando el context manager
-        if invoices_to_add or invoices_duplicated:
+        # 3. Registro en lote: una consulta de duplicados, un INSERT multi-fila, un grupo de tareas y un evento
+        if saved_files:
             try:
-                # Usar el context manager para commit y emisión de evento
-                with db_session_context_with_event() as session:
-                    # Añadir tanto las nuevas como las duplicadas
-                    if invoices_to_add:
-                        session.add_all(invoices_to_add)
-                    if invoices_duplicated:
-                         # Asegurarse que el ID de duplicado se refleja si es necesario
-                        session.add_all(invoices_duplicated) 
-
-                    # Flush para obtener IDs antes de lanzar tareas y actualizar respuesta
-                    session.flush()
-
-                    # Actualizar IDs en la respuesta y lanzar tareas para las NUEVAS facturas
-                    processed_index = 0
-                    for i, result in enumerate(results):
-                        # Solo actualizar y lanzar tarea para las aceptadas para procesamiento
-                        if result["status"] == "pending_processing" and result["invoice_id"] is None:
-                            if processed_index < len(invoices_to_add):
-                                invoice = invoices_to_add[processed_index]
-                                results[i]["invoice_id"] = invoice.id # Asignar ID real
-                                results[i]["status"] = "processing" # Actualizar estado visual
-                                result["message"] = "La factura está siendo procesada automáticamente" # Mensaje actualizado
-                                
-                                # Lanzar tarea Celery
-                                from app.tasks.invoice_tasks import process_invoice_task
-                                process_invoice_task.delay(invoice.id)
-                                processed_index += 1
-                            else:
-                                results[i]["status"] = "error"
-                                results[i]["message"] = "Error interno al obtener ID de factura."
-                        
-                        # Actualizar ID para duplicados si es necesario mostrarlo (aunque no es común)
-                        # Buscamos por filename en la lista de duplicados (menos eficiente)
-                        # Una mejor alternativa sería usar un diccionario para mapear filename -> invoice_id
-                        # Pero por simplicidad, omitimos actualizar el ID de duplicados en la respuesta aquí.
-                        # if result["status"] == "duplicated":
-                        #     dup_invoice = next((inv for inv in invoices_duplicated if inv.filename == result["filename"]), None)
-                        #     if dup_invoice and dup_invoice.id:
-                        #         results[i]["invoice_id"] = dup_invoice.id
-                
-                # El commit y la emisión del evento ocurren aquí al salir del `with`
-            
+                for index, result in zip(saved_indexes, UploadService.register_files(saved_files, target_company_id)):
+                    results[index] = result
             except Exception as e:
-                # El context manager ya hizo rollback
+                # register_files ya hizo rollback
                 print(f"Error durante la transacción de subida: {e}")
-                # Marcar las facturas correspondientes en 'results' como fallidas
-                # (Podríamos refinar esto para saber cuáles exactamente fallaron si el error no fue genérico)
-                for result in results:
-                     if result["status"] == "pending_processing" or result["status"] == "duplicated":
-                         # Asumimos que si hubo un error en el `with`, ninguna se procesó/guardó correctamente
-                         result["status"] = "error"
-                         result["message"] = "Error al guardar los registros en la base de datos o emitir evento."
-                
+                for index, entry in zip(saved_indexes, saved_files):
+                    results[index] = {
+                        "filename": entry["filename"],
+                        "status": "error",
+                        "message": "Error al guardar los registros en la base de datos."
+                    }
+
                 # Devolver error 500 con detalles
                 return jsonify({
                     "error": "Ocurrió un error al procesar algunos archivos en la base de datos.",
@@ -179,6 +103,47 @@ class InvoiceOCRAPI(MethodView):
         return jsonify(results), 202 # 202 Accepted
 
 
+class InvoiceZipAPI(MethodView):
+    def post(self):
+        """Sube un ZIP con facturas: cada PDF/JPEG/PNG se extrae en streaming y se registra en un solo lote."""
+        archive = request.files.get('file')
+        if archive is None:
+            return jsonify({"error": "No se encontró el archivo ZIP (campo 'file')"}), 400
+
+        target_company_id, error = _target_company_id()
+        if error:
+            return error
+
+        upload_dir = os.path.join(UPLOAD_FOLDER, datetime.utcnow().strftime("%Y-%m-%d"))
+        try:
+            # FileStorage ya está en un archivo temporal (seekable): zipfile lee cada miembro sin cargarlo entero.
+            # La extracción corre en la solicitud: los límites acotan su duración y el disco que ocupa
+            extracted, skipped = extract_invoices_from_zip(
+                archive.stream, upload_dir,
+                max_file_size=Config.UPLOAD_MAX_FILE_SIZE,
+                max_files=Config.UPLOAD_MAX_FILES,
+                max_total_size=Config.UPLOAD_MAX_ZIP_SIZE
+            )
+        except zipfile.BadZipFile:
+            return jsonify({"error": "El archivo no es un ZIP válido."}), 400
+        except ZipLimitExceeded as e:
+            return jsonify({"error": str(e)}), 413
+
+        try:
+            results = UploadService.register_files(extracted, target_company_id)
+        except Exception as e:
+            print(f"Error durante la transacción de subida del ZIP: {e}")
+            # Nada quedó registrado: los archivos extraídos por esta solicitud no pertenecen a ninguna factura
+            remove_extracted(extracted)
+            return jsonify({
+                "error": "Ocurrió un error al registrar las facturas del ZIP en la base de datos.",
+                "extracted": len(extracted),
+                "skipped": skipped
+            }), 500
+
+        return jsonify({"results": results, "skipped": skipped}), 202 # 202 Accepted
+
+
 class InvoiceDetailAPI(MethodView):
     def get(self, invoice_id):
         invoice = Invoice.query.get(invoice_id)
@@ -190,11 +155,15 @@ class InvoiceDetailAPI(MethodView):
             "status": invoice.status,
             "final_data": invoice.final_data,
             "preview": invoice.preview_data,
-            "company_id": invoice.company_id # Devolver también el company_id
+            "company_id": invoice.company_id, # Devolver también el company_id
+            "duplicate_of_id": invoice.duplicate_of_id # Original si es un duplicado exacto o probable
         }), 200
 
 # POST /api/invoices/ocr con uno o más archivos
 invoice_bp.add_url_rule('/ocr', view_func=InvoiceOCRAPI.as_view('invoice_ocr'), methods=['POST'])
 
+# POST /api/ocr/zip con un archivo ZIP de facturas
+invoice_bp.add_url_rule('/ocr/zip', view_func=InvoiceZipAPI.as_view('invoice_ocr_zip'), methods=['POST'])
+
 # GET /api/invoices/<int:invoice_id>
 invoice_bp.add_url_rule('/<int:invoice_id>', view_func=InvoiceDetailAPI.as_view('invoice_detail'), methods=['GET'])
\ No newline at end of file
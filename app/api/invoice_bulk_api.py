@@ -0,0 +1,67 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.core.config import Config
+from app.services.invoice_bulk_service import InvoiceBulkService
+
+invoice_bulk_bp = Blueprint('invoice_bulk_bp', __name__)
+
+def _parse_items():
+    """
+    Lee el cuerpo {"invoices": [{"id": 1, "reason": "..."}]} o {"ids": [1, 2], "reason": "..."}.
+    La razón de cada ítem tiene prioridad sobre la general. Devuelve (ítems, respuesta de error o None).
+    """
+    body = request.get_json(silent=True) or {}
+    default_reason = body.get('reason')
+    raw_items = body.get('invoices')
+    if raw_items is None:
+        raw_items = [{"id": invoice_id} for invoice_id in body.get('ids') or []]
+    if not isinstance(raw_items, list) or not raw_items:
+        return None, (jsonify({"error": "El cuerpo JSON debe contener una lista no vacía 'invoices' o 'ids'."}), 400)
+    if len(raw_items) > Config.BULK_ACTION_MAX_INVOICES:
+        return None, (jsonify({"error": f"Se permiten como máximo {Config.BULK_ACTION_MAX_INVOICES} facturas por solicitud."}), 400)
+
+    items = []
+    seen = set()
+    for raw in raw_items:
+        invoice_id = raw.get('id') if isinstance(raw, dict) else None
+        if not isinstance(invoice_id, int) or isinstance(invoice_id, bool):
+            return None, (jsonify({"error": "Cada factura debe tener un 'id' entero."}), 400)
+        if invoice_id in seen:
+            continue
+        seen.add(invoice_id)
+        reason = raw.get('reason') or default_reason
+        items.append({"id": invoice_id, "reason": str(reason)[:1000] if reason else None})
+    return items, None
+
+def _response(results):
+    succeeded = sum(1 for result in results if "error" not in result)
+    return jsonify({
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }), 200
+
+class InvoiceBulkConfirmAPI(MethodView):
+    def post(self):
+        items, error = _parse_items()
+        if error:
+            return error
+        return _response(InvoiceBulkService.confirm(items))
+
+class InvoiceBulkRejectAPI(MethodView):
+    def post(self):
+        items, error = _parse_items()
+        if error:
+            return error
+        return _response(InvoiceBulkService.reject(items))
+
+class InvoiceBulkRetryAPI(MethodView):
+    def post(self):
+        items, error = _parse_items()
+        if error:
+            return error
+        return _response(InvoiceBulkService.retry(items))
+
+invoice_bulk_bp.add_url_rule('/api/invoices/bulk/confirm', view_func=InvoiceBulkConfirmAPI.as_view('invoice_bulk_confirm'), methods=['POST'])
+invoice_bulk_bp.add_url_rule('/api/invoices/bulk/reject', view_func=InvoiceBulkRejectAPI.as_view('invoice_bulk_reject'), methods=['POST'])
+invoice_bulk_bp.add_url_rule('/api/invoices/bulk/retry', view_func=InvoiceBulkRetryAPI.as_view('invoice_bulk_retry'), methods=['POST'])
@@ -3,6 +3,11 @@ from flask.views import MethodView
 from app.models.invoice import Invoice
 from app.core.extensions import db
 from app.services.openai_service import OpenAIService
+from app.services.search_service import SearchService
+from app.services.invoice_data_service import InvoiceDataService
+from app.services.analytics_service import AnalyticsService
+from app.services.invoice_bulk_service import CONFIRMABLE_STATUSES
+from app.services.review_queue_service import ReviewQueueService, ClaimConflict
 from app.tasks.invoice_tasks import db_session_context_with_event
 
 invoice_confirm_bp = Blueprint('invoice_confirm_bp', __name__)
@@ -12,24 +17,46 @@ class InvoiceConfirmAPI(MethodView):
     def post(self, invoice_id):
         invoice_data_for_response = {}
         with db_session_context_with_event() as session:
-            invoice = session.query(Invoice).get(invoice_id)
+            # Lock de la fila: un rechazo o reintento concurrente no cambia el estado entre la validación y la confirmación
+            invoice = session.query(Invoice).filter_by(id=invoice_id).with_for_update().first()
 
             if not invoice:
                 return jsonify({"error": "Factura no encontrada"}), 404
 
+            if invoice.status not in CONFIRMABLE_STATUSES:
+                return jsonify({"error": f"No se puede confirmar una factura con estado {invoice.status}"}), 409
+
             if not invoice.preview_data:
                 return jsonify({"error": "No hay datos previos para confirmar"}), 400
 
+            try:
+                ReviewQueueService.check_claim(invoice, ReviewQueueService.reviewer_from_request())
+            except ClaimConflict as e:
+                return jsonify({"error": str(e), "claimed_by": e.claimed_by}), 409
+
             invoice.final_data = invoice.preview_data
             invoice.status = "processed"
+            # Sale de la cola de revisión
+            ReviewQueueService.clear_claim(invoice)
             session.add(invoice)
 
+            # Columnas tipadas de invoices_data en la misma transacción que la confirmación
+            InvoiceDataService.sync(invoice, session)
+
             # Guardar datos para la respuesta ANTES de cerrar la sesión
             invoice_data_for_response = {
                 "id": invoice.id,
                 "status": invoice.status
             }
 
+        # Las analíticas cacheadas ya no reflejan los datos confirmados
+        AnalyticsService.invalidate()
+
+        # Reindexar con los datos confirmados (final_data)
+        invoice = Invoice.query.get(invoice_id)
+        if invoice:
+            SearchService.index_invoice(invoice)
+
         # Usar los datos guardados en la respuesta
         return jsonify({
             "invoice_id": invoice_data_for_response.get("id"),
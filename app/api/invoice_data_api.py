@@ -1,17 +1,78 @@
 from flask import Blueprint, jsonify, request
 from flask.views import MethodView
 from app.models.invoice_data import InvoiceData
+from app.services.invoice_data_service import InvoiceDataService, parse_date
+from sqlalchemy import asc, desc
 
 invoice_data_bp = Blueprint('invoice_data_bp', __name__)
 
+# Columnas indexadas por las que se puede ordenar
+ALLOWED_SORT_COLUMNS = {'invoice_id', 'invoice_number', 'amount_total', 'invoice_date', 'bill_to', 'currency'}
+
+def parse_data_filters(args) -> dict:
+    """
+    Lee los filtros de invoices_data de los query params (compartidos por el listado y la exportación).
+
+    Raises:
+        ValueError: Si algún filtro numérico o de fecha es inválido.
+    """
+    try:
+        company_id = int(args['company_id']) if args.get('company_id') else None
+        amount_min = float(args['amount_min']) if args.get('amount_min') else None
+        amount_max = float(args['amount_max']) if args.get('amount_max') else None
+    except ValueError:
+        raise ValueError("Los parámetros 'company_id', 'amount_min' y 'amount_max' deben ser numéricos.")
+
+    date_from = parse_date(args.get('date_from'))
+    date_to = parse_date(args.get('date_to'))
+    if (args.get('date_from') and not date_from) or (args.get('date_to') and not date_to):
+        raise ValueError("Los parámetros 'date_from' y 'date_to' deben tener formato YYYY-MM-DD.")
+
+    return {
+        "company_id": company_id,
+        "currencies": [currency.upper() for currency in args.getlist('currency')],
+        "invoice_number": args.get('invoice_number', '').strip(),
+        "bill_to": args.get('bill_to', '').strip(),
+        "date_from": date_from,
+        "date_to": date_to,
+        "amount_min": amount_min,
+        "amount_max": amount_max,
+    }
+
 class InvoiceDataAPI(MethodView):
     def get(self):
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
+        try:
+            page = int(request.args.get('page', 1))
+            per_page = int(request.args.get('per_page', 10))
+            if page <= 0: page = 1
+            if per_page <= 0: per_page = 10
+            per_page = min(per_page, 100)
+        except ValueError:
+            return jsonify({"error": "Los parámetros 'page' y 'per_page' deben ser números enteros."}), 400
+
+        try:
+            filters = parse_data_filters(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        sort_by = request.args.get('sort_by', 'invoice_date')
+        sort_order = request.args.get('sort_order', 'desc').lower()
+
+        if sort_by not in ALLOWED_SORT_COLUMNS:
+            sort_by = 'invoice_date'
+        if sort_order not in ['asc', 'desc']:
+            sort_order = 'desc'
+
+        query = InvoiceDataService.filtered_query(InvoiceData.query, filters)
 
-        query = InvoiceData.query
+        order_func = desc if sort_order == "desc" else asc
+        query = query.order_by(order_func(getattr(InvoiceData, sort_by)), order_func(InvoiceData.invoice_id))
 
-        invoices = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            invoices = query.paginate(page=page, per_page=per_page, error_out=False)
+        except Exception as e:
+            print(f"Error al consultar invoices_data: {e}")
+            return jsonify({"error": "Error al consultar los datos de facturas procesadas"}), 500
 
         result = []
         for inv in invoices.items:
@@ -20,6 +81,7 @@ class InvoiceDataAPI(MethodView):
                 "invoice_number": inv.invoice_number,
                 "amount_total": inv.amount_total,
                 "date": inv.date,
+                "invoice_date": inv.invoice_date.isoformat() if inv.invoice_date else None,
                 "bill_to": inv.bill_to,
                 "currency": inv.currency,
                 "payment_terms": inv.payment_terms,
@@ -29,9 +91,10 @@ class InvoiceDataAPI(MethodView):
             })
 
         return jsonify({
-            "page": page,
-            "per_page": per_page,
-            "total": len(result),
+            "page": invoices.page,
+            "per_page": invoices.per_page,
+            "total": invoices.total,
+            "pages": invoices.pages,
             "invoices": result
         }), 200
 
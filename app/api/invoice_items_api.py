@@ -0,0 +1,85 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.models.invoice_item import InvoiceItem
+from app.core.extensions import db
+from app.services.invoice_data_service import parse_date
+from sqlalchemy import func
+
+invoice_items_bp = Blueprint('invoice_items_bp', __name__)
+
+class InvoiceItemsAPI(MethodView):
+    def get(self):
+        try:
+            page = int(request.args.get('page', 1))
+            per_page = int(request.args.get('per_page', 50))
+            if page <= 0: page = 1
+            if per_page <= 0: per_page = 50
+            per_page = min(per_page, 200)
+            company_id = int(request.args['company_id']) if request.args.get('company_id') else None
+            price_min = float(request.args['unit_price_min']) if request.args.get('unit_price_min') else None
+            price_max = float(request.args['unit_price_max']) if request.args.get('unit_price_max') else None
+        except ValueError:
+            return jsonify({"error": "Los parámetros 'page', 'per_page', 'company_id', 'unit_price_min' y 'unit_price_max' deben ser numéricos."}), 400
+
+        date_from = parse_date(request.args.get('date_from'))
+        date_to = parse_date(request.args.get('date_to'))
+        if (request.args.get('date_from') and not date_from) or (request.args.get('date_to') and not date_to):
+            return jsonify({"error": "Los parámetros 'date_from' y 'date_to' deben tener formato YYYY-MM-DD."}), 400
+
+        description = request.args.get('description', '').strip()
+        sku = request.args.get('sku', '').strip()
+        currencies = [currency.upper() for currency in request.args.getlist('currency')]
+
+        filters = []
+        if description:
+            # Prefijo: usa el índice (description, invoice_date)
+            filters.append(InvoiceItem.description.like(f"{description}%"))
+        if sku:
+            filters.append(InvoiceItem.sku == sku)
+        if company_id is not None:
+            filters.append(InvoiceItem.company_id == company_id)
+        if currencies:
+            filters.append(InvoiceItem.currency.in_(currencies))
+        if date_from:
+            filters.append(InvoiceItem.invoice_date >= date_from)
+        if date_to:
+            filters.append(InvoiceItem.invoice_date <= date_to)
+        if price_min is not None:
+            filters.append(InvoiceItem.unit_price >= price_min)
+        if price_max is not None:
+            filters.append(InvoiceItem.unit_price <= price_max)
+
+        try:
+            # Totales del conjunto filtrado en una sola agregación SQL (ej. gasto en un producto en el trimestre)
+            totals = db.session.query(
+                func.count(InvoiceItem.id).label('items'),
+                func.count(func.distinct(InvoiceItem.invoice_id)).label('invoices'),
+                func.sum(InvoiceItem.quantity).label('quantity'),
+                func.sum(InvoiceItem.amount).label('amount')
+            ).filter(*filters).one()
+
+            pagination = (
+                InvoiceItem.query
+                .filter(*filters)
+                .order_by(InvoiceItem.invoice_date.desc(), InvoiceItem.id.desc())
+                .paginate(page=page, per_page=per_page, error_out=False, count=False)
+            )
+        except Exception as e:
+            print(f"Error al consultar invoice_items: {e}")
+            return jsonify({"error": "Error al consultar los ítems de facturas"}), 500
+
+        return jsonify({
+            "page": page,
+            "per_page": per_page,
+            "total": totals.items,
+            "pages": -(-totals.items // per_page),
+            "totals": {
+                "items": totals.items,
+                "invoices": totals.invoices,
+                "quantity": float(totals.quantity) if totals.quantity is not None else None,
+                "amount": float(totals.amount) if totals.amount is not None else None
+            },
+            "items": [item.to_dict() for item in pagination.items]
+        }), 200
+
+invoice_items_bp.add_url_rule('/api/invoices/items', view_func=InvoiceItemsAPI.as_view('invoice_items'), methods=['GET'])
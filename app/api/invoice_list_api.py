@@ -1,13 +1,60 @@
 from flask import Blueprint, jsonify, request
 from flask.views import MethodView
 from app.models.invoice import Invoice
-from sqlalchemy import asc, desc, inspect
-from app.utils.get_company_name import get_company_name_from_invoice
+from app.models.company import Company
+from app.models.invoice_search_index import InvoiceSearchIndex
+from app.services.search_service import SearchService
+from app.core.extensions import db, cache
+from app.core.config import Config
+from app.utils.cursor import encode_cursor, decode_cursor
+from sqlalchemy import and_, or_, func, select
+from datetime import datetime
+import hashlib
+import math
 
 invoice_list_bp = Blueprint('invoice_list_bp', __name__)
 
-# Columnas permitidas para ordenar
-ALLOWED_SORT_COLUMNS = {col.key for col in inspect(Invoice).c}
+# Columnas permitidas para ordenar (NOT NULL o siempre informadas) y tipo de su valor en el cursor.
+# El id se agrega siempre como desempate, así (columna, id) es única y la paginación por cursor es estable.
+SORT_COLUMN_TYPES = {
+    'id': int,
+    'filename': str,
+    'status': str,
+    'created_at': datetime,
+    'updated_at': datetime,
+}
+ALLOWED_SORT_COLUMNS = set(SORT_COLUMN_TYPES)
+
+def _filtered_query(query, statuses, search):
+    """Aplica los filtros del listado (estados y búsqueda de texto)."""
+    if statuses:
+        query = query.filter(Invoice.status.in_(statuses))
+    if search:
+        boolean_query = SearchService.to_boolean_query(search)
+        if boolean_query:
+            # Búsqueda por índice FULLTEXT (nombre de archivo, OCR y campos extraídos)
+            matching_ids = select(InvoiceSearchIndex.invoice_id).where(SearchService.match_clause(boolean_query))
+            query = query.filter(Invoice.id.in_(matching_ids))
+        else:
+            # Términos demasiado cortos para el índice: filtrar por nombre de archivo (case-insensitive)
+            query = query.filter(Invoice.filename.ilike(f"%{search}%"))
+    return query
+
+def _total_count(statuses, search, exact=False):
+    """
+    COUNT(*) del listado filtrado, cacheado por combinación de filtros durante INVOICE_LIST_COUNT_TTL segundos.
+    El total es aproximado (puede ir unos segundos atrasado); exact=True fuerza un conteo nuevo.
+    """
+    filters_key = "\x1f".join(sorted(statuses)) + "\x1e" + search
+    cache_key = f"invoice_list_total_{hashlib.sha1(filters_key.encode('utf-8')).hexdigest()}"
+    if not exact:
+        total = cache.get(cache_key)
+        if total is not None:
+            return total
+    # El conteo no necesita el join con companies ni ordenar
+    total = _filtered_query(db.session.query(func.count(Invoice.id)), statuses, search).scalar()
+    cache.set(cache_key, total, timeout=Config.INVOICE_LIST_COUNT_TTL)
+    return total
 
 class InvoiceListAPI(MethodView):
     def get(self):
@@ -26,6 +73,9 @@ class InvoiceListAPI(MethodView):
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc').lower()
+        cursor = request.args.get('cursor')
+        # include_total: 'approx' (default, cacheado), 'exact' o 'false'
+        include_total = request.args.get('include_total', 'approx').lower()
 
         # Validar sort_by
         if sort_by not in ALLOWED_SORT_COLUMNS:
@@ -35,46 +85,72 @@ class InvoiceListAPI(MethodView):
         if sort_order not in ['asc', 'desc']:
             sort_order = 'desc' # Volver al default si no es válido
 
-        query = Invoice.query
-
-        # Filtrar por múltiples estados si se proporcionan
-        if statuses:
-            # valid_statuses = [s for s in statuses if s in Invoice.VALID_STATUSES] # Ejemplo
-            # if valid_statuses:
-            #    query = query.filter(Invoice.status.in_(valid_statuses))
-            query = query.filter(Invoice.status.in_(statuses))
+        # Solo las columnas que se devuelven; el nombre de la empresa llega por join (sin consultas por fila)
+        query = db.session.query(
+            Invoice.id,
+            Invoice.filename,
+            Invoice.status,
+            Invoice.created_at,
+            Invoice.claimed_by,
+            Invoice.claim_expires_at,
+            getattr(Invoice, sort_by).label('sort_value'),
+            Company.name.label('company_name')
+        ).outerjoin(Company, Company.id == Invoice.company_id)
+        query = _filtered_query(query, statuses, search)
 
-        if search:
-            # Filtrar por nombre de archivo (case-insensitive)
-            query = query.filter(Invoice.filename.ilike(f"%{search}%"))
+        sort_column = getattr(Invoice, sort_by)
+        if cursor:
+            # Paginación por cursor: WHERE (columna, id) > / < (último valor, último id), sin OFFSET
+            try:
+                last_value, last_id = decode_cursor(cursor, SORT_COLUMN_TYPES[sort_by], int)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            if sort_order == "desc":
+                query = query.filter(or_(sort_column < last_value, and_(sort_column == last_value, Invoice.id < last_id)))
+            else:
+                query = query.filter(or_(sort_column > last_value, and_(sort_column == last_value, Invoice.id > last_id)))
+        elif page > 1:
+            # Compatibilidad con la paginación por número de página (OFFSET); para páginas profundas usar cursor
+            query = query.offset((page - 1) * per_page)
 
         # Aplicar ordenación
-        sort_column = getattr(Invoice, sort_by)
-        order_func = desc if sort_order == "desc" else asc
-        query = query.order_by(order_func(sort_column))
+        if sort_order == "desc":
+            query = query.order_by(sort_column.desc(), Invoice.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Invoice.id.asc())
 
         try:
-            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-            for invoice in pagination.items:
-                invoice.company_name = get_company_name_from_invoice(invoice)
+            # Una fila de más indica si hay página siguiente
+            rows = query.limit(per_page + 1).all()
+            has_more = len(rows) > per_page
+            rows = rows[:per_page]
+
+            total = None
+            if include_total != 'false':
+                total = _total_count(statuses, search, exact=(include_total == 'exact'))
         except Exception as e:
             # Loguear el error e
             return jsonify({"error": "Error al consultar la base de datos"}), 500
 
+        now = datetime.utcnow()
         result = {
-            "page": pagination.page, # Usar el valor de la paginación por si se ajustó
-            "per_page": pagination.per_page,
-            "total": pagination.total,
-            "pages": pagination.pages,
+            "page": page if not cursor else None,
+            "per_page": per_page,
+            "total": total,
+            "total_is_approximate": include_total != 'exact' if total is not None else None,
+            "pages": math.ceil(total / per_page) if total is not None else None,
+            "next_cursor": encode_cursor(rows[-1].sort_value, rows[-1].id) if has_more and rows else None,
             "invoices": [
                 {
-                    "id": invoice.id,
-                    "filename": invoice.filename,
-                    "status": invoice.status,
-                    "company_name": invoice.company_name,
-                    "created_at": invoice.created_at.isoformat() if invoice.created_at else None,
+                    "id": row.id,
+                    "filename": row.filename,
+                    "status": row.status,
+                    "company_name": row.company_name or "Sin compañía",
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                    # Revisor con reserva vigente en la cola de revisión (None si está libre)
+                    "claimed_by": row.claimed_by if row.claim_expires_at and row.claim_expires_at >= now else None,
                 }
-                for invoice in pagination.items
+                for row in rows
             ]
         }
 
@@ -0,0 +1,53 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.models.invoice import Invoice
+from app.services.invoice_timeline_service import InvoiceTimelineService
+
+invoice_logs_bp = Blueprint('invoice_logs_bp', __name__)
+
+def _list_arg(name):
+    """Acepta tanto ?level=info&level=error como ?level=info,error."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(value.strip() for value in raw.split(',') if value.strip())
+    return values
+
+class InvoiceLogsAPI(MethodView):
+    def get(self, invoice_id):
+        try:
+            limit = int(request.args.get('limit', 50))
+            if limit <= 0: limit = 50
+            limit = min(limit, 200)
+        except ValueError:
+            return jsonify({"error": "El parámetro 'limit' debe ser un número entero."}), 400
+
+        order = request.args.get('order', 'desc').lower()
+        if order not in ['asc', 'desc']:
+            order = 'desc'
+
+        # Evita paginar logs de una factura inexistente (la tabla de logs no tiene FK)
+        if not Invoice.query.with_entities(Invoice.id).filter_by(id=invoice_id).first():
+            return jsonify({"error": "Factura no encontrada"}), 404
+
+        try:
+            result = InvoiceTimelineService.page(
+                invoice_id,
+                limit=limit,
+                cursor=request.args.get('cursor') or None,
+                order=order,
+                levels=_list_arg('level'),
+                categories=_list_arg('category'),
+                events=_list_arg('event'),
+                extra_fields=_list_arg('extra')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "invoice_id": invoice_id,
+            "limit": limit,
+            "order": order,
+            **result
+        }), 200
+
+invoice_logs_bp.add_url_rule('/api/invoices/<int:invoice_id>/logs', view_func=InvoiceLogsAPI.as_view('invoice_logs'), methods=['GET'])
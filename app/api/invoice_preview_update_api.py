@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from app.core.extensions import db, socketio
 from app.models.invoice import Invoice
 from app.models.invoice_log import InvoiceLog
+from app.services.search_service import SearchService
+from app.services.review_queue_service import ReviewQueueService
 from sqlalchemy.exc import SQLAlchemyError
 import json
 import datetime
@@ -47,6 +49,15 @@ def update_invoice_preview(invoice_id):
             session.rollback() # Liberar el bloqueo si no se encontró
             return jsonify({"error": f"Factura con ID {invoice_id} no encontrada"}), 404
 
+        # Si otro revisor la tiene reservada en la cola de revisión, no se pisan sus cambios
+        if ReviewQueueService.is_claimed_by_other(invoice.claimed_by, invoice.claim_expires_at, ReviewQueueService.reviewer_from_request()):
+            session.rollback()
+            return jsonify({
+                "error": f"La factura está reservada por otro revisor ({invoice.claimed_by})",
+                "claimed_by": invoice.claimed_by,
+                "claim_expires_at": invoice.claim_expires_at.isoformat()
+            }), 409
+
         # Actualizar el campo preview_data.
         # Asignar el diccionario directamente (asumiendo columna JSON/JSONB nativo)
         try:
@@ -71,6 +82,9 @@ def update_invoice_preview(invoice_id):
         # Commit para guardar los cambios y liberar el bloqueo
         session.commit()
 
+        # Reindexar los campos editados para la búsqueda
+        SearchService.index_invoice(invoice)
+
         # Emitir evento WebSocket DESPUÉS del commit exitoso
         try:
             # Enviamos los datos actualizados para que la UI los use
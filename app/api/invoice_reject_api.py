@@ -3,6 +3,7 @@ from flask.views import MethodView
 from app.models.invoice import Invoice
 from app.models.invoice_log import InvoiceLog
 from app.core.extensions import db
+from app.services.review_queue_service import ReviewQueueService, ClaimConflict
 from app.tasks.invoice_tasks import db_session_context_with_event
 
 invoice_reject_bp = Blueprint('invoice_reject_bp', __name__)
@@ -19,9 +20,16 @@ class InvoiceRejectAPI(MethodView):
             if invoice.status not in ["waiting_validation", "processing", "failed"]:
                 return jsonify({"error": f"No se puede rechazar una factura con estado {invoice.status}"}), 400
 
+            try:
+                ReviewQueueService.check_claim(invoice, ReviewQueueService.reviewer_from_request())
+            except ClaimConflict as e:
+                return jsonify({"error": str(e), "claimed_by": e.claimed_by}), 409
+
             reason = request.json.get("reason", "Rechazo manual por el usuario.")
 
             invoice.status = "rejected"
+            # Sale de la cola de revisión
+            ReviewQueueService.clear_claim(invoice)
             session.add(invoice)
             session.add(InvoiceLog(
                 invoice_id=invoice.id,
@@ -4,6 +4,8 @@ from app.models.invoice import Invoice
 from app.models.invoice_log import InvoiceLog
 from app.core.extensions import db
 from app.tasks.invoice_tasks import process_invoice_task
+from app.services.single_flight_service import SingleFlightService
+from app.services.invoice_timeline_service import InvoiceTimelineService
 
 invoice_retry_bp = Blueprint('invoice_retry_bp', __name__)
 
@@ -19,7 +21,7 @@ class InvoiceRetryAPI(MethodView):
 
         # Obtener la última razón de rechazo, si existe
         rejection_reason = None
-        last_rejection_log = InvoiceLog.query.filter_by(invoice_id=invoice_id, event="rejected").order_by(InvoiceLog.id.desc()).first()
+        last_rejection_log = InvoiceTimelineService.last_event(invoice_id, "rejected")
         if last_rejection_log and last_rejection_log.details:
             rejection_reason = last_rejection_log.details
             print(f"Reintentando factura {invoice_id} con razón de rechazo anterior: {rejection_reason}")
@@ -37,6 +39,9 @@ class InvoiceRetryAPI(MethodView):
 
         db.session.commit()
 
+        # Descartar el resultado compartido de la ejecución anterior para que este reintento procese de nuevo
+        SingleFlightService("invoice").forget(str(invoice.id))
+
         # Encolamos nuevamente en Celery, pasando la razón del rechazo si existe
         process_invoice_task.delay(invoice.id, rejection_reason=rejection_reason)
 
@@ -0,0 +1,81 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.core.config import Config
+from app.services.review_queue_service import ReviewQueueService
+
+invoice_review_queue_bp = Blueprint('invoice_review_queue_bp', __name__)
+
+def _parse_ids(body: dict, required: bool = True):
+    """Lista de ids enteros del cuerpo; devuelve (ids, respuesta de error o None)."""
+    ids = body.get('ids')
+    if ids is None and not required:
+        return None, None
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return None, (jsonify({"error": "El cuerpo JSON debe contener una lista no vacía 'ids' de enteros."}), 400)
+    if len(ids) > Config.BULK_ACTION_MAX_INVOICES:
+        return None, (jsonify({"error": f"Se permiten como máximo {Config.BULK_ACTION_MAX_INVOICES} facturas por solicitud."}), 400)
+    return list(dict.fromkeys(ids)), None
+
+def _missing_reviewer():
+    return jsonify({"error": "Falta el revisor (cabecera 'X-Reviewer' o campo 'reviewer')."}), 400
+
+class ReviewQueueClaimAPI(MethodView):
+    def get(self):
+        """Reservas vigentes del revisor."""
+        reviewer = ReviewQueueService.reviewer_from_request()
+        if not reviewer:
+            return _missing_reviewer()
+        return jsonify({"reviewer": reviewer, "invoices": ReviewQueueService.claimed(reviewer)}), 200
+
+    def post(self):
+        """Reserva las siguientes 'limit' facturas libres de la cola."""
+        reviewer = ReviewQueueService.reviewer_from_request()
+        if not reviewer:
+            return _missing_reviewer()
+        body = request.get_json(silent=True) or {}
+        try:
+            limit = int(body.get('limit', 10))
+            company_id = int(body['company_id']) if body.get('company_id') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"error": "'limit' y 'company_id' deben ser números enteros."}), 400
+        if limit < 1 or limit > Config.REVIEW_CLAIM_MAX_INVOICES:
+            return jsonify({"error": f"'limit' debe estar entre 1 y {Config.REVIEW_CLAIM_MAX_INVOICES}."}), 400
+
+        invoices = ReviewQueueService.claim(reviewer, limit, company_id=company_id)
+        return jsonify({
+            "reviewer": reviewer,
+            "lease_seconds": Config.REVIEW_CLAIM_TTL_SECONDS,
+            "invoices": invoices
+        }), 200
+
+class ReviewQueueHeartbeatAPI(MethodView):
+    def post(self):
+        """Renueva el lease de las facturas reservadas; las no renovadas ya no pertenecen al revisor."""
+        reviewer = ReviewQueueService.reviewer_from_request()
+        if not reviewer:
+            return _missing_reviewer()
+        ids, error = _parse_ids(request.get_json(silent=True) or {})
+        if error:
+            return error
+        renewed, expires_at = ReviewQueueService.heartbeat(reviewer, ids)
+        renewed_set = set(renewed)
+        return jsonify({
+            "renewed": renewed,
+            "lost": [invoice_id for invoice_id in ids if invoice_id not in renewed_set],
+            "claim_expires_at": expires_at.isoformat()
+        }), 200
+
+class ReviewQueueReleaseAPI(MethodView):
+    def post(self):
+        """Libera las facturas indicadas (o todas las del revisor si no se envían ids)."""
+        reviewer = ReviewQueueService.reviewer_from_request()
+        if not reviewer:
+            return _missing_reviewer()
+        ids, error = _parse_ids(request.get_json(silent=True) or {}, required=False)
+        if error:
+            return error
+        return jsonify({"released": ReviewQueueService.release(reviewer, ids)}), 200
+
+invoice_review_queue_bp.add_url_rule('/api/invoices/review-queue/claim', view_func=ReviewQueueClaimAPI.as_view('invoice_review_queue_claim'), methods=['GET', 'POST'])
+invoice_review_queue_bp.add_url_rule('/api/invoices/review-queue/heartbeat', view_func=ReviewQueueHeartbeatAPI.as_view('invoice_review_queue_heartbeat'), methods=['POST'])
+invoice_review_queue_bp.add_url_rule('/api/invoices/review-queue/release', view_func=ReviewQueueReleaseAPI.as_view('invoice_review_queue_release'), methods=['POST'])
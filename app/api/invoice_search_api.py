@@ -0,0 +1,39 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.services.search_service import SearchService
+import time
+
+invoice_search_bp = Blueprint('invoice_search_bp', __name__)
+
+class InvoiceSearchAPI(MethodView):
+    def get(self):
+        term = request.args.get('q', '').strip()
+        if not term:
+            return jsonify({"error": "El parámetro 'q' es obligatorio."}), 400
+
+        try:
+            limit = int(request.args.get('limit', 20))
+            if limit <= 0: limit = 20
+            limit = min(limit, 100)
+        except ValueError:
+            return jsonify({"error": "El parámetro 'limit' debe ser un número entero."}), 400
+
+        statuses = request.args.getlist('status')
+
+        start_time = time.time()
+        try:
+            results = SearchService.search(term, limit=limit, statuses=statuses)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(f"Error en búsqueda de facturas '{term}': {e}")
+            return jsonify({"error": "Error al consultar la base de datos"}), 500
+
+        return jsonify({
+            "query": term,
+            "limit": limit,
+            "took_ms": round((time.time() - start_time) * 1000, 2),
+            "results": results
+        }), 200
+
+invoice_search_bp.add_url_rule('/api/invoices/search', view_func=InvoiceSearchAPI.as_view('invoice_search'), methods=['GET'])
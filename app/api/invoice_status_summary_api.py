@@ -1,9 +1,6 @@
 from flask import Blueprint, jsonify, request
 from flask.views import MethodView
-from app.models.invoice_status_summary import InvoiceStatusSummary
-from app.models.invoice import Invoice
-from app.core.extensions import db
-from sqlalchemy import func, cast, Date
+from app.services.status_counter_service import StatusCounterService
 from datetime import datetime
 
 invoice_summary_bp = Blueprint('invoice_summary_bp', __name__)
@@ -12,29 +9,27 @@ class InvoiceStatusSummaryAPI(MethodView):
     def get(self):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
-
-        query = db.session.query(
-            Invoice.status,
-            func.count(Invoice.id).label('total')
-        )
+        start_date = None
+        end_date = None
+        try:
+            company_id = int(request.args['company_id']) if request.args.get('company_id') else None
+        except ValueError:
+            return jsonify({"error": "El parámetro 'company_id' debe ser un número entero."}), 400
 
         if start_date_str:
             try:
                 start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                query = query.filter(cast(Invoice.created_at, Date) >= start_date)
             except ValueError:
                 return jsonify({"error": "Formato de start_date inválido. Usar YYYY-MM-DD."}), 400
         
         if end_date_str:
             try:
                 end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                query = query.filter(cast(Invoice.created_at, Date) <= end_date)
             except ValueError:
                 return jsonify({"error": "Formato de end_date inválido. Usar YYYY-MM-DD."}), 400
 
-        results = query.group_by(Invoice.status).all()
-        
-        summary = {r.status: r.total for r in results}
+        # Respondido desde los contadores diarios (invoice_status_daily), sin recorrer invoices
+        summary = StatusCounterService.summary(start_date, end_date, company_id)
 
         return jsonify({
             "summary": summary
@@ -1,8 +1,7 @@
 from flask import Blueprint, jsonify, request
-from app.models.invoice import Invoice
-from app.core.extensions import db
-from sqlalchemy import func, cast, Date
-from datetime import datetime, timedelta
+from app.services.status_counter_service import StatusCounterService
+from app.core.config import Config
+from datetime import datetime, timedelta, time
 from flask.views import MethodView
 
 invoice_trends_bp = Blueprint('invoice_trends_bp', __name__)
@@ -13,6 +12,14 @@ class InvoiceTrendsAPI(MethodView):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
         target_status = request.args.get('status', 'processed') # Por defecto 'processed'
+        granularity = request.args.get('granularity', 'day').lower() # 'day' u 'hour'
+        by_company = request.args.get('group_by') == 'company'
+        try:
+            company_id = int(request.args['company_id']) if request.args.get('company_id') else None
+        except ValueError:
+            return jsonify({"error": "El parámetro 'company_id' debe ser un número entero."}), 400
+        if granularity not in ['day', 'hour']:
+            return jsonify({"error": "El parámetro 'granularity' debe ser 'day' u 'hour'."}), 400
 
         today = datetime.utcnow().date()
         
@@ -47,44 +54,39 @@ class InvoiceTrendsAPI(MethodView):
         if start_date > end_date:
             return jsonify({"error": "start_date no puede ser posterior a end_date."}), 400
 
-        # Construir la consulta base
-        query = db.session.query(
-            cast(Invoice.created_at, Date).label('date'),
-            func.count(Invoice.id).label('count')
-        ).filter(
-            Invoice.status == target_status
-        ).filter(
-            cast(Invoice.created_at, Date) >= start_date
-        ).filter(
-            cast(Invoice.created_at, Date) <= end_date
-        ).group_by(
-            cast(Invoice.created_at, Date)
-        ).order_by(
-            cast(Invoice.created_at, Date)
-        )
-
-        results = query.all()
+        if granularity == 'hour':
+            # Los contadores por hora solo cubren los últimos STATUS_HOURLY_RETENTION_DAYS días
+            if (end_date - start_date).days >= Config.STATUS_HOURLY_RETENTION_DAYS:
+                return jsonify({"error": f"Con granularity=hour el rango no puede superar {Config.STATUS_HOURLY_RETENTION_DAYS} días."}), 400
+            range_start = datetime.combine(start_date, time.min)
+            range_end = datetime.combine(end_date, time(23))
+            step = timedelta(hours=1)
+        else:
+            range_start, range_end, step = start_date, end_date, timedelta(days=1)
 
-        # Crear un diccionario con todos los días en el rango, inicializados a 0
-        # Esto asegura que los días sin facturas también aparezcan en el resultado.
-        trend_data_map = {}
-        current_date = start_date
-        while current_date <= end_date:
-            trend_data_map[current_date.isoformat()] = 0
-            current_date += timedelta(days=1)
-        
-        for r in results:
-            trend_data_map[r.date.isoformat()] = r.count
-            
-        # Convertir el mapa a la lista de objetos deseada
-        trend_data_list = [{"date": date_str, "count": count_val} for date_str, count_val in trend_data_map.items()]
-        # Ordenar por fecha, ya que el dict no garantiza orden en versiones antiguas de Python (aunque aquí debería estarlo por cómo se llena)
-        trend_data_list.sort(key=lambda x: x['date'])
+        # Conteos desde los rollups (invoice_status_daily / invoice_status_hourly), sin recorrer invoices
+        series = StatusCounterService.series(
+            target_status, range_start, range_end,
+            hourly=(granularity == 'hour'), company_id=company_id, by_company=by_company
+        )
 
+        # Todos los días (u horas) del rango, inicializados a 0, para que los huecos también aparezcan
+        trend_data_list = []
+        current = range_start
+        while current <= range_end:
+            value = series.get(current, {} if by_company else 0)
+            item = {"date": current.isoformat(), "count": sum(value.values()) if by_company else value}
+            if by_company:
+                # Claves como texto para JSON; "null" agrupa las facturas sin empresa
+                item["companies"] = {(str(key) if key is not None else "null"): count for key, count in value.items()}
+            trend_data_list.append(item)
+            current += step
 
         return jsonify({
             "trend_data": trend_data_list,
             "status_queried": target_status,
+            "granularity": granularity,
+            "company_id": company_id,
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat()
         }), 200
@@ -0,0 +1,87 @@
+from flask import Blueprint, jsonify, request
+from flask.views import MethodView
+from app.core.config import Config
+from app.services.company_service import CompanyService
+from app.services.upload_service import UploadService, UploadOffsetMismatch
+
+invoice_upload_bp = Blueprint('invoice_upload_bp', __name__)
+
+class UploadSessionCreateAPI(MethodView):
+    def post(self):
+        """Inicia una subida por fragmentos: {"company_id": opcional, "files": [{"filename", "size"}]}."""
+        body = request.get_json(silent=True) or {}
+        company_id = body.get('company_id')
+        if company_id is not None:
+            if not isinstance(company_id, int) or isinstance(company_id, bool):
+                return jsonify({"error": "El campo 'company_id' debe ser un número entero."}), 400
+            if not CompanyService.get_company_by_id(company_id):
+                return jsonify({"error": f"El company_id '{company_id}' no corresponde a una empresa existente."}), 400
+
+        files = body.get('files')
+        if not isinstance(files, list):
+            return jsonify({"error": "El cuerpo JSON debe contener la lista 'files'."}), 400
+        try:
+            upload = UploadService.create_session(files, company_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({**upload.to_dict(), "chunk_size": Config.UPLOAD_CHUNK_SIZE}), 201
+
+class UploadSessionAPI(MethodView):
+    def get(self, upload_id):
+        """Estado de la sesión: 'received' de cada archivo es el offset desde el que reanudar."""
+        upload = UploadService.get_session(upload_id)
+        if not upload:
+            return jsonify({"error": "Sesión de subida no encontrada"}), 404
+        return jsonify(upload.to_dict()), 200
+
+class UploadChunkAPI(MethodView):
+    def put(self, upload_id, file_id):
+        """Recibe un fragmento (cuerpo binario) que empieza en ?offset=N."""
+        try:
+            offset = int(request.args['offset'])
+        except (KeyError, ValueError):
+            return jsonify({"error": "El parámetro 'offset' es obligatorio y debe ser un número entero."}), 400
+        length = request.content_length
+        if not length:
+            return jsonify({"error": "El fragmento está vacío o falta Content-Length."}), 400
+
+        try:
+            result = UploadService.write_chunk(upload_id, file_id, offset, request.stream, length)
+        except UploadOffsetMismatch as e:
+            return jsonify({"error": str(e), "received": e.expected_offset}), 409
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+        except OSError as e:
+            print(f"Error al guardar el fragmento del archivo {file_id} de la sesión {upload_id}: {e}")
+            return jsonify({"error": "Error al guardar el fragmento en el servidor."}), 500
+
+        if result is None:
+            return jsonify({"error": "Archivo de la sesión de subida no encontrado"}), 404
+        return jsonify(result), 200
+
+class UploadSessionCompleteAPI(MethodView):
+    def post(self, upload_id):
+        """Cierra la sesión. Con archivos sin terminar responde 409, salvo ?discard_incomplete=true."""
+        upload = UploadService.get_session(upload_id)
+        if not upload:
+            return jsonify({"error": "Sesión de subida no encontrada"}), 404
+
+        incomplete = UploadService.incomplete_files(upload)
+        if incomplete and request.args.get('discard_incomplete', 'false').lower() != 'true':
+            return jsonify({
+                "error": "Hay archivos sin terminar de subir.",
+                "incomplete": [file.to_dict() for file in incomplete]
+            }), 409
+
+        upload = UploadService.complete(upload)
+        return jsonify(upload.to_dict()), 200
+
+# POST /api/invoices/uploads
+invoice_upload_bp.add_url_rule('/api/invoices/uploads', view_func=UploadSessionCreateAPI.as_view('upload_session_create'), methods=['POST'])
+# GET /api/invoices/uploads/<upload_id>
+invoice_upload_bp.add_url_rule('/api/invoices/uploads/<string:upload_id>', view_func=UploadSessionAPI.as_view('upload_session'), methods=['GET'])
+# PUT /api/invoices/uploads/<upload_id>/files/<file_id>?offset=N
+invoice_upload_bp.add_url_rule('/api/invoices/uploads/<string:upload_id>/files/<int:file_id>', view_func=UploadChunkAPI.as_view('upload_chunk'), methods=['PUT'])
+# POST /api/invoices/uploads/<upload_id>/complete
+invoice_upload_bp.add_url_rule('/api/invoices/uploads/<string:upload_id>/complete', view_func=UploadSessionCompleteAPI.as_view('upload_session_complete'), methods=['POST'])
@@ -0,0 +1,52 @@
+from flask import Blueprint, Response
+from flask.views import MethodView
+import os
+import redis
+from app.services.resource_monitor_service import ResourceMonitor
+from app.services.log_service import LogService
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+# Métricas expuestas por worker: (clave en la muestra, nombre Prometheus, descripción)
+WORKER_GAUGES = [
+    ("rss_mb", "invoice_worker_rss_megabytes", "Memoria residente del proceso worker en MB"),
+    ("cpu_percent", "invoice_worker_cpu_percent", "Uso de CPU del proceso worker desde la muestra anterior"),
+    ("cpu_seconds", "invoice_worker_cpu_seconds_total", "Tiempo de CPU acumulado del proceso worker"),
+    ("open_fds", "invoice_worker_open_fds", "Descriptores de archivo abiertos por el proceso worker"),
+    ("threads", "invoice_worker_threads", "Hilos del proceso worker"),
+    ("tesseract_processes", "invoice_worker_tesseract_processes", "Procesos hijos de Tesseract en ejecución"),
+]
+
+class MetricsAPI(MethodView):
+    def get(self):
+        """Expone las últimas muestras de recursos de los workers en formato de texto Prometheus."""
+        try:
+            samples = ResourceMonitor.collect_published()
+        except redis.RedisError as e:
+            print(f"Error al leer métricas de workers desde Redis: {e}")
+            return Response("# error: redis no disponible\n", status=503, mimetype="text/plain")
+
+        lines = []
+        for key, name, description in WORKER_GAUGES:
+            metric_type = "counter" if name.endswith("_total") else "gauge"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for worker, sample in sorted(samples.items()):
+                value = sample.get(key)
+                if value is not None:
+                    lines.append(f'{name}{{worker="{worker}"}} {value}')
+
+        # Eventos descartados por los filtros de LogService (workers + este proceso web)
+        drops_by_worker = {worker: sample.get("log_drops") or {} for worker, sample in samples.items()}
+        drops_by_worker[f"web:{os.getpid()}"] = LogService.dropped_counts()
+        lines.append("# HELP invoice_logs_dropped_total Eventos de log descartados antes de la BD por nivel/muestreo")
+        lines.append("# TYPE invoice_logs_dropped_total counter")
+        for worker, drops in sorted(drops_by_worker.items()):
+            for key, count in sorted(drops.items()):
+                category, level = key.split(":", 1)
+                lines.append(f'invoice_logs_dropped_total{{worker="{worker}",category="{category}",level="{level}"}} {count}')
+
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+# GET /metrics (scraping de Prometheus)
+metrics_bp.add_url_rule('/metrics', view_func=MetricsAPI.as_view('metrics'), methods=['GET'])
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,7 +13,8 @@ def create_celery_app():
     celery = Celery(
         __name__,
         broker=broker_url,
-        backend=backend_url
+        backend=backend_url,
+        include=['app.tasks.invoice_tasks', 'app.tasks.maintenance_tasks']
     )
     celery.conf.update(
         task_serializer='json',
@@ -28,6 +30,34 @@ def create_celery_app():
         worker_concurrency=2,           # Limita a 2 procesos de trabajo
         broker_pool_limit=5,            # Limita las conexiones al broker
         worker_max_memory_per_child=256*1024,  # Reinicia el worker después de usar 256MB
+        beat_schedule={
+            # Particiones futuras de invoice_logs + archivo y DROP PARTITION de las vencidas
+            'archive-invoice-log-partitions': {
+                'task': 'archive_invoice_log_partitions',
+                'schedule': crontab(hour=3, minute=0),
+            },
+            # Corrige desvíos de invoice_status_daily contra invoices
+            'reconcile-status-counters': {
+                'task': 'reconcile_status_counters',
+                'schedule': crontab(hour=3, minute=30),
+            },
+            # Comprime los datos pesados de las facturas finalizadas más antiguas que INVOICE_ARCHIVE_MONTHS
+            'archive-old-invoices': {
+                'task': 'archive_old_invoices',
+                'schedule': crontab(hour=4, minute=0),
+            },
+            # Indexa para búsqueda las facturas que aún no tienen documento (ej. creadas antes del índice);
+            # cada lote se confirma por separado, así una corrida cortada por el time limit sigue en la siguiente
+            'reindex-missing-invoice-search': {
+                'task': 'reindex_invoice_search',
+                'schedule': crontab(minute=45),
+            },
+            # Expira las subidas por fragmentos abandonadas y borra sus parciales
+            'cleanup-upload-sessions': {
+                'task': 'cleanup_upload_sessions',
+                'schedule': crontab(minute=15),
+            },
+        },
     )
     return celery
 
@@ -18,4 +18,78 @@ class Config:
     # Configuración de caché con Redis
     CACHE_TYPE = os.getenv('CACHE_TYPE', 'redis')
     CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://redis:6379/3')
-    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 3600))  # 1 hora por defecto
\ No newline at end of file
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 3600))  # 1 hora por defecto
+
+    # Redis para coordinación entre workers (locks de single-flight, etc.)
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/0')
+    SINGLE_FLIGHT_LOCK_TTL = int(os.getenv('SINGLE_FLIGHT_LOCK_TTL', 330))  # Mayor que task_time_limit para cubrir la tarea completa
+    SINGLE_FLIGHT_RESULT_TTL = int(os.getenv('SINGLE_FLIGHT_RESULT_TTL', 600))  # Tiempo que se comparte un resultado ya calculado
+    SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', 120))  # Espera máxima de un segundo llamador (muy por debajo de task_soft_time_limit)
+
+    # Eventos de progreso del worker (intervalo mínimo en segundos entre eventos de una misma factura)
+    PROGRESS_MIN_INTERVAL = float(os.getenv('PROGRESS_MIN_INTERVAL', 1.0))
+    PROGRESS_BROADCAST_INTERVAL = float(os.getenv('PROGRESS_BROADCAST_INTERVAL', 5.0))  # Progreso a todo el namespace, por factura
+
+    # Muestreo de recursos del worker en segundo plano
+    RESOURCE_SAMPLE_INTERVAL = float(os.getenv('RESOURCE_SAMPLE_INTERVAL', 5.0))  # Segundos entre muestras
+    RESOURCE_SAMPLE_BUFFER = int(os.getenv('RESOURCE_SAMPLE_BUFFER', 720))  # Muestras en el ring buffer (1 hora a 5s)
+
+    # OCR adaptativo según presupuesto de memoria
+    OCR_MEMORY_BUDGET_MB = int(os.getenv('OCR_MEMORY_BUDGET_MB', 160))  # Debe quedar por debajo de worker_max_memory_per_child (256MB)
+    OCR_DEFAULT_DPI = int(os.getenv('OCR_DEFAULT_DPI', 200))
+    OCR_MIN_DPI = int(os.getenv('OCR_MIN_DPI', 100))
+    OCR_MAX_WORKERS = int(os.getenv('OCR_MAX_WORKERS', 2))
+    OCR_BYTES_PER_PIXEL = float(os.getenv('OCR_BYTES_PER_PIXEL', 8))  # Imagen RGB + copias de trabajo de Tesseract
+
+    # Escritura asíncrona de invoice_logs por lotes
+    LOG_SINK_BATCH_SIZE = int(os.getenv('LOG_SINK_BATCH_SIZE', 100))  # Filas por INSERT multi-fila
+    LOG_SINK_FLUSH_INTERVAL = float(os.getenv('LOG_SINK_FLUSH_INTERVAL', 1.0))  # Segundos máximos que un log espera en memoria
+    LOG_SINK_MAX_QUEUE = int(os.getenv('LOG_SINK_MAX_QUEUE', 10000))  # Al llenarse, el llamador escribe de forma síncrona
+
+    # Filtros de persistencia de logs (se aplican antes de formatear o encolar)
+    LOG_DB_MIN_LEVEL = os.getenv('LOG_DB_MIN_LEVEL', 'info')  # Nivel mínimo que se guarda en invoice_logs
+    LOG_DB_CATEGORY_LEVELS = os.getenv('LOG_DB_CATEGORY_LEVELS', '')  # Ej: "system=warning,api=info"
+    LOG_DB_SAMPLE_RATES = os.getenv('LOG_DB_SAMPLE_RATES', '')  # Ej: "debug=0.1,api:info=0.5" (fracción que se guarda)
+
+    # Particionado y retención de invoice_logs
+    LOG_PARTITION_MONTHS_AHEAD = int(os.getenv('LOG_PARTITION_MONTHS_AHEAD', 3))  # Particiones mensuales creadas por adelantado
+    LOG_RETENTION_MONTHS = int(os.getenv('LOG_RETENTION_MONTHS', 6))  # Meses que se mantienen en la base de datos
+    LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'archive/invoice_logs')  # Destino de los NDJSON comprimidos
+
+    # Listado de facturas
+    INVOICE_LIST_COUNT_TTL = int(os.getenv('INVOICE_LIST_COUNT_TTL', 60))  # Segundos que se reutiliza el total cacheado por filtros
+
+    # Exportación masiva de invoices_data
+    EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 1000))  # Filas por lote leído del cursor y escrito en la respuesta
+    EXPORT_WATERMARK_MARGIN_SECONDS = int(os.getenv('EXPORT_WATERMARK_MARGIN_SECONDS', 60))  # Mayor que la transacción más larga que escribe invoices_data
+
+    # Contadores por estado (invoice_status_daily / invoice_status_hourly)
+    STATUS_HOURLY_RETENTION_DAYS = int(os.getenv('STATUS_HOURLY_RETENTION_DAYS', 7))  # Días con contadores por hora
+
+    # Analíticas de gasto (se invalidan al confirmar facturas)
+    ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', 3600))  # Segundos máximos que se reutiliza un resultado
+
+    # Subida de archivos (multipart y por fragmentos reanudables)
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads/')
+    UPLOAD_PARTIAL_DIR = os.getenv('UPLOAD_PARTIAL_DIR', 'uploads/.partial')  # Archivos a medio subir, por sesión
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))  # Tamaño de fragmento sugerido al cliente
+    UPLOAD_MAX_FILE_SIZE = int(os.getenv('UPLOAD_MAX_FILE_SIZE', 100 * 1024 * 1024))  # Bytes máximos por archivo
+    UPLOAD_MAX_FILES = int(os.getenv('UPLOAD_MAX_FILES', 1000))  # Archivos máximos por sesión o por ZIP
+    UPLOAD_MAX_ZIP_SIZE = int(os.getenv('UPLOAD_MAX_ZIP_SIZE', 1024 * 1024 * 1024))  # Bytes descomprimidos máximos por ZIP
+    UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', 24))  # Sesiones inactivas que se descartan
+
+    # Acciones masivas (confirmar, rechazar, reintentar)
+    BULK_ACTION_MAX_INVOICES = int(os.getenv('BULK_ACTION_MAX_INVOICES', 500))  # Facturas máximas por solicitud
+
+    # Cola de revisión (reservas con lease)
+    REVIEW_CLAIM_TTL_SECONDS = int(os.getenv('REVIEW_CLAIM_TTL_SECONDS', 600))  # Duración del lease; se renueva con heartbeat
+    REVIEW_CLAIM_MAX_INVOICES = int(os.getenv('REVIEW_CLAIM_MAX_INVOICES', 50))  # Facturas máximas por reserva
+
+    # Detección de casi duplicados por texto OCR (MinHash/LSH)
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.9))  # Similitud de Jaccard estimada mínima
+    NEAR_DUPLICATE_MAX_CANDIDATES = int(os.getenv('NEAR_DUPLICATE_MAX_CANDIDATES', 20))  # Candidatas LSH comparadas por factura
+    NEAR_DUPLICATE_REUSE_EXTRACTION = os.getenv('NEAR_DUPLICATE_REUSE_EXTRACTION', 'False') == 'True'  # Reutilizar la extracción de la original en vez de llamar a OpenAI
+
+    # Archivo de facturas antiguas (datos pesados comprimidos en invoice_payloads_archive)
+    INVOICE_ARCHIVE_MONTHS = int(os.getenv('INVOICE_ARCHIVE_MONTHS', 12))  # Antigüedad mínima de una factura para archivarla
+    INVOICE_ARCHIVE_BATCH_SIZE = int(os.getenv('INVOICE_ARCHIVE_BATCH_SIZE', 200))  # Facturas archivadas por transacción
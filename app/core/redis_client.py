@@ -0,0 +1,12 @@
+import redis
+from app.core.config import Config
+
+# Cliente Redis compartido por proceso (el pool de conexiones es thread-safe)
+_redis_client = None
+
+def get_redis():
+    """Devuelve el cliente Redis del proceso, creándolo en el primer uso."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(Config.REDIS_URL)
+    return _redis_client
@@ -1,6 +1,13 @@
 from .invoice import Invoice
+from .invoice_payload import InvoicePayload, InvoicePayloadArchive
 from .invoice_log import InvoiceLog
 from .invoice_status_summary import InvoiceStatusSummary
 from .invoice_data import InvoiceData
 from .company import Company
-from .company_prompt import CompanyPrompt
\ No newline at end of file
+from .company_prompt import CompanyPrompt
+from .invoice_checkpoint import InvoiceCheckpoint
+from .invoice_search_index import InvoiceSearchIndex
+from .invoice_status_daily import InvoiceStatusDaily, InvoiceStatusHourly
+from .invoice_item import InvoiceItem
+from .invoice_fingerprint import InvoiceFingerprint, InvoiceFingerprintBand
+from .upload_session import UploadSession, UploadSessionFile
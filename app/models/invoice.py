@@ -1,21 +1,77 @@
 from datetime import datetime
 from app.core.extensions import db
-from sqlalchemy.dialects.mysql import JSON
+from app.models.invoice_payload import InvoicePayload, InvoicePayloadArchive
 
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    # Índices para la paginación por cursor del listado: (columna de orden, id) con y sin filtro de estado.
+    # content_hash es único para detectar re-subidas del mismo archivo con una búsqueda por índice
+    __table_args__ = (
+        db.Index('ix_invoices_created_at_id', 'created_at', 'id'),
+        db.Index('ix_invoices_status_created_at_id', 'status', 'created_at', 'id'),
+        db.UniqueConstraint('content_hash', name='uq_invoices_content_hash'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
     filename = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(50), nullable=False, default='pending')
-    preview_data = db.Column(db.JSON, nullable=True)
-    final_data = db.Column(db.JSON, nullable=True)
-    agent_response = db.Column(db.Text, nullable=True)
     file_path = db.Column(db.String(500), nullable=True)
+    # SHA-256 del archivo; único entre las facturas originales (las duplicadas lo dejan en NULL y apuntan a duplicate_of_id)
+    content_hash = db.Column(db.String(64), nullable=True)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=True)
+    # Reserva de la cola de revisión: revisor que tomó la factura y vencimiento del lease (ver ReviewQueueService)
+    claimed_by = db.Column(db.String(100), nullable=True)
+    claim_expires_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Datos pesados en tablas aparte, cargados solo al acceder (ver preview_data, final_data, agent_response)
+    payload = db.relationship(InvoicePayload, uselist=False, lazy='select', cascade="all, delete-orphan")
+    archived_payload = db.relationship(InvoicePayloadArchive, uselist=False, lazy='select', cascade="all, delete-orphan")
+
+    def _payload_value(self, field):
+        if self.payload is not None:
+            return getattr(self.payload, field)
+        if self.archived_payload is not None:
+            return self.archived_payload.decompressed().get(field)
+        return None
+
+    def _writable_payload(self) -> InvoicePayload:
+        """Payload editable; si estaba archivado se restaura a invoice_payloads."""
+        if self.payload is None:
+            self.payload = InvoicePayload()
+            if self.archived_payload is not None:
+                archived = self.archived_payload.decompressed()
+                for field in InvoicePayloadArchive.FIELDS:
+                    setattr(self.payload, field, archived.get(field))
+                self.archived_payload = None
+        return self.payload
+
+    @property
+    def preview_data(self):
+        return self._payload_value("preview_data")
+
+    @preview_data.setter
+    def preview_data(self, value):
+        self._writable_payload().preview_data = value
+
+    @property
+    def final_data(self):
+        return self._payload_value("final_data")
+
+    @final_data.setter
+    def final_data(self, value):
+        self._writable_payload().final_data = value
+
+    @property
+    def agent_response(self):
+        return self._payload_value("agent_response")
+
+    @agent_response.setter
+    def agent_response(self, value):
+        self._writable_payload().agent_response = value
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -25,6 +81,10 @@ class Invoice(db.Model):
             "final_data": self.final_data,
             "agent_response": self.agent_response,
             "file_path": self.file_path,
+            "content_hash": self.content_hash,
+            "duplicate_of_id": self.duplicate_of_id,
+            "claimed_by": self.claimed_by,
+            "claim_expires_at": self.claim_expires_at.isoformat() if self.claim_expires_at else None,
             "company_id": self.company_id,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat()
@@ -0,0 +1,33 @@
+from datetime import datetime
+from app.core.extensions import db
+
+class CheckpointStage:
+    OCR = "ocr"                # Texto crudo extraído por OCR
+    EXTRACTION = "extraction"  # JSON estructurado devuelto por OpenAI
+    SUMMARY = "summary"        # Resumen (agent_response) devuelto por OpenAI
+
+class InvoiceCheckpoint(db.Model):
+    __tablename__ = 'invoice_checkpoints'
+    __table_args__ = (
+        db.UniqueConstraint('invoice_id', 'stage', name='uq_invoice_checkpoints_invoice_stage'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    stage = db.Column(db.String(20), nullable=False)  # ocr, extraction, summary
+    fingerprint = db.Column(db.String(64), nullable=False)  # Hash de las entradas (archivo, prompt, etc.) que produjeron el resultado
+    payload = db.Column(db.JSON, nullable=True)  # Resultado de la etapa (texto o diccionario)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    invoice = db.relationship("Invoice", backref=db.backref("checkpoints", lazy=True, cascade="all, delete-orphan"))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "invoice_id": self.invoice_id,
+            "stage": self.stage,
+            "fingerprint": self.fingerprint,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
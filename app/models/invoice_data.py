@@ -1,56 +1,45 @@
+from datetime import datetime
 from app.core.extensions import db
-from sqlalchemy import text, Column, Integer, String, Float, JSON
+from sqlalchemy import text
 
 class InvoiceData(db.Model):
+    """
+    Datos confirmados de una factura en columnas tipadas e indexadas (antes una vista con JSON_EXTRACT sobre final_data).
+    Lo mantiene InvoiceDataService al confirmar la factura, dentro de la misma transacción.
+    """
     __tablename__ = 'invoices_data'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_invoices_data_company_id_invoice_date', 'company_id', 'invoice_date'),
+        db.Index('ix_invoices_data_currency_invoice_date', 'currency', 'invoice_date'),
+    )
 
-    invoice_id = db.Column(db.Integer, primary_key=True)
-    invoice_number = db.Column(db.String(255))
-    amount_total = db.Column(db.Float)
-    date = db.Column(db.String(255))
-    bill_to = db.Column(db.String(255))
-    currency = db.Column(db.String(50))
-    payment_terms = db.Column(db.String(50))
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True)
+    company_id = db.Column(db.Integer, nullable=True)
+    invoice_number = db.Column(db.String(255), index=True)
+    amount_total = db.Column(db.Numeric(14, 2, asdecimal=False), index=True)
+    date = db.Column(db.String(255))  # Fecha tal como la devolvió la extracción
+    invoice_date = db.Column(db.Date, index=True)  # Fecha normalizada (None si no se pudo interpretar)
+    bill_to = db.Column(db.String(255), index=True)
+    currency = db.Column(db.String(50), index=True)
+    payment_terms = db.Column(db.String(255))
     items = db.Column(db.JSON)
-    company_id = db.Column(db.Integer)
-    custom_fields = db.Column(db.JSON)
+    custom_fields = db.Column(db.JSON)  # Resto de claves de final_data
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Marca de agua de las exportaciones incrementales
 
     @staticmethod
-    def create_view():
-        # Definimos la consulta SQL para eliminar la vista/tabla si existe
-        drop_query = text("""
-        DROP TABLE IF EXISTS invoices_data;
-        """)
-        # Ejecutamos la consulta para eliminar la vista
-        db.session.execute(drop_query)
-        db.session.commit()
+    def drop_legacy_view() -> bool:
+        """
+        Elimina la vista invoices_data de versiones anteriores para que create_all cree la tabla.
 
-        # Definimos la consulta SQL de la vista actualizada
-        view_query = text("""
-        CREATE OR REPLACE VIEW invoices_data AS
-        SELECT 
-            i.id AS invoice_id,
-            i.company_id,
-            JSON_UNQUOTE(JSON_EXTRACT(i.final_data, '$.invoice_number')) AS invoice_number,
-            JSON_EXTRACT(i.final_data, '$.amount_total') AS amount_total,
-            JSON_UNQUOTE(JSON_EXTRACT(i.final_data, '$.date')) AS date,
-            JSON_UNQUOTE(JSON_EXTRACT(i.final_data, '$.bill_to')) AS bill_to,
-            JSON_UNQUOTE(JSON_EXTRACT(i.final_data, '$.currency')) AS currency,
-            JSON_UNQUOTE(JSON_EXTRACT(i.final_data, '$.payment_terms')) AS payment_terms,
-            JSON_EXTRACT(i.final_data, '$.items') AS items,
-            JSON_REMOVE(i.final_data, 
-                        '$.invoice_number', 
-                        '$.amount_total', 
-                        '$.date', 
-                        '$.bill_to', 
-                        '$.currency', 
-                        '$.payment_terms', 
-                        '$.items'
-            ) AS custom_fields
-        FROM invoices i
-        WHERE i.final_data IS NOT NULL;
-        """)
-        # Ejecutamos la consulta para crear la vista
-        db.session.execute(view_query)
-        db.session.commit()
\ No newline at end of file
+        Returns:
+            True si existía la vista (la tabla debe poblarse con InvoiceDataService.backfill()).
+        """
+        table_type = db.session.execute(text("""
+            SELECT TABLE_TYPE FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'invoices_data'
+        """)).scalar()
+        if table_type != 'VIEW':
+            return False
+        db.session.execute(text("DROP VIEW invoices_data"))
+        db.session.commit()
+        return True
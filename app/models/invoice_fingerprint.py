@@ -0,0 +1,24 @@
+from datetime import datetime
+from app.core.extensions import db
+
+class InvoiceFingerprint(db.Model):
+    """Firma MinHash del texto OCR normalizado de una factura (ver NearDuplicateService)."""
+    __tablename__ = 'invoice_fingerprints'
+
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True)
+    signature = db.Column(db.LargeBinary(2048), nullable=False)  # MINHASH_PERMUTATIONS valores uint32
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class InvoiceFingerprintBand(db.Model):
+    """
+    Buckets LSH de cada firma: dos facturas son candidatas si comparten el bucket de al menos una banda.
+    La clave primaria (band, bucket, invoice_id) resuelve la búsqueda de candidatos con el índice.
+    """
+    __tablename__ = 'invoice_fingerprint_bands'
+    __table_args__ = (
+        db.Index('ix_invoice_fingerprint_bands_invoice_id', 'invoice_id'),
+    )
+
+    band = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)  # 64 bits del hash de las filas de la banda
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
@@ -0,0 +1,45 @@
+from datetime import datetime
+from app.core.extensions import db
+
+class InvoiceItem(db.Model):
+    """
+    Ítems de las facturas confirmadas, normalizados desde final_data['items'].
+    Los escribe InvoiceItemService al confirmar, en la misma transacción que invoices_data.
+    """
+    __tablename__ = 'invoice_items'
+    __table_args__ = (
+        db.Index('ix_invoice_items_description_invoice_date', 'description', 'invoice_date'),
+        db.Index('ix_invoice_items_sku_invoice_date', 'sku', 'invoice_date'),
+        db.Index('ix_invoice_items_company_id_invoice_date', 'company_id', 'invoice_date'),
+        db.Index('ix_invoice_items_unit_price', 'unit_price'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), nullable=False, index=True)
+    line_number = db.Column(db.Integer, nullable=False)  # Posición del ítem en final_data['items'] (desde 1)
+    company_id = db.Column(db.Integer, nullable=True)  # Copiados de la factura para filtrar sin join
+    invoice_date = db.Column(db.Date, nullable=True)
+    currency = db.Column(db.String(50), nullable=True)
+    description = db.Column(db.String(255), nullable=True)
+    sku = db.Column(db.String(100), nullable=True)
+    quantity = db.Column(db.Numeric(14, 4, asdecimal=False), nullable=True)
+    unit_price = db.Column(db.Numeric(14, 2, asdecimal=False), nullable=True)
+    amount = db.Column(db.Numeric(14, 2, asdecimal=False), nullable=True)
+    advertising_numbers = db.Column(db.JSON, nullable=True)  # Números OP del ítem
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "invoice_id": self.invoice_id,
+            "line_number": self.line_number,
+            "company_id": self.company_id,
+            "invoice_date": self.invoice_date.isoformat() if self.invoice_date else None,
+            "currency": self.currency,
+            "description": self.description,
+            "sku": self.sku,
+            "quantity": self.quantity,
+            "unit_price": self.unit_price,
+            "amount": self.amount,
+            "advertising_numbers": self.advertising_numbers
+        }
@@ -1,7 +1,16 @@
 from app.core.extensions import db
-from datetime import datetime
+from app.core.config import Config
+from datetime import datetime, date
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 import json
 
+# Mes en que este proceso ya verificó las particiones de invoice_logs
+_partitions_checked_month = None
+
+# Errores de MariaDB al crear una partición que ya existe: nombre duplicado (1517) o límite no creciente (1493)
+PARTITION_EXISTS_ERRORS = (1517, 1493)
+
 class LogLevel:
     DEBUG = "debug"
     INFO = "info"
@@ -20,26 +29,35 @@ class LogCategory:
 
 class InvoiceLog(db.Model):
     __tablename__ = 'invoice_logs'
+    # Tabla particionada por mes sobre created_at (ver ensure_partitions y la migración partition_invoice_logs):
+    # toda clave única debe incluir created_at y las tablas particionadas no admiten foreign keys.
+    __table_args__ = (
+        db.Index('ix_invoice_logs_invoice_id_created_at', 'invoice_id', 'created_at'),
+        db.Index('ix_invoice_logs_invoice_id_event_created_at', 'invoice_id', 'event', 'created_at'),  # Último evento de un tipo (ej. 'rejected')
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
-    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    invoice_id = db.Column(db.Integer, nullable=False)  # Referencia a invoices.id (sin FK por el particionado)
     event = db.Column(db.String(255), nullable=False)  # Ej: 'ocr_extracted', 'summary_created', etc
     level = db.Column(db.String(20), nullable=False, default=LogLevel.INFO)  # debug, info, warning, error, critical
     category = db.Column(db.String(50), nullable=False, default=LogCategory.PROCESS)  # process, system, database, api, user, worker, security
     origin = db.Column(db.String(100))  # Servicio o componente que generó el log
     details = db.Column(db.Text)  # Detalles textuales
-    extra_data = db.Column(db.Text)  # Datos adicionales en formato JSON
+    extra_data = db.Column(db.JSON)  # Datos adicionales (columna JSON nativa)
     ip_address = db.Column(db.String(45))  # Para logs relacionados con API
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, primary_key=True, nullable=False, default=datetime.utcnow)  # Clave de partición
 
-    invoice = db.relationship("Invoice", backref="logs")
+    invoice = db.relationship("Invoice", primaryjoin="foreign(InvoiceLog.invoice_id) == Invoice.id", backref="logs")
 
     @property
     def extra(self):
         """Devuelve los datos extra como un diccionario"""
         if not self.extra_data:
             return {}
+        if isinstance(self.extra_data, dict):
+            return self.extra_data
         try:
+            # Filas anteriores a la columna JSON nativa pueden venir como texto
             return json.loads(self.extra_data)
         except:
             return {}
@@ -47,7 +65,64 @@ class InvoiceLog(db.Model):
     @extra.setter
     def extra(self, data):
         """Guarda los datos extra como JSON"""
-        if data is None:
-            self.extra_data = None
-        else:
-            self.extra_data = json.dumps(data)
+        self.extra_data = data
+
+    @staticmethod
+    def partition_name(month_start: date) -> str:
+        return f"p{month_start.strftime('%Y%m')}"
+
+    @staticmethod
+    def ensure_partitions(months_ahead: int | None = None):
+        """
+        Crea las particiones mensuales de los próximos meses partiendo la partición pmax.
+        Solo la llama la tarea archive_invoice_log_partitions (beat diario), con meses de margen antes del cambio de mes.
+        Si la tabla aún no está particionada no hace nada: la conversión la realiza la migración
+        partition_invoice_logs (puede ser costosa en tablas grandes).
+        """
+        global _partitions_checked_month
+        month_start = date.today().replace(day=1)
+        # Basta con verificar una vez por mes y proceso
+        if _partitions_checked_month == month_start:
+            return []
+
+        months_ahead = Config.LOG_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        partitions = db.session.execute(text("""
+            SELECT PARTITION_NAME
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'invoice_logs' AND PARTITION_NAME IS NOT NULL
+        """)).scalars().all()
+        if not partitions or 'pmax' not in partitions:
+            _partitions_checked_month = month_start
+            return []
+
+        created = []
+        last_existing = max((name for name in partitions if name != 'pmax'), default='')
+        current = month_start
+        for _ in range(months_ahead + 1):
+            next_month = add_months(current, 1)
+            name = InvoiceLog.partition_name(current)
+            # Solo se pueden agregar particiones posteriores a la última existente
+            if name > last_existing:
+                try:
+                    db.session.execute(text(f"""
+                        ALTER TABLE invoice_logs REORGANIZE PARTITION pmax INTO (
+                            PARTITION {name} VALUES LESS THAN (TO_DAYS('{next_month.isoformat()}')),
+                            PARTITION pmax VALUES LESS THAN MAXVALUE
+                        )
+                    """))
+                    created.append(name)
+                    last_existing = name
+                except OperationalError as e:
+                    db.session.rollback()
+                    # Otro proceso ya creó la partición (nombre duplicado o límite no creciente): se continúa
+                    if e.orig is None or e.orig.args[0] not in PARTITION_EXISTS_ERRORS:
+                        raise
+            current = next_month
+        db.session.commit()
+        _partitions_checked_month = month_start
+        return created
+
+def add_months(month_start: date, months: int) -> date:
+    """Suma meses a una fecha que cae en día 1."""
+    month_index = month_start.month - 1 + months
+    return date(month_start.year + month_index // 12, month_index % 12 + 1, 1)
@@ -0,0 +1,41 @@
+import json
+import zlib
+from datetime import datetime
+from app.core.extensions import db
+from sqlalchemy.dialects.mysql import MEDIUMTEXT, LONGBLOB
+
+class InvoicePayload(db.Model):
+    """
+    Datos pesados de una factura (JSON extraído, JSON confirmado y respuesta del agente), separados de invoices
+    para que las consultas de estado, listado y descarga no los lean. Se cargan solo al acceder a Invoice.preview_data,
+    Invoice.final_data o Invoice.agent_response.
+    """
+    __tablename__ = 'invoice_payloads'
+
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True)
+    preview_data = db.Column(db.JSON, nullable=True)
+    final_data = db.Column(db.JSON, nullable=True)
+    agent_response = db.Column(db.Text().with_variant(MEDIUMTEXT(), 'mysql'), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class InvoicePayloadArchive(db.Model):
+    """
+    Datos pesados de facturas antiguas, comprimidos con zlib (ver ArchiveService).
+    Invoice los sigue devolviendo de forma transparente; al modificarlos vuelven a invoice_payloads.
+    """
+    __tablename__ = 'invoice_payloads_archive'
+
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True)
+    data = db.Column(db.LargeBinary().with_variant(LONGBLOB(), 'mysql'), nullable=False)  # JSON comprimido con zlib
+    original_size = db.Column(db.Integer, nullable=True)  # Bytes del JSON sin comprimir
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    FIELDS = ("preview_data", "final_data", "agent_response")
+
+    @classmethod
+    def from_payload(cls, payload: InvoicePayload) -> "InvoicePayloadArchive":
+        raw = json.dumps({field: getattr(payload, field) for field in cls.FIELDS}, ensure_ascii=False, default=str).encode("utf-8")
+        return cls(invoice_id=payload.invoice_id, data=zlib.compress(raw, 9), original_size=len(raw))
+
+    def decompressed(self) -> dict:
+        return json.loads(zlib.decompress(self.data).decode("utf-8"))
@@ -0,0 +1,24 @@
+from datetime import datetime
+from app.core.extensions import db
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+
+class InvoiceSearchIndex(db.Model):
+    """
+    Documento de búsqueda por factura (una fila por factura) con índices FULLTEXT de InnoDB.
+    Lo mantiene SearchService al procesar, editar o confirmar la factura.
+    """
+    __tablename__ = 'invoice_search_index'
+    __table_args__ = (
+        # Índice principal: filtra y puntúa sobre todo el documento
+        db.Index('ft_invoice_search_all', 'filename', 'fields_text', 'ocr_text', mysql_prefix='FULLTEXT'),
+        # Índice de campos: da más peso a coincidencias en nombre de archivo y datos extraídos
+        db.Index('ft_invoice_search_fields', 'filename', 'fields_text', mysql_prefix='FULLTEXT'),
+    )
+
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), primary_key=True)
+    filename = db.Column(db.String(255), nullable=True)
+    fields_text = db.Column(db.Text, nullable=True)  # Número, proveedor, CUIT, importes, ítems (con variantes normalizadas)
+    ocr_text = db.Column(db.Text().with_variant(MEDIUMTEXT(), 'mysql'), nullable=True)  # Texto OCR completo
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    invoice = db.relationship("Invoice", backref=db.backref("search_index", uselist=False, lazy=True, cascade="all, delete-orphan"))
@@ -0,0 +1,35 @@
+from app.core.extensions import db
+
+# company_id de las facturas sin empresa en los contadores (las columnas de la clave primaria no admiten NULL)
+NO_COMPANY = 0
+
+class InvoiceStatusDaily(db.Model):
+    """
+    Contador de facturas por día de creación, estado actual y empresa.
+    Se actualiza en la misma transacción que cada cambio de estado (ver StatusCounterService)
+    y se reconcilia periódicamente contra invoices.
+    """
+    __tablename__ = 'invoice_status_daily'
+    __table_args__ = (
+        db.Index('ix_invoice_status_daily_status_day', 'status', 'day'),
+    )
+
+    day = db.Column(db.Date, primary_key=True)  # Fecha de creación de las facturas (UTC)
+    status = db.Column(db.String(50), primary_key=True)
+    company_id = db.Column(db.Integer, primary_key=True, default=NO_COMPANY, autoincrement=False)  # NO_COMPANY si no tiene empresa
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+class InvoiceStatusHourly(db.Model):
+    """
+    Mismo contador por hora de creación, solo para los últimos STATUS_HOURLY_RETENTION_DAYS días
+    (gráficos del día actual sin recorrer invoices).
+    """
+    __tablename__ = 'invoice_status_hourly'
+    __table_args__ = (
+        db.Index('ix_invoice_status_hourly_status_hour', 'status', 'hour'),
+    )
+
+    hour = db.Column(db.DateTime, primary_key=True)  # Inicio de la hora de creación (UTC)
+    status = db.Column(db.String(50), primary_key=True)
+    company_id = db.Column(db.Integer, primary_key=True, default=NO_COMPANY, autoincrement=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,65 @@
+from datetime import datetime
+from app.core.extensions import db
+
+class UploadSessionStatus:
+    OPEN = "open"            # Recibiendo fragmentos
+    COMPLETED = "completed"  # Cerrada por el cliente (complete)
+    EXPIRED = "expired"      # Descartada por inactividad
+
+class UploadFileStatus:
+    PENDING = "pending"          # Declarado, sin bytes recibidos
+    UPLOADING = "uploading"      # Recibiendo fragmentos
+    COMPLETED = "completed"      # Factura creada y encolada
+    DUPLICATED = "duplicated"    # Mismo contenido que una factura existente
+    ERROR = "error"              # Tipo no permitido o error al guardar
+
+class UploadSession(db.Model):
+    """Subida por fragmentos de un lote de archivos (init, fragmentos, complete), reanudable."""
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=UploadSessionStatus.OPEN)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    files = db.relationship("UploadSessionFile", backref="session", lazy=True, cascade="all, delete-orphan", order_by="UploadSessionFile.id")
+
+    def to_dict(self, include_files: bool = True):
+        data = {
+            "upload_id": self.id,
+            "company_id": self.company_id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+        if include_files:
+            data["files"] = [file.to_dict() for file in self.files]
+        return data
+
+class UploadSessionFile(db.Model):
+    __tablename__ = 'upload_session_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(32), db.ForeignKey('upload_sessions.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)  # Tamaño declarado en init
+    received = db.Column(db.BigInteger, nullable=False, default=0)  # Offset desde el que se reanuda
+    content_type = db.Column(db.String(100), nullable=True)  # Tipo detectado por los primeros bytes
+    content_hash = db.Column(db.String(64), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=UploadFileStatus.PENDING)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='SET NULL'), nullable=True)
+    message = db.Column(db.String(500), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "file_id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "received": self.received,
+            "content_type": self.content_type,
+            "status": self.status,
+            "invoice_id": self.invoice_id,
+            "message": self.message,
+        }
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import uuid
+import numpy as np
+from sqlalchemy import select
+from app.core.config import Config
+from app.core.extensions import db, cache
+from app.models.company import Company
+from app.models.invoice_data import InvoiceData
+from app.services.invoice_data_service import InvoiceDataService
+
+# Dimensiones de agrupación disponibles; "supplier" es la empresa con la que se procesó la factura
+GROUP_DIMENSIONS = ("company", "supplier", "currency", "month", "bill_to")
+
+# Clave de caché cuyo valor cambia en cada confirmación: invalida todos los resultados anteriores de una vez
+VERSION_CACHE_KEY = "analytics_version"
+
+# Cantidad máxima de facturas atípicas listadas por grupo
+MAX_OUTLIER_IDS = 10
+
+class AnalyticsService:
+    """
+    Agregaciones de gasto sobre invoices_data (facturas confirmadas).
+    Las columnas se leen por lotes desde un cursor del servidor a arrays de NumPy y los totales, percentiles
+    y atípicos por grupo se calculan de forma vectorizada. Los resultados se cachean por combinación de filtros.
+    """
+
+    @staticmethod
+    def invalidate():
+        """Invalida todos los resultados cacheados (se llama al confirmar facturas)."""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=0)
+
+    @staticmethod
+    def _cache_key(filters: dict, group_by: list[str], percentiles: list[float]) -> str:
+        version = cache.get(VERSION_CACHE_KEY) or "0"
+        raw = json.dumps({"filters": filters, "group_by": group_by, "percentiles": percentiles}, sort_keys=True, default=str)
+        return f"analytics_{version}_{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _load_columns(filters: dict) -> dict:
+        """Lee las columnas numéricas y de agrupación por lotes (stream_results) y las concatena en arrays."""
+        query = InvoiceDataService.filtered_query(
+            select(
+                InvoiceData.invoice_id,
+                InvoiceData.company_id,
+                InvoiceData.currency,
+                InvoiceData.invoice_date,
+                InvoiceData.bill_to,
+                InvoiceData.amount_total,
+            ),
+            filters
+        ).filter(InvoiceData.amount_total.isnot(None))
+
+        chunks = {name: [] for name in ("invoice_id", "company_id", "currency", "month", "bill_to", "amount")}
+        batch_size = Config.EXPORT_CHUNK_ROWS
+        with db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            for rows in result.partitions(batch_size):
+                invoice_ids, company_ids, currencies, dates, bill_tos, amounts = zip(*rows)
+                chunks["invoice_id"].append(np.fromiter(invoice_ids, dtype=np.int64, count=len(rows)))
+                chunks["company_id"].append(np.fromiter((value or 0 for value in company_ids), dtype=np.int64, count=len(rows)))
+                chunks["currency"].append(np.array(currencies, dtype=object))
+                chunks["month"].append(np.array([value.strftime("%Y-%m") if value else None for value in dates], dtype=object))
+                chunks["bill_to"].append(np.array(bill_tos, dtype=object))
+                chunks["amount"].append(np.fromiter(amounts, dtype=np.float64, count=len(rows)))
+
+        empty = {"invoice_id": np.int64, "company_id": np.int64, "amount": np.float64}
+        return {
+            name: np.concatenate(parts) if parts else np.array([], dtype=empty.get(name, object))
+            for name, parts in chunks.items()
+        }
+
+    @staticmethod
+    def _group_codes(columns: dict, group_by: list[str]):
+        """
+        Combina las dimensiones pedidas en un código entero por fila.
+
+        Returns:
+            (códigos de grupo por fila, lista de claves {dimensión: valor} por código)
+        """
+        rows = len(columns["amount"])
+        if not group_by:
+            return np.zeros(rows, dtype=np.int64), [{}]
+
+        combined = np.zeros(rows, dtype=np.int64)
+        uniques_by_dimension = []
+        for dimension in group_by:
+            column = columns["company_id"] if dimension in ("company", "supplier") else columns[dimension]
+            # Los None no se pueden ordenar junto a strings: se codifican como cadena vacía y se restauran después
+            values = column if column.dtype != object else np.where(column == None, "", column).astype(str)  # noqa: E711
+            uniques, inverse = np.unique(values, return_inverse=True)
+            combined = combined * len(uniques) + inverse
+            uniques_by_dimension.append(uniques)
+
+        codes, group_index = np.unique(combined, return_inverse=True)
+        keys = []
+        for code in codes:
+            key = {}
+            for dimension, uniques in zip(reversed(group_by), reversed(uniques_by_dimension)):
+                code, position = divmod(int(code), len(uniques))
+                value = uniques[position].item() if hasattr(uniques[position], "item") else uniques[position]
+                key[dimension] = value if value not in ("", 0) else None
+            keys.append({dimension: key[dimension] for dimension in group_by})
+        return group_index, keys
+
+    @staticmethod
+    def compute(filters: dict, group_by: list[str], percentiles: list[float]) -> dict:
+        """Calcula las agregaciones por grupo sin caché."""
+        columns = AnalyticsService._load_columns(filters)
+        amounts = columns["amount"]
+        group_index, keys = AnalyticsService._group_codes(columns, group_by)
+        group_count = len(keys)
+
+        counts = np.bincount(group_index, minlength=group_count)
+        sums = np.bincount(group_index, weights=amounts, minlength=group_count)
+
+        # Orden por (grupo, importe): cada grupo queda como un tramo contiguo ya ordenado
+        order = np.lexsort((amounts, group_index))
+        sorted_amounts = amounts[order]
+        sorted_ids = columns["invoice_id"][order]
+        boundaries = np.concatenate(([0], np.cumsum(counts)))
+
+        company_names = {}
+        if any(dimension in ("company", "supplier") for dimension in group_by):
+            company_names = dict(db.session.query(Company.id, Company.name).all())
+
+        groups = []
+        for position, key in enumerate(keys):
+            start, end = boundaries[position], boundaries[position + 1]
+            if start == end:
+                continue
+            values = sorted_amounts[start:end]
+            q1, q3 = np.percentile(values, [25, 75])
+            upper_fence = q3 + 1.5 * (q3 - q1)
+            lower_fence = q1 - 1.5 * (q3 - q1)
+            outlier_mask = (values > upper_fence) | (values < lower_fence)
+            # Atípicos más extremos primero (los valores ya están ordenados)
+            outlier_ids = sorted_ids[start:end][outlier_mask][::-1][:MAX_OUTLIER_IDS]
+
+            for dimension in ("company", "supplier"):
+                if dimension in key:
+                    key[f"{dimension}_name"] = company_names.get(key[dimension], "Sin compañía")
+            groups.append({
+                "key": key,
+                "count": int(counts[position]),
+                "sum": round(float(sums[position]), 2),
+                "mean": round(float(sums[position] / counts[position]), 2),
+                "min": round(float(values[0]), 2),
+                "max": round(float(values[-1]), 2),
+                "percentiles": {
+                    f"p{percentile:g}": round(float(value), 2)
+                    for percentile, value in zip(percentiles, np.percentile(values, percentiles))
+                } if percentiles else {},
+                "outliers": int(outlier_mask.sum()),
+                "outlier_invoice_ids": [int(invoice_id) for invoice_id in outlier_ids],
+            })
+
+        groups.sort(key=lambda group: group["sum"], reverse=True)
+        return {
+            "group_by": group_by,
+            "invoices": int(len(amounts)),
+            "total_amount": round(float(amounts.sum()), 2),
+            "groups": groups,
+        }
+
+    @staticmethod
+    def aggregate(filters: dict, group_by: list[str], percentiles: list[float]) -> dict:
+        """Agregaciones por grupo, cacheadas por filtros hasta la próxima confirmación (o ANALYTICS_CACHE_TTL)."""
+        cache_key = AnalyticsService._cache_key(filters, group_by, percentiles)
+        result = cache.get(cache_key)
+        if result is not None:
+            return {**result, "cached": True}
+        result = AnalyticsService.compute(filters, group_by, percentiles)
+        cache.set(cache_key, result, timeout=Config.ANALYTICS_CACHE_TTL)
+        return {**result, "cached": False}
@@ -0,0 +1,76 @@
+import hashlib
+from app.core.extensions import db
+from app.models.invoice_checkpoint import InvoiceCheckpoint
+from app.services.log_service import LogService, LogCategory
+from sqlalchemy.exc import SQLAlchemyError
+
+# Tamaño de bloque para calcular hashes de archivos sin cargarlos completos en memoria
+HASH_CHUNK_SIZE = 1024 * 1024
+
+class CheckpointService:
+    """
+    Persiste el resultado de cada etapa del pipeline (OCR, extracción, resumen) junto a la factura.
+    Cada checkpoint guarda un fingerprint de sus entradas; si el archivo o el prompt cambian,
+    el fingerprint deja de coincidir y la etapa se vuelve a ejecutar.
+    """
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        """Genera un fingerprint estable a partir de las entradas de una etapa."""
+        joined = "\x1f".join("" if part is None else str(part) for part in parts)
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_fingerprint(file_path: str) -> str:
+        """Calcula el SHA-256 del contenido de un archivo leyendo por bloques."""
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def load(invoice_id: int, stage: str, fingerprint: str):
+        """
+        Devuelve el resultado guardado para una etapa si su fingerprint coincide.
+
+        Returns:
+            El payload de la etapa, o None si no existe o quedó invalidado.
+        """
+        checkpoint = InvoiceCheckpoint.query.filter_by(invoice_id=invoice_id, stage=stage).first()
+        if not checkpoint:
+            return None
+        if checkpoint.fingerprint != fingerprint:
+            LogService.debug(invoice_id, "checkpoint_invalidated", f"Checkpoint '{stage}' invalidado: las entradas cambiaron.", LogCategory.PROCESS, extra={"stage": stage})
+            return None
+        return checkpoint.payload
+
+    @staticmethod
+    def save(invoice_id: int, stage: str, fingerprint: str, payload) -> InvoiceCheckpoint | None:
+        """Guarda (o reemplaza) el resultado de una etapa. Un fallo aquí no interrumpe el procesamiento."""
+        session = db.session
+        try:
+            checkpoint = session.query(InvoiceCheckpoint).filter_by(invoice_id=invoice_id, stage=stage).first()
+            if checkpoint:
+                checkpoint.fingerprint = fingerprint
+                checkpoint.payload = payload
+            else:
+                checkpoint = InvoiceCheckpoint(invoice_id=invoice_id, stage=stage, fingerprint=fingerprint, payload=payload)
+                session.add(checkpoint)
+            session.commit()
+            LogService.debug(invoice_id, "checkpoint_saved", f"Checkpoint '{stage}' guardado.", LogCategory.PROCESS, extra={"stage": stage})
+            return checkpoint
+        except SQLAlchemyError as e:
+            session.rollback()
+            LogService.warning(invoice_id, "checkpoint_save_failed", f"No se pudo guardar el checkpoint '{stage}': {e}", LogCategory.DATABASE, extra={"stage": stage})
+            return None
+
+    @staticmethod
+    def invalidate(invoice_id: int, stages: list[str] | None = None) -> int:
+        """Elimina los checkpoints de una factura (todos o solo las etapas indicadas)."""
+        query = InvoiceCheckpoint.query.filter_by(invoice_id=invoice_id)
+        if stages:
+            query = query.filter(InvoiceCheckpoint.stage.in_(stages))
+        deleted = query.delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from sqlalchemy import select
+from app.core.config import Config
+from app.core.extensions import db
+from app.models.invoice_data import InvoiceData
+from app.services.invoice_data_service import InvoiceDataService
+
+# pyarrow es opcional: solo se necesita para exportar en Parquet
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+    parquet = None
+
+EXPORT_COLUMNS = (
+    "invoice_id", "company_id", "invoice_number", "amount_total", "date", "invoice_date",
+    "bill_to", "currency", "payment_terms", "items", "custom_fields", "updated_at",
+)
+
+# Columnas JSON: en CSV y Parquet se exportan como texto JSON
+JSON_COLUMNS = ("items", "custom_fields")
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def _plain(value):
+    """Fechas a ISO 8601; el resto sin cambios."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+class _ChunkSink:
+    """Archivo de solo escritura que acumula bytes hasta que el generador los entrega (para ParquetWriter)."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+class ExportService:
+    """
+    Exportación masiva de invoices_data con cursor del servidor: las filas se leen y se escriben por bloques,
+    así la memoria se mantiene constante sin importar la cantidad de filas.
+    """
+
+    @staticmethod
+    def parquet_available() -> bool:
+        return pyarrow is not None
+
+    @staticmethod
+    def _row_batches(filters: dict, since: datetime | None, until: datetime, chunk_rows: int):
+        """Lee las filas filtradas en lotes de chunk_rows desde un cursor del servidor (stream_results)."""
+        query = InvoiceDataService.filtered_query(select(InvoiceData.__table__), filters)
+        query = query.filter(InvoiceData.updated_at <= until)
+        if since is not None:
+            query = query.filter(InvoiceData.updated_at > since)
+        # Orden estable por la marca de agua: una exportación incremental continúa donde terminó la anterior
+        query = query.order_by(InvoiceData.updated_at, InvoiceData.invoice_id)
+
+        with db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(query)
+            for partition in result.mappings().partitions(chunk_rows):
+                yield [{column: row[column] for column in EXPORT_COLUMNS} for row in partition]
+
+    @staticmethod
+    def _encode_csv(batches):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for batch in batches:
+            for row in batch:
+                writer.writerow([
+                    json.dumps(row[column], ensure_ascii=False) if column in JSON_COLUMNS and row[column] is not None else _plain(row[column])
+                    for column in EXPORT_COLUMNS
+                ])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _encode_ndjson(batches):
+        for batch in batches:
+            yield "".join(json.dumps({column: _plain(row[column]) for column in EXPORT_COLUMNS}, ensure_ascii=False) + "\n" for row in batch).encode("utf-8")
+
+    @staticmethod
+    def _encode_parquet(batches, compression: str | None):
+        schema = pyarrow.schema([
+            ("invoice_id", pyarrow.int64()),
+            ("company_id", pyarrow.int64()),
+            ("invoice_number", pyarrow.string()),
+            ("amount_total", pyarrow.float64()),
+            ("date", pyarrow.string()),
+            ("invoice_date", pyarrow.date32()),
+            ("bill_to", pyarrow.string()),
+            ("currency", pyarrow.string()),
+            ("payment_terms", pyarrow.string()),
+            ("items", pyarrow.string()),
+            ("custom_fields", pyarrow.string()),
+            ("updated_at", pyarrow.timestamp("us")),
+        ])
+        sink = _ChunkSink()
+        # Cada lote se escribe como un row group y se entrega apenas está listo
+        writer = parquet.ParquetWriter(sink, schema, compression=compression or "snappy")
+        try:
+            for batch in batches:
+                columns = {column: [row[column] for row in batch] for column in EXPORT_COLUMNS}
+                for column in JSON_COLUMNS:
+                    columns[column] = [json.dumps(value, ensure_ascii=False) if value is not None else None for value in columns[column]]
+                writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def stream(export_format: str, filters: dict, since: datetime | None, until: datetime, compress: str | None = None, chunk_rows: int | None = None):
+        """
+        Genera el archivo de exportación por bloques de bytes.
+
+        Args:
+            export_format: 'csv', 'ndjson' o 'parquet'.
+            since: Solo filas con updated_at posterior (exportación incremental).
+            until: Marca de agua de esta exportación (filas con updated_at hasta este instante).
+            compress: 'gzip' para comprimir CSV/NDJSON en streaming; en Parquet se usa como códec interno.
+        """
+        chunk_rows = chunk_rows or Config.EXPORT_CHUNK_ROWS
+        batches = ExportService._row_batches(filters, since, until, chunk_rows)
+
+        if export_format == "parquet":
+            yield from ExportService._encode_parquet(batches, compress)
+            return
+
+        encoded = ExportService._encode_csv(batches) if export_format == "csv" else ExportService._encode_ndjson(batches)
+        if compress != "gzip":
+            yield from encoded
+            return
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+        for chunk in encoded:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
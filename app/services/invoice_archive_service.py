@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from app.core.config import Config
+from app.core.extensions import db
+from app.models.invoice import Invoice
+from app.models.invoice_checkpoint import InvoiceCheckpoint
+from app.models.invoice_log import add_months
+from app.models.invoice_payload import InvoicePayload, InvoicePayloadArchive
+from app.services.log_service import LogService, LogCategory
+
+# Estados que ya no cambian en el flujo normal; solo estas facturas se archivan
+FINAL_STATUSES = ("processed", "rejected", "duplicated")
+
+class InvoiceArchiveService:
+    """
+    Archivo de facturas antiguas: sus datos pesados pasan de invoice_payloads a invoice_payloads_archive comprimidos
+    con zlib, y se eliminan sus checkpoints. La fila de invoices se conserva (contadores, invoices_data, búsqueda y logs
+    siguen apuntando a ella) y Invoice.preview_data / final_data / agent_response siguen devolviendo los datos archivados.
+    """
+
+    @staticmethod
+    def cutoff(months: int | None = None) -> datetime:
+        months = Config.INVOICE_ARCHIVE_MONTHS if months is None else months
+        return datetime.combine(add_months(date.today().replace(day=1), -months), datetime.min.time())
+
+    @staticmethod
+    def archive_batch(cutoff: datetime, batch_size: int) -> int:
+        """Archiva un lote de facturas en una transacción; devuelve cuántas se archivaron."""
+        payloads = (
+            db.session.query(InvoicePayload)
+            .join(Invoice, Invoice.id == InvoicePayload.invoice_id)
+            .filter(Invoice.created_at < cutoff, Invoice.status.in_(FINAL_STATUSES))
+            .order_by(InvoicePayload.invoice_id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not payloads:
+            return 0
+
+        invoice_ids = [payload.invoice_id for payload in payloads]
+        for payload in payloads:
+            db.session.merge(InvoicePayloadArchive.from_payload(payload))
+            db.session.delete(payload)
+        InvoiceCheckpoint.query.filter(InvoiceCheckpoint.invoice_id.in_(invoice_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        return len(payloads)
+
+    @staticmethod
+    def archive_old_invoices(months: int | None = None, batch_size: int | None = None) -> int:
+        """
+        Archiva las facturas finalizadas creadas antes de INVOICE_ARCHIVE_MONTHS meses, por lotes.
+
+        Returns:
+            Cantidad de facturas archivadas.
+        """
+        cutoff = InvoiceArchiveService.cutoff(months)
+        batch_size = batch_size or Config.INVOICE_ARCHIVE_BATCH_SIZE
+        archived = 0
+        while True:
+            count = InvoiceArchiveService.archive_batch(cutoff, batch_size)
+            if not count:
+                break
+            archived += count
+            db.session.expunge_all()
+        if archived:
+            LogService.info(None, "invoices_archived", f"Facturas archivadas (anteriores a {cutoff.date().isoformat()}): {archived}", LogCategory.DATABASE)
+        return archived
@@ -0,0 +1,240 @@
+from collections import Counter
+from datetime import datetime
+from celery import group
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import selectinload
+from app.core.extensions import db, socketio
+from app.models.invoice import Invoice
+from app.models.invoice_data import InvoiceData
+from app.models.invoice_log import InvoiceLog, LogLevel, LogCategory
+from app.models.invoice_payload import InvoicePayload
+from app.models.invoice_status_daily import NO_COMPANY
+from app.services.invoice_data_service import InvoiceDataService
+from app.services.review_queue_service import ReviewQueueService
+from app.services.status_counter_service import StatusCounterService
+
+# Estados desde los que se permite cada acción (mismas reglas que los endpoints individuales)
+CONFIRMABLE_STATUSES = ("waiting_validation", "processed")
+REJECTABLE_STATUSES = ("waiting_validation", "processing", "failed")
+RETRYABLE_STATUSES = ("failed", "rejected")
+
+DEFAULT_REJECT_REASON = "Rechazo manual por el usuario."
+
+class InvoiceBulkService:
+    """
+    Confirmar, rechazar y reintentar muchas facturas a la vez con una cantidad constante de sentencias:
+    validación de estados en una consulta (con lock de las filas), UPDATE por conjunto, logs en un INSERT multi-fila,
+    un commit, un grupo de Celery y un único evento Socket.IO. Cada acción devuelve un resultado por id.
+    """
+
+    @staticmethod
+    def _lock_invoices(invoice_ids: list[int]) -> dict:
+        """Estado actual de las facturas pedidas, bloqueadas hasta el commit (una sola consulta)."""
+        rows = db.session.execute(
+            select(Invoice.id, Invoice.status, Invoice.company_id, Invoice.created_at, Invoice.filename,
+                   Invoice.claimed_by, Invoice.claim_expires_at,
+                   InvoicePayload.preview_data.isnot(None).label('has_preview'))
+            .outerjoin(InvoicePayload, InvoicePayload.invoice_id == Invoice.id)
+            .where(Invoice.id.in_(invoice_ids))
+            .with_for_update()
+        ).all()
+        return {row.id: row for row in rows}
+
+    @staticmethod
+    def _validate(items: list[dict], current: dict, allowed: tuple, action: str, results: dict) -> list[dict]:
+        """Separa los ítems válidos; los demás quedan en results con su error (incluidas las reservadas por otro revisor)."""
+        reviewer = ReviewQueueService.reviewer_from_request()
+        now = datetime.utcnow()
+        valid = []
+        for item in items:
+            row = current.get(item["id"])
+            if row is None:
+                results[item["id"]] = {"invoice_id": item["id"], "error": "Factura no encontrada"}
+            elif row.status not in allowed:
+                results[item["id"]] = {"invoice_id": item["id"], "error": f"No se puede {action} una factura con estado {row.status}"}
+            elif ReviewQueueService.is_claimed_by_other(row.claimed_by, row.claim_expires_at, reviewer, now):
+                results[item["id"]] = {"invoice_id": item["id"], "error": f"La factura está reservada por otro revisor ({row.claimed_by})"}
+            else:
+                valid.append(item)
+        return valid
+
+    @staticmethod
+    def _apply_status(valid: list[dict], current: dict, new_status: str, now: datetime):
+        """
+        UPDATE por conjunto del estado y ajuste de los contadores (el UPDATE no pasa por el flush del ORM).
+        Las facturas dejan la cola de revisión, así que se liberan sus reservas.
+        """
+        invoice_ids = [item["id"] for item in valid]
+        db.session.execute(
+            update(Invoice).where(Invoice.id.in_(invoice_ids))
+            .values(status=new_status, updated_at=now, claimed_by=None, claim_expires_at=None),
+            execution_options={"synchronize_session": False}
+        )
+        changes = Counter()
+        for invoice_id in invoice_ids:
+            row = current[invoice_id]
+            if row.created_at and row.status != new_status:
+                changes[(row.created_at, row.status, row.company_id or NO_COMPANY)] -= 1
+                changes[(row.created_at, new_status, row.company_id or NO_COMPANY)] += 1
+        if changes:
+            StatusCounterService.record_changes(changes)
+
+    @staticmethod
+    def _insert_logs(valid: list[dict], event: str, details: dict, now: datetime):
+        """Un solo INSERT multi-fila para los logs de todas las facturas."""
+        if not valid:
+            return
+        db.session.execute(insert(InvoiceLog.__table__).values([
+            {
+                "invoice_id": item["id"],
+                "event": event,
+                "level": LogLevel.INFO,
+                "category": LogCategory.USER,
+                "origin": "invoice_bulk_api",
+                "details": details[item["id"]],
+                "created_at": now,
+            }
+            for item in valid
+        ]))
+
+    @staticmethod
+    def _emit(valid: list[dict], current: dict, status: str):
+        """Un evento con todas las facturas actualizadas, después del commit."""
+        if not valid:
+            return
+        try:
+            socketio.emit('invoices_status_update', {
+                "invoices": [{"id": item["id"], "status": status, "filename": current[item["id"]].filename} for item in valid]
+            }, namespace='/invoices')
+        except Exception as socket_err:
+            print(f"Error al emitir evento SocketIO: {socket_err}")
+
+    @staticmethod
+    def _ordered(items: list[dict], results: dict) -> list[dict]:
+        return [results[item["id"]] for item in items]
+
+    @staticmethod
+    def confirm(items: list[dict]) -> list[dict]:
+        """Copia preview_data a final_data y marca como procesadas las facturas confirmables."""
+        # Imports diferidos: analytics_service y search_service importan servicios de datos
+        from app.services.analytics_service import AnalyticsService
+        from app.services.search_service import SearchService
+
+        now = datetime.utcnow()
+        results = {}
+        try:
+            current = InvoiceBulkService._lock_invoices([item["id"] for item in items])
+            valid = InvoiceBulkService._validate(items, current, CONFIRMABLE_STATUSES, "confirmar", results)
+            for item in list(valid):
+                if not current[item["id"]].has_preview:
+                    results[item["id"]] = {"invoice_id": item["id"], "error": "No hay datos previos para confirmar"}
+                    valid.remove(item)
+            invoice_ids = [item["id"] for item in valid]
+            if invoice_ids:
+                db.session.execute(
+                    update(InvoicePayload).where(InvoicePayload.invoice_id.in_(invoice_ids))
+                    .values(final_data=InvoicePayload.preview_data, updated_at=now),
+                    execution_options={"synchronize_session": False}
+                )
+                InvoiceBulkService._apply_status(valid, current, "processed", now)
+                InvoiceBulkService._insert_logs(valid, "confirmed", {invoice_id: "Confirmación masiva." for invoice_id in invoice_ids}, now)
+
+                # invoices_data / invoice_items en la misma transacción; las filas existentes se cargan en una consulta
+                invoices = (
+                    Invoice.query.options(selectinload(Invoice.payload))
+                    .filter(Invoice.id.in_(invoice_ids))
+                    .populate_existing()
+                    .all()
+                )
+                InvoiceData.query.filter(InvoiceData.invoice_id.in_(invoice_ids)).all()
+                for invoice in invoices:
+                    InvoiceDataService.sync(invoice)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for item in valid:
+            results[item["id"]] = {"invoice_id": item["id"], "status": "processed", "message": "Factura confirmada y finalizada correctamente."}
+        if valid:
+            AnalyticsService.invalidate()
+            # Reindexar con los datos confirmados (final_data), cargados en una sola consulta tras el commit
+            for invoice in Invoice.query.options(selectinload(Invoice.payload)).filter(Invoice.id.in_(invoice_ids)).all():
+                SearchService.index_invoice(invoice, commit=False)
+            db.session.commit()
+        InvoiceBulkService._emit(valid, current, "processed")
+        return InvoiceBulkService._ordered(items, results)
+
+    @staticmethod
+    def reject(items: list[dict]) -> list[dict]:
+        """Rechaza las facturas con la razón de cada ítem (o la razón por defecto)."""
+        now = datetime.utcnow()
+        results = {}
+        try:
+            current = InvoiceBulkService._lock_invoices([item["id"] for item in items])
+            valid = InvoiceBulkService._validate(items, current, REJECTABLE_STATUSES, "rechazar", results)
+            if valid:
+                InvoiceBulkService._apply_status(valid, current, "rejected", now)
+                InvoiceBulkService._insert_logs(valid, "rejected", {item["id"]: item.get("reason") or DEFAULT_REJECT_REASON for item in valid}, now)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for item in valid:
+            results[item["id"]] = {"invoice_id": item["id"], "status": "rejected", "message": "Factura rechazada correctamente."}
+        InvoiceBulkService._emit(valid, current, "rejected")
+        return InvoiceBulkService._ordered(items, results)
+
+    @staticmethod
+    def _last_rejection_reasons(invoice_ids: list[int]) -> dict:
+        """Última razón de rechazo de cada factura, en una consulta (índice invoice_id, event, created_at)."""
+        reasons = {}
+        rows = db.session.execute(
+            select(InvoiceLog.invoice_id, InvoiceLog.details)
+            .where(InvoiceLog.invoice_id.in_(invoice_ids), InvoiceLog.event == "rejected")
+            .order_by(InvoiceLog.invoice_id, InvoiceLog.created_at, InvoiceLog.id)
+        )
+        for invoice_id, details in rows:
+            reasons[invoice_id] = details or None
+        return reasons
+
+    @staticmethod
+    def retry(items: list[dict]) -> list[dict]:
+        """Vuelve a encolar las facturas fallidas o rechazadas, con la última razón de rechazo de cada una."""
+        # Imports diferidos: invoice_tasks importa servicios
+        from app.core.celery_app import celery
+        from app.services.single_flight_service import SingleFlightService
+        from app.tasks.invoice_tasks import process_invoice_task
+
+        now = datetime.utcnow()
+        results = {}
+        try:
+            current = InvoiceBulkService._lock_invoices([item["id"] for item in items])
+            valid = InvoiceBulkService._validate(items, current, RETRYABLE_STATUSES, "reintentar", results)
+            rejection_reasons = InvoiceBulkService._last_rejection_reasons([item["id"] for item in valid]) if valid else {}
+            if valid:
+                InvoiceBulkService._apply_status(valid, current, "processing", now)
+                details = {}
+                for item in valid:
+                    text = f"Reintento manual solicitado.{' Con contexto de rechazo anterior.' if rejection_reasons.get(item['id']) else ''}"
+                    details[item["id"]] = f"{text} {item['reason']}" if item.get("reason") else text
+                InvoiceBulkService._insert_logs(valid, "retry_requested", details, now)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if valid:
+            # Descartar los resultados compartidos de la ejecución anterior y encolar todo en un solo envío
+            SingleFlightService("invoice").forget_many([str(item["id"]) for item in valid])
+            with celery.producer_or_acquire() as producer:
+                group(
+                    process_invoice_task.s(item["id"], rejection_reason=rejection_reasons.get(item["id"]))
+                    for item in valid
+                ).apply_async(producer=producer)
+
+        for item in valid:
+            results[item["id"]] = {"invoice_id": item["id"], "status": "processing", "message": "Factura enviada nuevamente a procesamiento."}
+        InvoiceBulkService._emit(valid, current, "processing")
+        return InvoiceBulkService._ordered(items, results)
@@ -0,0 +1,137 @@
+import re
+from datetime import datetime, date
+from sqlalchemy.orm import selectinload
+from app.core.extensions import db
+from app.models.invoice import Invoice
+from app.models.invoice_data import InvoiceData
+from app.services.invoice_item_service import InvoiceItemService
+from app.services.log_service import LogService, LogCategory
+
+# Claves de final_data con columna propia en invoices_data; el resto va a custom_fields
+DATA_FIELDS = ("invoice_number", "amount_total", "date", "bill_to", "currency", "payment_terms", "items")
+
+# Formatos de fecha habituales en las extracciones (se prueban en orden)
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%Y/%m/%d", "%m/%d/%Y")
+
+def parse_amount(value) -> float | None:
+    """Convierte un importe (número o texto como '$ 1.234,56' o '1,234.56') a float."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = re.sub(r"[^\d,.\-]", "", str(value))
+    if not cleaned:
+        return None
+    # El último separador es el decimal; los anteriores son de miles
+    last_separator = max(cleaned.rfind(","), cleaned.rfind("."))
+    if last_separator != -1 and len(cleaned) - last_separator - 1 in (1, 2):
+        integer_part = re.sub(r"[,.]", "", cleaned[:last_separator])
+        cleaned = f"{integer_part}.{cleaned[last_separator + 1:]}"
+    else:
+        cleaned = re.sub(r"[,.]", "", cleaned)
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def parse_date(value) -> date | None:
+    """Interpreta la fecha extraída; None si no coincide con ningún formato conocido."""
+    if not value:
+        return None
+    raw = str(value).strip()[:10]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def _truncate(value, length: int):
+    return str(value)[:length] if value is not None else None
+
+class InvoiceDataService:
+    """Mantiene invoices_data (columnas tipadas de final_data) sincronizada con las facturas confirmadas."""
+
+    @staticmethod
+    def sync(invoice: Invoice, session=None) -> InvoiceData | None:
+        """
+        Crea, actualiza o elimina la fila de invoices_data (y los ítems de invoice_items) de una factura según su final_data.
+        No hace commit: se llama dentro de la transacción que modifica la factura.
+        """
+        session = session or db.session
+        row = session.get(InvoiceData, invoice.id)
+        data = invoice.final_data
+        if not isinstance(data, dict):
+            if row is not None:
+                session.delete(row)
+            InvoiceItemService.sync(invoice, session=session)
+            return None
+
+        if row is None:
+            row = InvoiceData(invoice_id=invoice.id)
+            session.add(row)
+        row.company_id = invoice.company_id
+        row.invoice_number = _truncate(data.get("invoice_number"), 255)
+        row.amount_total = parse_amount(data.get("amount_total"))
+        row.date = _truncate(data.get("date"), 255)
+        row.invoice_date = parse_date(data.get("date"))
+        row.bill_to = _truncate(data.get("bill_to"), 255)
+        row.currency = _truncate(data.get("currency"), 50).upper() if data.get("currency") else None
+        row.payment_terms = _truncate(data.get("payment_terms"), 255)
+        row.items = data.get("items")
+        row.custom_fields = {key: value for key, value in data.items() if key not in DATA_FIELDS} or None
+
+        # Ítems normalizados (invoice_items) con la fecha y moneda ya interpretadas
+        InvoiceItemService.sync(invoice, invoice_date=row.invoice_date, currency=row.currency, session=session)
+        return row
+
+    @staticmethod
+    def filtered_query(query, filters: dict):
+        """Aplica los filtros de parse_data_filters (todos sobre columnas indexadas de invoices_data)."""
+        if filters.get("company_id") is not None:
+            query = query.filter(InvoiceData.company_id == filters["company_id"])
+        if filters.get("currencies"):
+            query = query.filter(InvoiceData.currency.in_(filters["currencies"]))
+        if filters.get("invoice_number"):
+            query = query.filter(InvoiceData.invoice_number == filters["invoice_number"])
+        if filters.get("bill_to"):
+            # Prefijo: usa el índice de bill_to
+            query = query.filter(InvoiceData.bill_to.like(f"{filters['bill_to']}%"))
+        if filters.get("date_from"):
+            query = query.filter(InvoiceData.invoice_date >= filters["date_from"])
+        if filters.get("date_to"):
+            query = query.filter(InvoiceData.invoice_date <= filters["date_to"])
+        if filters.get("amount_min") is not None:
+            query = query.filter(InvoiceData.amount_total >= filters["amount_min"])
+        if filters.get("amount_max") is not None:
+            query = query.filter(InvoiceData.amount_total <= filters["amount_max"])
+        return query
+
+    @staticmethod
+    def backfill(batch_size: int = 500) -> int:
+        """Puebla invoices_data desde las facturas con final_data, por lotes de id."""
+        synced = 0
+        last_id = 0
+        while True:
+            # final_data vive en invoice_payloads (o comprimido en invoice_payloads_archive): se carga por lote
+            invoices = (
+                Invoice.query
+                .options(selectinload(Invoice.payload), selectinload(Invoice.archived_payload))
+                .filter(Invoice.id > last_id)
+                .order_by(Invoice.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not invoices:
+                break
+            for invoice in invoices:
+                if invoice.final_data is not None and InvoiceDataService.sync(invoice) is not None:
+                    synced += 1
+            db.session.commit()
+            last_id = invoices[-1].id
+            db.session.expunge_all()
+        # Import diferido: analytics_service importa este módulo
+        from app.services.analytics_service import AnalyticsService
+        AnalyticsService.invalidate()
+        LogService.info(None, "invoices_data_backfilled", f"invoices_data: {synced} facturas sincronizadas", LogCategory.DATABASE)
+        return synced
@@ -0,0 +1,43 @@
+from app.core.extensions import db
+from app.models.invoice import Invoice
+from app.models.invoice_item import InvoiceItem
+
+# Claves de un ítem que pueden traer el código de producto, en orden de preferencia
+SKU_KEYS = ("sku", "product_code", "code")
+
+class InvoiceItemService:
+    """Mantiene invoice_items sincronizada con final_data['items'] de cada factura confirmada."""
+
+    @staticmethod
+    def sync(invoice: Invoice, invoice_date=None, currency=None, session=None) -> list[InvoiceItem]:
+        """
+        Reemplaza los ítems de la factura por los de final_data. No hace commit: se llama dentro de la
+        transacción que confirma la factura (ver InvoiceDataService.sync).
+        """
+        # Import diferido: invoice_data_service importa este módulo
+        from app.services.invoice_data_service import parse_amount
+
+        session = session or db.session
+        session.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice.id).delete(synchronize_session=False)
+
+        data = invoice.final_data if isinstance(invoice.final_data, dict) else {}
+        items = []
+        for line_number, item in enumerate(data.get("items") or [], start=1):
+            if not isinstance(item, dict):
+                continue
+            sku = next((item[key] for key in SKU_KEYS if item.get(key)), None)
+            items.append(InvoiceItem(
+                invoice_id=invoice.id,
+                line_number=line_number,
+                company_id=invoice.company_id,
+                invoice_date=invoice_date,
+                currency=currency,
+                description=str(item["description"])[:255] if item.get("description") else None,
+                sku=str(sku)[:100] if sku else None,
+                quantity=parse_amount(item.get("quantity")),
+                unit_price=parse_amount(item.get("unit_price")),
+                amount=parse_amount(item.get("amount")),
+                advertising_numbers=item.get("advertising_numbers") or None
+            ))
+        session.add_all(items)
+        return items
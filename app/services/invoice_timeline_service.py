@@ -0,0 +1,118 @@
+from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+from app.models.invoice_log import InvoiceLog
+from app.utils.cursor import encode_cursor, decode_cursor
+
+# Columnas que siempre se leen para el historial; extra_data solo si se pide alguna clave de extra
+TIMELINE_COLUMNS = (
+    InvoiceLog.id,
+    InvoiceLog.invoice_id,
+    InvoiceLog.created_at,
+    InvoiceLog.event,
+    InvoiceLog.level,
+    InvoiceLog.category,
+    InvoiceLog.origin,
+    InvoiceLog.details,
+)
+
+def _project(data: dict, paths: list[str]) -> dict:
+    """Devuelve solo las claves pedidas de extra (admite rutas con puntos, ej. 'resources.rss_mb')."""
+    projected = {}
+    for path in paths:
+        value = data
+        for key in path.split('.'):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            projected[path] = value
+    return projected
+
+class InvoiceTimelineService:
+    """
+    Lectura del historial de procesamiento de una factura (invoice_logs).
+    Las consultas van siempre por invoice_id y recorren los índices (invoice_id, created_at) e
+    (invoice_id, event, created_at) con paginación por cursor, sin OFFSET ni escaneos de rango amplios.
+    """
+
+    @staticmethod
+    def page(invoice_id: int, limit: int = 50, cursor: str | None = None, order: str = "desc",
+             levels: list[str] | None = None, categories: list[str] | None = None,
+             events: list[str] | None = None, extra_fields: list[str] | None = None) -> dict:
+        """
+        Devuelve una página del historial ordenada por (created_at, id).
+
+        Args:
+            cursor: Cursor devuelto como next_cursor por la página anterior.
+            order: 'desc' (más reciente primero) o 'asc'.
+            extra_fields: Claves de extra a incluir; ['*'] devuelve extra completo, None lo omite.
+
+        Raises:
+            ValueError: Si el cursor es inválido.
+        """
+        columns = list(TIMELINE_COLUMNS)
+        if extra_fields:
+            columns.append(InvoiceLog.extra_data)
+
+        query = InvoiceLog.query.options(load_only(*columns)).filter(InvoiceLog.invoice_id == invoice_id)
+        if levels:
+            query = query.filter(InvoiceLog.level.in_(levels))
+        if categories:
+            query = query.filter(InvoiceLog.category.in_(categories))
+        if events:
+            query = query.filter(InvoiceLog.event.in_(events))
+
+        if cursor:
+            last_created_at, last_id = decode_cursor(cursor, datetime, int)
+            if order == "asc":
+                query = query.filter(or_(
+                    InvoiceLog.created_at > last_created_at,
+                    and_(InvoiceLog.created_at == last_created_at, InvoiceLog.id > last_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    InvoiceLog.created_at < last_created_at,
+                    and_(InvoiceLog.created_at == last_created_at, InvoiceLog.id < last_id)
+                ))
+
+        if order == "asc":
+            query = query.order_by(InvoiceLog.created_at.asc(), InvoiceLog.id.asc())
+        else:
+            query = query.order_by(InvoiceLog.created_at.desc(), InvoiceLog.id.desc())
+
+        # Una fila de más indica si existe otra página sin necesidad de un COUNT
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        logs = []
+        for log in rows:
+            item = {
+                "id": log.id,
+                "event": log.event,
+                "level": log.level,
+                "category": log.category,
+                "origin": log.origin,
+                "details": log.details,
+                "created_at": log.created_at.isoformat() if log.created_at else None,
+            }
+            if extra_fields:
+                item["extra"] = log.extra if "*" in extra_fields else _project(log.extra, extra_fields)
+            logs.append(item)
+
+        return {
+            "logs": logs,
+            "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more and rows else None,
+        }
+
+    @staticmethod
+    def last_event(invoice_id: int, event: str) -> InvoiceLog | None:
+        """Último log de un evento para una factura (usa el índice (invoice_id, event, created_at))."""
+        return (
+            InvoiceLog.query
+            .options(load_only(InvoiceLog.id, InvoiceLog.created_at, InvoiceLog.details))
+            .filter(InvoiceLog.invoice_id == invoice_id, InvoiceLog.event == event)
+            .order_by(InvoiceLog.created_at.desc(), InvoiceLog.id.desc())
+            .first()
+        )
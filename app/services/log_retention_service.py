@@ -0,0 +1,78 @@
+import gzip
+import json
+import os
+from datetime import date, datetime
+from sqlalchemy import text
+from app.core.config import Config
+from app.core.extensions import db
+from app.models.invoice_log import InvoiceLog, add_months
+from app.services.log_service import LogService, LogCategory
+
+# Filas leídas por vuelta del cursor del servidor al exportar una partición
+EXPORT_BATCH_SIZE = 5000
+
+class LogRetentionService:
+    """
+    Retención de invoice_logs por particiones mensuales.
+    Las particiones vencidas se exportan a NDJSON comprimido y luego se eliminan con DROP PARTITION,
+    que es instantáneo frente a un DELETE fila por fila.
+    """
+
+    @staticmethod
+    def expired_partitions(retention_months: int | None = None) -> list[str]:
+        """Particiones cuyo mes completo es anterior al límite de retención."""
+        retention_months = Config.LOG_RETENTION_MONTHS if retention_months is None else retention_months
+        cutoff = add_months(date.today().replace(day=1), -retention_months)
+        partitions = db.session.execute(text("""
+            SELECT PARTITION_NAME
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'invoice_logs' AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """)).scalars().all()
+        cutoff_name = InvoiceLog.partition_name(cutoff)
+        return [name for name in partitions if name != 'pmax' and name < cutoff_name]
+
+    @staticmethod
+    def export_partition(partition: str, archive_dir: str | None = None) -> tuple[str, int]:
+        """
+        Exporta una partición a <archive_dir>/invoice_logs_<partition>.ndjson.gz leyendo con un cursor del servidor.
+
+        Returns:
+            (ruta del archivo, cantidad de filas exportadas)
+        """
+        archive_dir = archive_dir or Config.LOG_ARCHIVE_DIR
+        os.makedirs(archive_dir, exist_ok=True)
+        final_path = os.path.join(archive_dir, f"invoice_logs_{partition}.ndjson.gz")
+        tmp_path = final_path + ".tmp"
+
+        rows = 0
+        # El nombre de partición proviene de information_schema, no de la entrada del usuario
+        query = text(f"SELECT * FROM invoice_logs PARTITION ({partition}) ORDER BY created_at, id")
+        with db.engine.connect() as conn, gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+            result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(query)
+            for row in result.mappings():
+                record = dict(row)
+                for key, value in record.items():
+                    if isinstance(value, datetime):
+                        record[key] = value.isoformat()
+                out.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+                rows += 1
+        # Renombrar solo cuando el archivo está completo: un export a medias nunca reemplaza uno válido
+        os.replace(tmp_path, final_path)
+        return final_path, rows
+
+    @staticmethod
+    def archive_expired_partitions(retention_months: int | None = None, archive_dir: str | None = None) -> list[dict]:
+        """Exporta y elimina todas las particiones vencidas. Una partición solo se elimina si su export terminó bien."""
+        archived = []
+        for partition in LogRetentionService.expired_partitions(retention_months):
+            try:
+                path, rows = LogRetentionService.export_partition(partition, archive_dir)
+                db.session.execute(text(f"ALTER TABLE invoice_logs DROP PARTITION {partition}"))
+                db.session.commit()
+                archived.append({"partition": partition, "path": path, "rows": rows})
+                LogService.info(None, "log_partition_archived", f"Partición {partition} exportada ({rows} filas) a {path} y eliminada", LogCategory.DATABASE)
+            except Exception as e:
+                db.session.rollback()
+                LogService.error(None, "log_partition_archive_failed", f"Error al archivar la partición {partition}: {e}", LogCategory.DATABASE)
+        return archived
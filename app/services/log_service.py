@@ -1,17 +1,50 @@
-from app.core.extensions import db
-from app.models.invoice_log import InvoiceLog, LogLevel, LogCategory
-import inspect
+from app.models.invoice_log import LogLevel, LogCategory
+import os
+import sys
+import random
+import threading
 import traceback
 import logging
+from collections import Counter
 from flask import request, has_request_context, g
-import threading
-from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from app.core.config import Config
+from app.services.log_sink_service import LogSink
 
 # Configurar logger para consola
 logger = logging.getLogger("app.log_service")
 
-# Semáforo para operaciones de log que no son thread-safe
-log_lock = threading.Lock()
+# Archivo de este módulo: sus frames se saltan al buscar el origen de un log
+_LOG_SERVICE_FILE = sys._getframe().f_code.co_filename
+
+# Origen ya resuelto por code object (el mismo punto del código siempre produce el mismo origen)
+_origin_cache = {}
+
+LEVEL_NUMBERS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO: logging.INFO,
+    LogLevel.WARNING: logging.WARNING,
+    LogLevel.ERROR: logging.ERROR,
+    LogLevel.CRITICAL: logging.CRITICAL,
+}
+
+def _parse_mapping(raw: str) -> dict:
+    """Convierte "a=1,b=2" en {"a": "1", "b": "2"}."""
+    mapping = {}
+    for item in raw.split(','):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            mapping[key.strip().lower()] = value.strip().lower()
+    return mapping
+
+# Umbrales y muestreo para invoice_logs (ver Config.LOG_DB_*)
+DB_MIN_LEVEL = LEVEL_NUMBERS.get(Config.LOG_DB_MIN_LEVEL.lower(), logging.INFO)
+DB_CATEGORY_LEVELS = {category: LEVEL_NUMBERS.get(level, DB_MIN_LEVEL) for category, level in _parse_mapping(Config.LOG_DB_CATEGORY_LEVELS).items()}
+DB_SAMPLE_RATES = {key: float(rate) for key, rate in _parse_mapping(Config.LOG_DB_SAMPLE_RATES).items()}
+
+# Eventos descartados antes de llegar a la BD, por (categoría, nivel)
+_dropped_counts = Counter()
+_dropped_lock = threading.Lock()
 
 class LogService:
     """
@@ -21,21 +54,46 @@ class LogService:
     
     @staticmethod
     def get_origin():
-        """Intenta determinar el origen (clase/función) del log basado en el stack de llamadas"""
-        stack = inspect.stack()
-        # Ignorar este método y el método de log que lo llamó
-        if len(stack) > 2:
-            caller = stack[2]
-            try:
-                if 'self' in caller.frame.f_locals:
-                    # Es un método de clase
-                    return f"{caller.frame.f_locals['self'].__class__.__name__}.{caller.function}"
-                else:
-                    # Es una función
-                    return f"{caller.filename.split('/')[-1]}:{caller.function}"
-            except:
-                pass
-        return "unknown"
+        """
+        Determina el origen (Clase.método o archivo:función) del log.
+        Recorre los frames directamente, salteando los de este módulo, y cachea el resultado por code object.
+        """
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_code.co_filename == _LOG_SERVICE_FILE:
+            frame = frame.f_back
+        if frame is None:
+            return "unknown"
+
+        code = frame.f_code
+        origin = _origin_cache.get(code)
+        if origin is None:
+            qualname = getattr(code, 'co_qualname', code.co_name)
+            parts = [part for part in qualname.split('.') if part != '<locals>']
+            if len(parts) >= 2 and parts[-2][:1].isupper():
+                # Es un método de clase
+                origin = f"{parts[-2]}.{parts[-1]}"
+            else:
+                # Es una función
+                origin = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            _origin_cache[code] = origin
+        return origin
+
+    @staticmethod
+    def _accept_for_db(level, category) -> bool:
+        """Aplica el umbral por categoría/nivel y el muestreo configurados para invoice_logs."""
+        level_number = LEVEL_NUMBERS.get(level, logging.INFO)
+        if level_number < DB_CATEGORY_LEVELS.get(category, DB_MIN_LEVEL):
+            return False
+        rate = DB_SAMPLE_RATES.get(f"{category}:{level}", DB_SAMPLE_RATES.get(level))
+        if rate is not None and random.random() >= rate:
+            return False
+        return True
+
+    @staticmethod
+    def dropped_counts() -> dict:
+        """Eventos descartados por los filtros en este proceso, como {"categoría:nivel": cantidad}."""
+        with _dropped_lock:
+            return {f"{category}:{level}": count for (category, level), count in _dropped_counts.items()}
     
     @staticmethod
     def get_client_ip():
@@ -59,12 +117,21 @@ class LogService:
     def _add_log(cls, invoice_id, event, level, category, details, origin=None, extra=None, ip_address=None):
         """
         Método interno para añadir un log a la base de datos o solo a consola si invoice_id es None.
-        Maneja la transacción y excepciones.
+        La escritura en BD es asíncrona y por lotes (ver LogSink).
         """
-        if origin is None:
+        # Filtros antes de cualquier formateo: si el evento no va a la BD ni a consola, se descarta aquí
+        persist = invoice_id is not None and cls._accept_for_db(level, category)
+        if not persist:
+            if invoice_id is not None:
+                with _dropped_lock:
+                    _dropped_counts[(category, level)] += 1
+            if not logger.isEnabledFor(LEVEL_NUMBERS.get(level, logging.INFO)):
+                return None
+
+        if origin is None and persist:
             origin = cls.get_origin()
             
-        if ip_address is None and has_request_context():
+        if ip_address is None and persist and has_request_context():
             ip_address = cls.get_client_ip()
         
         # Asegurar que extra es None o un dict serializable
@@ -88,58 +155,29 @@ class LogService:
         console_logger = getattr(logger, level.lower(), logger.info)
         console_logger(log_msg)
         
-        # Si no hay invoice_id, no guardar en base de datos
-        if invoice_id is None:
+        # Sin invoice_id, o filtrado por nivel/muestreo: no guardar en base de datos
+        if not persist:
             return None
         
-        # Crear el objeto de log para la BD
-        log_entry = InvoiceLog(
-            invoice_id=invoice_id,
-            event=event,
-            level=level,
-            category=category,
-            origin=origin,
-            details=details,
-            ip_address=ip_address
-        )
-        
-        if extra:
-            log_entry.extra = extra
-        
-        # Asegurar que solo un hilo modifica la sesión a la vez
-        with log_lock:
-            session = db.session()
-            try:
-                session.add(log_entry)
-                session.commit()
-                return log_entry
-            except SQLAlchemyError as e:
-                session.rollback()
-                error_msg = f"Error al guardar log en BD: {str(e)}"
-                logger.error(error_msg)
-                # Intentar guardar un log de error en la base de datos
-                # No intentar guardar log de error si el original ya tenía invoice_id=None
-                if invoice_id is not None:
-                    try:
-                        error_log = InvoiceLog(
-                            invoice_id=invoice_id,
-                            event="log_error",
-                            level=LogLevel.ERROR,
-                            category=LogCategory.DATABASE,
-                            origin="LogService._add_log",
-                            details=error_msg
-                        )
-                        session.add(error_log)
-                        session.commit()
-                    except:
-                        logger.error("Error crítico: No se pudo guardar el log de error en la base de datos")
-                return None
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Error inesperado al guardar log: {str(e)}")
-                return None
-            finally:
-                session.close()
+        # Fila para la BD: se encola y la escribe el LogSink en lotes, fuera de la sesión de negocio
+        row = {
+            "invoice_id": invoice_id,
+            "event": event,
+            "level": level,
+            "category": category,
+            "origin": origin,
+            "details": details,
+            "extra_data": extra or None,  # Columna JSON: el engine del LogSink serializa con default=str
+            "ip_address": ip_address,
+            "created_at": datetime.utcnow()
+        }
+        LogSink.instance().enqueue(row)
+        return row
+
+    @staticmethod
+    def flush(timeout: float = 10.0) -> bool:
+        """Fuerza la escritura de los logs encolados (se llama al terminar cada tarea de Celery)."""
+        return LogSink.instance().flush(timeout)
     
     # Métodos públicos para diferentes niveles de log
     
@@ -0,0 +1,143 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.config import Config
+from app.models.invoice_log import InvoiceLog
+
+logger = logging.getLogger("app.log_sink")
+
+class _FlushRequest:
+    """Marcador en la cola: el hilo escribe todo lo pendiente y avisa por el evento."""
+    def __init__(self):
+        self.done = threading.Event()
+
+class LogSink:
+    """
+    Buffer en memoria para filas de invoice_logs.
+    Un hilo de fondo las escribe con INSERT multi-fila al alcanzar LOG_SINK_BATCH_SIZE filas
+    o cada LOG_SINK_FLUSH_INTERVAL segundos, usando su propio engine (independiente de la sesión de negocio).
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, batch_size: int | None = None, flush_interval: float | None = None, max_queue: int | None = None):
+        self.batch_size = batch_size or Config.LOG_SINK_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.LOG_SINK_FLUSH_INTERVAL
+        self._queue = queue.Queue(maxsize=max_queue or Config.LOG_SINK_MAX_QUEUE)
+        self._pid = os.getpid()
+        self._engine = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "LogSink":
+        """Devuelve el sink del proceso actual (se recrea tras un fork de Celery)."""
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance._pid != os.getpid():
+                cls._instance = cls()
+            return cls._instance
+
+    def _get_engine(self):
+        if self._engine is None:
+            # Pool mínimo: un solo escritor por proceso
+            self._engine = create_engine(
+                Config.SQLALCHEMY_DATABASE_URI,
+                pool_size=1,
+                max_overflow=1,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                json_serializer=lambda value: json.dumps(value, default=str)  # extras con fechas, Decimals, etc.
+            )
+        return self._engine
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, row: dict):
+        """Encola una fila de invoice_logs. Si la cola está llena, escribe lo pendiente en el hilo llamador."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Cola de logs llena, escribiendo de forma síncrona")
+            self._write(self._drain() + [row])
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Escribe todo lo encolado hasta ahora. Devuelve False si no terminó dentro del timeout."""
+        if not (self._thread and self._thread.is_alive()):
+            self._write(self._drain())
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def _drain(self) -> list:
+        rows = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return rows
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            else:
+                rows.append(item)
+
+    def _run(self):
+        buffer = []
+        deadline = time.time() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _FlushRequest):
+                self._write(buffer)
+                buffer = []
+                item.done.set()
+            elif item is not None:
+                buffer.append(item)
+
+            if len(buffer) >= self.batch_size or time.time() >= deadline:
+                self._write(buffer)
+                buffer = []
+                deadline = time.time() + self.flush_interval
+
+    def _write(self, rows: list):
+        if not rows:
+            return
+        table = InvoiceLog.__table__
+        try:
+            with self._get_engine().begin() as conn:
+                conn.execute(table.insert(), rows)
+        except SQLAlchemyError as e:
+            logger.error(f"Error al guardar {len(rows)} logs en BD, reintentando fila por fila: {e}")
+            # Una fila inválida (ej: factura inexistente) no debe descartar el resto del lote
+            for row in rows:
+                try:
+                    with self._get_engine().begin() as conn:
+                        conn.execute(table.insert(), [row])
+                except SQLAlchemyError as row_error:
+                    logger.error(f"Log descartado ({row.get('event')}, factura {row.get('invoice_id')}): {row_error}")
+        except Exception as e:
+            logger.error(f"Error inesperado al guardar logs: {e}")
+
+@atexit.register
+def _flush_on_exit():
+    sink = LogSink._instance
+    if sink is not None and sink._pid == os.getpid():
+        sink.flush(timeout=5.0)
@@ -0,0 +1,127 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+import numpy as np
+from sqlalchemy import func, tuple_
+from app.core.config import Config
+from app.core.extensions import db
+from app.models.invoice import Invoice
+from app.models.invoice_fingerprint import InvoiceFingerprint, InvoiceFingerprintBand
+from app.services.invoice_data_service import parse_amount
+
+# Firma de 128 permutaciones en 16 bandas de 8 filas: pares con similitud >= ~0.75 comparten alguna banda con alta probabilidad
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# Largo de los shingles de caracteres: tolera mejor los errores puntuales de OCR que los shingles de palabras
+SHINGLE_SIZE = 5
+
+# Permutaciones (a * x + b) mod p con semilla fija: las firmas guardadas siguen siendo comparables entre procesos
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_random = np.random.RandomState(1)
+_PERMUTATION_A = _random.randint(1, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERMUTATION_B = _random.randint(0, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+# Importes escritos en el texto OCR: dígitos con separadores de miles/decimales opcionales
+AMOUNT_PATTERN = re.compile(r"\d[\d.,]*\d|\d")
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin acentos ni signos y con los espacios colapsados (el mismo documento escaneado o exportado coincide)."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9]+", " ", text)).strip()
+
+class NearDuplicateService:
+    """
+    Detección de facturas casi duplicadas (misma factura escaneada y exportada, reenviada, etc.) por el texto OCR.
+    Cada factura guarda una firma MinHash y sus buckets LSH; tras el OCR se buscan candidatas por bucket
+    y se estima la similitud de Jaccard comparando firmas, antes de llamar a OpenAI.
+    """
+
+    @staticmethod
+    def signature(text: str) -> np.ndarray | None:
+        """Firma MinHash (uint32) de los shingles del texto normalizado; None si el texto es demasiado corto."""
+        normalized = normalize_text(text)
+        if len(normalized) < SHINGLE_SIZE:
+            return None
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+        hashes = np.fromiter((zlib.crc32(shingle.encode("ascii")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        # Matriz permutaciones x shingles; a, b y x < 2^32, así a * x + b no desborda uint64
+        permuted = (np.outer(_PERMUTATION_A, hashes) + _PERMUTATION_B[:, None]) % _MERSENNE_PRIME
+        return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    @staticmethod
+    def band_buckets(signature: np.ndarray) -> list[tuple[int, int]]:
+        """(banda, bucket) de cada banda de la firma."""
+        buckets = []
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+            buckets.append((band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "big", signed=True)))
+        return buckets
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Similitud de Jaccard estimada: fracción de permutaciones con el mismo mínimo."""
+        return float(np.mean(first == second))
+
+    @staticmethod
+    def key_fields_match(original_data: dict, text: str) -> bool:
+        """
+        True si el número de factura y el importe total de la extracción original aparecen en el texto OCR nuevo.
+        Facturas distintas con la misma plantilla (mismo proveedor, otro mes) superan el umbral de similitud,
+        así que la extracción solo se reutiliza si también coinciden los datos que las distinguen.
+        """
+        invoice_number = normalize_text(str(original_data.get("invoice_number") or ""))
+        amount_total = parse_amount(original_data.get("amount_total"))
+        if not invoice_number or amount_total is None:
+            return False
+        normalized = normalize_text(text)
+        # Número completo entre límites de palabra (no como parte de otro número)
+        if f" {invoice_number} " not in f" {normalized} ":
+            return False
+        amounts = {parse_amount(token) for token in AMOUNT_PATTERN.findall(text or "")}
+        return any(amount is not None and abs(amount - amount_total) < 0.005 for amount in amounts)
+
+    @staticmethod
+    def index(invoice_id: int, signature: np.ndarray, session=None):
+        """Guarda (o reemplaza) la firma y los buckets de la factura. No hace commit."""
+        session = session or db.session
+        session.query(InvoiceFingerprintBand).filter_by(invoice_id=invoice_id).delete(synchronize_session=False)
+        session.merge(InvoiceFingerprint(invoice_id=invoice_id, signature=signature.tobytes()))
+        session.add_all([
+            InvoiceFingerprintBand(band=band, bucket=bucket, invoice_id=invoice_id)
+            for band, bucket in NearDuplicateService.band_buckets(signature)
+        ])
+
+    @staticmethod
+    def find_similar(invoice_id: int, signature: np.ndarray, threshold: float | None = None) -> tuple[int, float] | None:
+        """
+        Factura original más parecida por encima del umbral (excluye la propia y las marcadas como duplicadas).
+
+        Returns:
+            (invoice_id, similitud) o None.
+        """
+        threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+        candidates = (
+            db.session.query(InvoiceFingerprint.invoice_id, InvoiceFingerprint.signature)
+            .join(InvoiceFingerprintBand, InvoiceFingerprintBand.invoice_id == InvoiceFingerprint.invoice_id)
+            .join(Invoice, Invoice.id == InvoiceFingerprint.invoice_id)
+            .filter(
+                tuple_(InvoiceFingerprintBand.band, InvoiceFingerprintBand.bucket).in_(NearDuplicateService.band_buckets(signature)),
+                InvoiceFingerprint.invoice_id != invoice_id,
+                Invoice.duplicate_of_id.is_(None),
+                Invoice.status != "duplicated",
+            )
+            .group_by(InvoiceFingerprint.invoice_id, InvoiceFingerprint.signature)
+            # Las que comparten más bandas primero: son las más probables
+            .order_by(func.count().desc())
+            .limit(Config.NEAR_DUPLICATE_MAX_CANDIDATES)
+            .all()
+        )
+        best = None
+        for candidate_id, candidate_signature in candidates:
+            score = NearDuplicateService.similarity(signature, np.frombuffer(candidate_signature, dtype=np.uint32))
+            if score >= threshold and (best is None or score > best[1] or (score == best[1] and candidate_id < best[0])):
+                best = (candidate_id, score)
+        return best
@@ -1,17 +1,25 @@
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 import tempfile
 import os
-import functools
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.services.log_service import LogService, LogLevel, LogCategory
+from app.core.config import Config
 
 # Semáforo global para limitar el número de procesos OCR concurrentes
 OCR_SEMAPHORE = threading.Semaphore(2)
 
+# Tamaño de página por defecto (A4 en puntos) si pdfinfo no informa dimensiones
+DEFAULT_PAGE_SIZE_PTS = (595.0, 842.0)
+PAGE_SIZE_PATTERN = re.compile(r"([\d.]+)\s*x\s*([\d.]+)\s*pts")
+# Escalones de DPI a probar cuando la resolución por defecto no entra en el presupuesto
+DPI_STEP = 25
+
 class OCRService:
     def __init__(self, lang="eng", cache_enabled=True):
         self.lang = lang
@@ -40,9 +48,93 @@ class OCRService:
         with OCR_SEMAPHORE:
             return pytesseract.image_to_string(image, lang=self.lang)
     
-    @functools.lru_cache(maxsize=32)
-    def extract_text_from_pdf(self, pdf_path, invoice_id: int | None = None):
-        """Extrae texto de un PDF usando OCR con caché y procesamiento en paralelo optimizado"""
+    def _get_pdf_geometry(self, pdf_path):
+        """Devuelve (cantidad de páginas, (ancho, alto) en puntos de la página más grande) sin renderizar."""
+        try:
+            info = pdfinfo_from_path(pdf_path, first_page=1, last_page=9999)
+        except TypeError:
+            # Versiones de pdf2image sin first_page/last_page: solo informan el tamaño de la primera página
+            info = pdfinfo_from_path(pdf_path)
+        pages = int(info.get("Pages", 1) or 1)
+        largest = None
+        for key, value in info.items():
+            if not (key.startswith("Page") and key.endswith("size")):
+                continue
+            match = PAGE_SIZE_PATTERN.search(str(value))
+            if match:
+                size = (float(match.group(1)), float(match.group(2)))
+                if largest is None or size[0] * size[1] > largest[0] * largest[1]:
+                    largest = size
+        return pages, largest or DEFAULT_PAGE_SIZE_PTS
+
+    @staticmethod
+    def _estimate_page_mb(page_size_pts, dpi):
+        """Memoria estimada para renderizar y procesar una página a un DPI dado."""
+        width_px = page_size_pts[0] / 72.0 * dpi
+        height_px = page_size_pts[1] / 72.0 * dpi
+        return width_px * height_px * Config.OCR_BYTES_PER_PIXEL / 1024 / 1024
+
+    def _plan_pdf_ocr(self, pdf_path, invoice_id=None):
+        """
+        Elige DPI y concurrencia para que el OCR quepa en OCR_MEMORY_BUDGET_MB.
+        Primero reduce la cantidad de páginas en paralelo; solo baja el DPI si ni una página cabe.
+        Cada vez que se aparta de los valores por defecto registra la decisión.
+        """
+        budget_mb = Config.OCR_MEMORY_BUDGET_MB
+        default_dpi = Config.OCR_DEFAULT_DPI
+        default_workers = Config.OCR_MAX_WORKERS
+        try:
+            pages, page_size = self._get_pdf_geometry(pdf_path)
+        except Exception as e:
+            LogService.warning(invoice_id, "ocr_pdfinfo_failed", f"No se pudieron leer las dimensiones de {pdf_path}: {e}", LogCategory.PROCESS, extra={"pdf_path": pdf_path})
+            pages, page_size = None, DEFAULT_PAGE_SIZE_PTS
+
+        candidate_dpis = list(range(default_dpi, Config.OCR_MIN_DPI - 1, -DPI_STEP))
+        if not candidate_dpis or candidate_dpis[-1] != Config.OCR_MIN_DPI:
+            candidate_dpis.append(min(Config.OCR_MIN_DPI, default_dpi))
+
+        dpi, workers, page_mb, reason = None, 1, None, None
+        for candidate in candidate_dpis:
+            page_mb = self._estimate_page_mb(page_size, candidate)
+            fitting = math.floor(budget_mb / page_mb) if page_mb > 0 else default_workers
+            if fitting >= 1:
+                dpi = candidate
+                workers = max(1, min(default_workers, fitting, pages or default_workers))
+                break
+        if dpi is None:
+            # Ni siquiera una página al DPI mínimo entra en el presupuesto: se procesa de a una igualmente
+            dpi, workers = candidate_dpis[-1], 1
+            page_mb = self._estimate_page_mb(page_size, dpi)
+            reason = "over_budget_at_min_dpi"
+        elif dpi < default_dpi:
+            reason = "dpi_reduced"
+        elif workers < min(default_workers, pages or default_workers):
+            reason = "concurrency_reduced"
+
+        plan = {
+            "pdf_path": pdf_path,
+            "pages": pages,
+            "page_size_pts": [round(page_size[0], 1), round(page_size[1], 1)],
+            "dpi": dpi,
+            "workers": workers,
+            "estimated_page_mb": round(page_mb, 1),
+            "estimated_peak_mb": round(page_mb * workers, 1),
+            "budget_mb": budget_mb,
+            "default_dpi": default_dpi,
+            "default_workers": default_workers,
+            "reason": reason,
+        }
+        if reason:
+            LogService.info(invoice_id, "ocr_plan_adapted", f"OCR adaptado al presupuesto de memoria: {dpi} DPI, {workers} página(s) en paralelo ({reason})", LogCategory.PROCESS, extra=plan)
+        return plan
+
+    def extract_text_from_pdf(self, pdf_path, invoice_id: int | None = None, progress_callback=None):
+        """
+        Extrae texto de un PDF usando OCR con caché y procesamiento en paralelo optimizado.
+
+        Args:
+            progress_callback: Función opcional (pages_done, pages_total) llamada al terminar cada página.
+        """
         process_name = "extract_text_from_pdf"
         LogService.process_start(invoice_id, process_name, f"Iniciando OCR para PDF: {pdf_path}", extra={"pdf_path": pdf_path})
         start_time = time.time()
@@ -65,15 +157,42 @@ class OCRService:
 
         # Si no hubo caché hit, proceder con OCR
         try:
+            plan = self._plan_pdf_ocr(pdf_path, invoice_id)
+            dpi, workers, total_pages = plan["dpi"], plan["workers"], plan["pages"]
+
             with tempfile.TemporaryDirectory() as path:
-                # Convertir PDF a imágenes con una resolución más baja pero adecuada (DPI 200 en lugar de 300)
-                images = convert_from_path(pdf_path, dpi=200, output_folder=path, thread_count=2)
-                
-                # Procesa imágenes en paralelo usando un ThreadPoolExecutor
-                with ThreadPoolExecutor(max_workers=2) as executor:
-                    # Pasamos self._process_image sin argumentos adicionales
-                    results = list(executor.map(self._process_image, images))
-                    text = "\n".join(results)
+                if total_pages is None:
+                    # Sin información de páginas no se puede renderizar por lotes: se renderiza todo de una vez
+                    all_images = convert_from_path(pdf_path, dpi=dpi, output_folder=path, thread_count=workers)
+                    total_pages = len(all_images)
+                    render_pages = lambda first, last: all_images[first - 1:last]
+                else:
+                    render_pages = lambda first, last: convert_from_path(pdf_path, dpi=dpi, output_folder=path, thread_count=workers,
+                                                                         first_page=first, last_page=last)
+
+                results = []
+                pages_done = 0
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    # Renderizar de a `workers` páginas: nunca hay más imágenes vivas que las que caben en el presupuesto
+                    for first_page in range(1, total_pages + 1, workers):
+                        images = render_pages(first_page, min(first_page + workers - 1, total_pages))
+                        batch_results = [None] * len(images)
+                        future_to_index = {executor.submit(self._process_image, image): index for index, image in enumerate(images)}
+                        # Reportar cada página a medida que termina, conservando el orden original en el texto
+                        for future in as_completed(future_to_index):
+                            batch_results[future_to_index[future]] = future.result()
+                            pages_done += 1
+                            if progress_callback:
+                                progress_callback(pages_done, total_pages)
+                        results.extend(batch_results)
+                        # Liberar las imágenes del lote (memoria y archivos temporales) antes del siguiente
+                        for image in images:
+                            image_file = getattr(image, "filename", None)
+                            image.close()
+                            if image_file and os.path.exists(image_file):
+                                os.remove(image_file)
+                        del images
+                text = "\n".join(results)
                 
         except Exception as e:
             duration = time.time() - start_time
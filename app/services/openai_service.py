@@ -81,15 +81,24 @@ class OpenAIService:
         """Genera una clave de caché basada en el contenido del prompt y modelo"""
         return hashlib.md5(f"{prompt_content}:{model}".encode()).hexdigest()
 
+    def extract_prompt_fingerprint(self, prompt_path: str | None = None) -> str:
+        """Identifica la versión del prompt de extracción (contenido + modelo) para invalidar checkpoints."""
+        try:
+            prompt_content = self._load_extract_prompt(prompt_path)
+        except Exception:
+            prompt_content = prompt_path or "default"
+        return hashlib.sha256(f"{prompt_content}:{self.model}".encode()).hexdigest()
+
+    def summary_prompt_fingerprint(self) -> str:
+        """Identifica la versión del prompt de resumen (contenido + modelo) para invalidar checkpoints."""
+        return hashlib.sha256(f"{self.summary_prompt_template}:{self.model}".encode()).hexdigest()
+
     @retry_with_backoff(max_tries=3)
-    def summarize_invoice_text(self, raw_text: str) -> str:
+    def summarize_invoice_text(self, raw_text: str, invoice_id: int | None = None) -> str:
         """Genera un resumen del texto de la factura con reintentos en caso de error"""
-        # Este método ahora necesita invoice_id
-        # La firma debería ser: summarize_invoice_text(self, raw_text: str, invoice_id: int | None = None)
-        # Asumiremos que se pasa None si no hay contexto de factura.
-        # Por simplicidad en esta edición, añadiremos el parámetro sin cambiar la firma en la tool call.
-        # ¡RECORDATORIO: Ajustar la firma en el código real! 
-        invoice_id = getattr(self, '_current_invoice_id', None) # Truco temporal para pasar el ID
+        # Compatibilidad: extract_structured_data_and_raw aún pasa el ID mediante _current_invoice_id
+        if invoice_id is None:
+            invoice_id = getattr(self, '_current_invoice_id', None)
         
         process_name = "summarize_invoice_text"
         text_length = len(raw_text)
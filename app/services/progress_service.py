@@ -0,0 +1,88 @@
+import threading
+import time
+from app.core.config import Config
+from app.core.extensions import socketio
+from app.services.log_service import LogService, LogCategory
+
+class ProgressStage:
+    OCR = "ocr"
+    EXTRACTION = "extraction"
+    SUMMARY = "summary"
+    SAVING = "saving"
+
+class ProgressReporter:
+    """
+    Emite eventos 'invoice_progress' con tiempos por etapa.
+    Los eventos intermedios (ej: página k/N) se limitan a uno cada min_interval segundos;
+    los inicios y fines de etapa siempre se emiten.
+    Como mucho uno cada broadcast_interval segundos va a todo el namespace (la lista de facturas lo muestra
+    sin unirse a ningún room); el resto solo al room de la factura, para quien sigue esa factura en detalle.
+    """
+
+    def __init__(self, invoice_id: int, min_interval: float | None = None, namespace: str = '/invoices', event_name: str = 'invoice_progress',
+                 broadcast_interval: float | None = None):
+        self.invoice_id = invoice_id
+        self.min_interval = Config.PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.broadcast_interval = Config.PROGRESS_BROADCAST_INTERVAL if broadcast_interval is None else broadcast_interval
+        self.namespace = namespace
+        self.event_name = event_name
+        self.room = f'invoice_{invoice_id}'
+        self._started_at = time.time()
+        self._stage_started_at = {}
+        self._timings = {}
+        self._last_emit = 0.0
+        self._last_broadcast = 0.0
+        # Los callbacks de OCR llegan desde varios hilos del ThreadPoolExecutor
+        self._lock = threading.Lock()
+
+    def start_stage(self, stage: str, **extra):
+        with self._lock:
+            self._stage_started_at[stage] = time.time()
+            self._emit(stage, "started", extra)
+
+    def update(self, stage: str, current: int | None = None, total: int | None = None, **extra):
+        """Progreso intermedio de una etapa. Se descarta si llega antes de min_interval (salvo el último paso)."""
+        with self._lock:
+            is_last_step = current is not None and total is not None and current >= total
+            if not is_last_step and time.time() - self._last_emit < self.min_interval:
+                return
+            if current is not None:
+                extra["current"] = current
+            if total is not None:
+                extra["total"] = total
+            self._emit(stage, "progress", extra)
+
+    def end_stage(self, stage: str, **extra):
+        with self._lock:
+            started_at = self._stage_started_at.get(stage, time.time())
+            self._timings[stage] = round(time.time() - started_at, 3)
+            self._emit(stage, "completed", extra)
+
+    def page_callback(self, stage: str = ProgressStage.OCR):
+        """Devuelve un callback (pages_done, pages_total) para OCRService."""
+        return lambda done, total: self.update(stage, current=done, total=total)
+
+    def _emit(self, stage: str, state: str, extra: dict):
+        now = time.time()
+        stage_started_at = self._stage_started_at.get(stage)
+        payload = {
+            "id": self.invoice_id,
+            "stage": stage,
+            "state": state,
+            "stage_elapsed": round(now - stage_started_at, 3) if stage_started_at else None,
+            "elapsed": round(now - self._started_at, 3),
+            "timings": dict(self._timings),
+        }
+        payload.update(extra)
+        self._last_emit = now
+        # Un evento al namespace también llega a los clientes del room: no se envía dos veces
+        room = self.room
+        if now - self._last_broadcast >= self.broadcast_interval:
+            room = None
+            self._last_broadcast = now
+        try:
+            # En el worker, socketio publica a través de la message queue de Redis (SOCKETIO_MESSAGE_QUEUE)
+            socketio.emit(self.event_name, payload, namespace=self.namespace, room=room)
+        except Exception as e:
+            # El progreso es informativo: nunca debe interrumpir el procesamiento
+            LogService.warning(None, "progress_emit_failed", f"Error al emitir progreso de factura {self.invoice_id}: {e}", LogCategory.SYSTEM)
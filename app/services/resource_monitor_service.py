@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+import psutil
+import redis
+from app.core.config import Config
+from app.core.redis_client import get_redis
+from app.services.log_service import LogService, LogCategory
+
+# Prefijo de las claves Redis donde cada worker publica su última muestra (leídas por GET /metrics)
+METRICS_KEY_PREFIX = "worker_metrics"
+
+class ResourceMonitor:
+    """
+    Sampler de recursos en un hilo de fondo, uno por proceso worker.
+    Guarda RSS, CPU, descriptores abiertos y procesos hijos de Tesseract en un ring buffer
+    y publica la última muestra en Redis; las tareas solo leen muestras ya tomadas.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, interval: float | None = None, buffer_size: int | None = None):
+        self.interval = interval or Config.RESOURCE_SAMPLE_INTERVAL
+        self.samples = deque(maxlen=buffer_size or Config.RESOURCE_SAMPLE_BUFFER)
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._process = psutil.Process(os.getpid())
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def instance(cls) -> "ResourceMonitor":
+        """Devuelve el monitor del proceso actual (se recrea tras un fork)."""
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance._process.pid != os.getpid():
+                cls._instance = cls()
+            return cls._instance
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # Primera llamada sin intervalo: inicializa el contador de CPU sin bloquear
+        self._process.cpu_percent(interval=None)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+        self._thread.start()
+        LogService.info(None, "resource_monitor_started", f"Sampler de recursos iniciado ({self.worker_name}, cada {self.interval}s)", LogCategory.WORKER)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                sample = self.sample()
+                self.samples.append(sample)
+                self._publish(sample)
+            except Exception as e:
+                LogService.warning(None, "resource_sample_failed", f"Error al muestrear recursos: {e}", LogCategory.WORKER)
+            self._stop_event.wait(self.interval)
+
+    def _count_tesseract_children(self) -> int:
+        count = 0
+        for child in self._process.children(recursive=True):
+            try:
+                if "tesseract" in child.name().lower():
+                    count += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return count
+
+    def sample(self) -> dict:
+        """Toma una muestra completa (la llama el hilo de fondo)."""
+        mem_info = self._process.memory_info()
+        cpu_times = self._process.cpu_times()
+        try:
+            open_fds = self._process.num_fds()
+        except (AttributeError, psutil.AccessDenied):
+            open_fds = None  # num_fds no existe en Windows
+        return {
+            "timestamp": time.time(),
+            "rss_mb": round(mem_info.rss / 1024 / 1024, 2),
+            "cpu_percent": self._process.cpu_percent(interval=None),
+            "cpu_seconds": round(cpu_times.user + cpu_times.system, 3),
+            "open_fds": open_fds,
+            "threads": self._process.num_threads(),
+            "tesseract_processes": self._count_tesseract_children(),
+            "log_drops": LogService.dropped_counts(),
+        }
+
+    def snapshot(self) -> dict:
+        """Lectura barata para el hot path: memoria y tiempo de CPU actuales, sin recorrer hijos ni dormir."""
+        mem_info = self._process.memory_info()
+        cpu_times = self._process.cpu_times()
+        return {
+            "timestamp": time.time(),
+            "rss_mb": round(mem_info.rss / 1024 / 1024, 2),
+            "cpu_seconds": round(cpu_times.user + cpu_times.system, 3),
+        }
+
+    def task_delta(self, start: dict, end: dict) -> dict:
+        """Resume el consumo de una tarea combinando sus snapshots con las muestras tomadas durante ella."""
+        window = [s for s in list(self.samples) if start["timestamp"] <= s["timestamp"] <= end["timestamp"]]
+        return {
+            "duration_seconds": round(end["timestamp"] - start["timestamp"], 3),
+            "cpu_seconds": round(end["cpu_seconds"] - start["cpu_seconds"], 3),
+            "rss_start_mb": start["rss_mb"],
+            "rss_end_mb": end["rss_mb"],
+            "rss_delta_mb": round(end["rss_mb"] - start["rss_mb"], 2),
+            "rss_peak_mb": max([start["rss_mb"], end["rss_mb"]] + [s["rss_mb"] for s in window]),
+            "tesseract_peak": max([s["tesseract_processes"] for s in window], default=None),
+            "open_fds_peak": max([s["open_fds"] for s in window if s["open_fds"] is not None], default=None),
+            "samples": len(window),
+        }
+
+    def _publish(self, sample: dict):
+        """Publica la última muestra en Redis para que GET /metrics la exponga."""
+        try:
+            get_redis().set(f"{METRICS_KEY_PREFIX}:{self.worker_name}", json.dumps(sample), ex=int(self.interval * 3) + 1)
+        except redis.RedisError:
+            # Sin Redis las muestras siguen disponibles localmente en el ring buffer
+            pass
+
+    @staticmethod
+    def collect_published() -> dict:
+        """Devuelve {worker: última muestra} de todos los workers vivos."""
+        client = get_redis()
+        result = {}
+        for key in client.scan_iter(match=f"{METRICS_KEY_PREFIX}:*", count=100):
+            raw = client.get(key)
+            if raw is None:
+                continue
+            worker = key.decode() if isinstance(key, bytes) else key
+            result[worker[len(METRICS_KEY_PREFIX) + 1:]] = json.loads(raw)
+        return result
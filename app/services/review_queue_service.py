@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+from flask import has_request_context, request
+from sqlalchemy import or_, select, update
+from app.core.config import Config
+from app.core.extensions import db, socketio
+from app.models.invoice import Invoice
+
+# Estado de las facturas que esperan revisión manual
+REVIEW_STATUS = "waiting_validation"
+
+class ClaimConflict(Exception):
+    """La factura está reservada por otro revisor con un lease vigente."""
+
+    def __init__(self, invoice_id: int, claimed_by: str, claim_expires_at: datetime):
+        super().__init__(f"La factura {invoice_id} está reservada por {claimed_by} hasta {claim_expires_at.isoformat()}")
+        self.invoice_id = invoice_id
+        self.claimed_by = claimed_by
+        self.claim_expires_at = claim_expires_at
+
+class ReviewQueueService:
+    """
+    Cola de revisión de facturas en waiting_validation. Cada revisor reserva las siguientes N facturas libres con
+    SELECT ... FOR UPDATE SKIP LOCKED: las filas que otro revisor está reservando en ese momento se saltan en lugar
+    de esperar, así que reservas concurrentes obtienen conjuntos disjuntos. La reserva es un lease (claimed_by,
+    claim_expires_at) que el revisor renueva con heartbeat y libera al terminar; si vence, la factura vuelve a la cola.
+    """
+
+    @staticmethod
+    def reviewer_from_request() -> str | None:
+        """Identificador del revisor en la solicitud actual: cabecera X-Reviewer o campo 'reviewer' del JSON."""
+        if not has_request_context():
+            return None
+        reviewer = request.headers.get('X-Reviewer')
+        if not reviewer and request.is_json:
+            reviewer = (request.get_json(silent=True) or {}).get('reviewer')
+        reviewer = str(reviewer).strip()[:100] if reviewer else ""
+        return reviewer or None
+
+    @staticmethod
+    def _lease_end(now: datetime) -> datetime:
+        return now + timedelta(seconds=Config.REVIEW_CLAIM_TTL_SECONDS)
+
+    @staticmethod
+    def _available(now: datetime):
+        """Condición de facturas sin reserva o con el lease vencido."""
+        return or_(Invoice.claim_expires_at.is_(None), Invoice.claim_expires_at < now)
+
+    @staticmethod
+    def is_claimed_by_other(claimed_by: str | None, claim_expires_at: datetime | None, reviewer: str | None,
+                            now: datetime | None = None) -> bool:
+        """True si hay un lease vigente de un revisor distinto de reviewer."""
+        now = now or datetime.utcnow()
+        return bool(claimed_by) and claim_expires_at is not None and claim_expires_at >= now and claimed_by != reviewer
+
+    @staticmethod
+    def check_claim(invoice: Invoice, reviewer: str | None):
+        """Lanza ClaimConflict si otro revisor tiene reservada la factura (la factura debe estar cargada en la transacción)."""
+        if ReviewQueueService.is_claimed_by_other(invoice.claimed_by, invoice.claim_expires_at, reviewer):
+            raise ClaimConflict(invoice.id, invoice.claimed_by, invoice.claim_expires_at)
+
+    @staticmethod
+    def clear_claim(invoice: Invoice):
+        """Libera la reserva de una factura que sale de la cola (confirmada o rechazada)."""
+        invoice.claimed_by = None
+        invoice.claim_expires_at = None
+
+    @staticmethod
+    def _emit(invoices: list[dict]):
+        """Un evento con las reservas cambiadas, para que la lista oculte o muestre esas facturas."""
+        if not invoices:
+            return
+        try:
+            socketio.emit('invoices_claim_update', {"invoices": invoices}, namespace='/invoices')
+        except Exception as socket_err:
+            print(f"Error al emitir evento SocketIO: {socket_err}")
+
+    @staticmethod
+    def claim(reviewer: str, limit: int, company_id: int | None = None) -> list[dict]:
+        """
+        Reserva hasta `limit` facturas libres, las más antiguas primero.
+        Las filas solo quedan bloqueadas durante esta transacción corta; la reserva la sostiene el lease.
+        """
+        now = datetime.utcnow()
+        expires_at = ReviewQueueService._lease_end(now)
+        try:
+            filters = [Invoice.status == REVIEW_STATUS, ReviewQueueService._available(now)]
+            if company_id is not None:
+                filters.append(Invoice.company_id == company_id)
+            # Recorre ix_invoices_status_created_at_id; las filas bloqueadas por otra reserva en curso se saltan
+            invoice_ids = db.session.execute(
+                select(Invoice.id)
+                .where(*filters)
+                .order_by(Invoice.created_at, Invoice.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            rows = []
+            if invoice_ids:
+                db.session.execute(
+                    update(Invoice).where(Invoice.id.in_(invoice_ids))
+                    .values(claimed_by=reviewer, claim_expires_at=expires_at),
+                    execution_options={"synchronize_session": False}
+                )
+                rows = db.session.execute(
+                    select(Invoice.id, Invoice.filename, Invoice.company_id, Invoice.created_at)
+                    .where(Invoice.id.in_(invoice_ids))
+                    .order_by(Invoice.created_at, Invoice.id)
+                ).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        claimed = [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "company_id": row.company_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "claim_expires_at": expires_at.isoformat(),
+            }
+            for row in rows
+        ]
+        ReviewQueueService._emit([
+            {"id": item["id"], "claimed_by": reviewer, "claim_expires_at": item["claim_expires_at"]} for item in claimed
+        ])
+        return claimed
+
+    @staticmethod
+    def heartbeat(reviewer: str, invoice_ids: list[int]) -> tuple[list[int], datetime]:
+        """
+        Extiende el lease de las facturas que el revisor aún tiene reservadas.
+        Las que vencieron y tomó otro revisor (o ya salieron de la cola) no se renuevan.
+
+        Returns:
+            (ids renovados, nuevo vencimiento)
+        """
+        now = datetime.utcnow()
+        expires_at = ReviewQueueService._lease_end(now)
+        try:
+            renewed = db.session.execute(
+                select(Invoice.id).where(
+                    Invoice.id.in_(invoice_ids),
+                    Invoice.status == REVIEW_STATUS,
+                    Invoice.claimed_by == reviewer,
+                ).with_for_update()
+            ).scalars().all()
+            if renewed:
+                db.session.execute(
+                    update(Invoice)
+                    .where(Invoice.id.in_(renewed), Invoice.claimed_by == reviewer)
+                    .values(claim_expires_at=expires_at),
+                    execution_options={"synchronize_session": False}
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return renewed, expires_at
+
+    @staticmethod
+    def release(reviewer: str, invoice_ids: list[int] | None = None) -> list[int]:
+        """Libera las reservas del revisor (todas si no se indican ids) y devuelve los ids liberados."""
+        try:
+            query = select(Invoice.id).where(Invoice.claimed_by == reviewer)
+            if invoice_ids is not None:
+                query = query.where(Invoice.id.in_(invoice_ids))
+            released = db.session.execute(query.with_for_update()).scalars().all()
+            if released:
+                db.session.execute(
+                    update(Invoice)
+                    .where(Invoice.id.in_(released), Invoice.claimed_by == reviewer)
+                    .values(claimed_by=None, claim_expires_at=None),
+                    execution_options={"synchronize_session": False}
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        ReviewQueueService._emit([{"id": invoice_id, "claimed_by": None, "claim_expires_at": None} for invoice_id in released])
+        return released
+
+    @staticmethod
+    def claimed(reviewer: str) -> list[dict]:
+        """Reservas vigentes del revisor (para retomar la sesión de revisión)."""
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            select(Invoice.id, Invoice.filename, Invoice.company_id, Invoice.created_at, Invoice.claim_expires_at)
+            .where(Invoice.claimed_by == reviewer, Invoice.status == REVIEW_STATUS, Invoice.claim_expires_at >= now)
+            .order_by(Invoice.created_at, Invoice.id)
+        ).all()
+        return [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "company_id": row.company_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "claim_expires_at": row.claim_expires_at.isoformat(),
+            }
+            for row in rows
+        ]
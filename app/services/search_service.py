@@ -0,0 +1,169 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.extensions import db
+from app.models.invoice import Invoice
+from app.models.company import Company
+from app.models.invoice_checkpoint import InvoiceCheckpoint, CheckpointStage
+from app.models.invoice_search_index import InvoiceSearchIndex
+from app.services.log_service import LogService, LogCategory
+
+# Longitud mínima de un token indexado por InnoDB (innodb_ft_min_token_size)
+MIN_TOKEN_SIZE = 3
+
+# Claves de preview_data/final_data que forman parte del documento de búsqueda
+SEARCH_FIELDS = ("invoice_number", "bill_to", "amount_total", "date", "currency", "payment_terms")
+
+# CUIT/CUIL con o sin guiones (ej. 20-12345678-9)
+CUIT_PATTERN = re.compile(r"\b(?:20|23|24|27|30|33|34)-?\d{8}-?\d\b")
+
+# Caracteres con significado en el modo booleano de MATCH ... AGAINST
+BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+def _compact_digits(value: str) -> str | None:
+    """'20-12345678-9' -> '20123456789', '1.234,56' -> '123456'. None si no hay separadores que quitar."""
+    digits = re.sub(r"\D", "", value)
+    if len(digits) >= MIN_TOKEN_SIZE and digits != value:
+        return digits
+    return None
+
+class SearchService:
+    """
+    Búsqueda de facturas por nombre de archivo, texto OCR y campos extraídos (número, proveedor, CUIT, importe).
+    Usa los índices FULLTEXT de invoice_search_index; los números se indexan además sin separadores para que
+    "20-12345678-9" o "1.234,56" se encuentren escritos de cualquier forma.
+    """
+
+    @staticmethod
+    def build_fields_text(invoice: Invoice, ocr_text: str | None = None) -> str:
+        """Arma el texto de campos de una factura (final_data si está confirmada, si no preview_data)."""
+        data = invoice.final_data or invoice.preview_data or {}
+        values = []
+        if isinstance(data, dict):
+            values.extend(str(data[key]) for key in SEARCH_FIELDS if data.get(key) not in (None, ""))
+            for item in data.get("items") or []:
+                if isinstance(item, dict):
+                    if item.get("description"):
+                        values.append(str(item["description"]))
+                    values.extend(str(code) for code in item.get("advertising_numbers") or [])
+            for operation in data.get("operation_codes") or []:
+                if isinstance(operation, dict) and operation.get("code"):
+                    values.append(str(operation["code"]))
+        if invoice.company_id and invoice.company:
+            values.append(invoice.company.name)
+
+        # CUITs presentes en los campos o en el OCR
+        sources = " ".join(values) + " " + (ocr_text or "")
+        values.extend(cuit.group(0) for cuit in CUIT_PATTERN.finditer(sources))
+
+        # Variantes sin separadores para números (CUIT, número de factura, importes)
+        compact = [_compact_digits(token) for value in values for token in value.split()]
+        values.extend(token for token in compact if token)
+
+        return " ".join(dict.fromkeys(values))  # Sin duplicados, preservando el orden
+
+    @staticmethod
+    def index_invoice(invoice: Invoice, ocr_text: str | None = None, commit: bool = True) -> InvoiceSearchIndex | None:
+        """
+        Crea o actualiza el documento de búsqueda de una factura.
+        Si no se pasa ocr_text se conserva el ya indexado (o se toma del checkpoint de OCR).
+        Un fallo aquí no interrumpe la operación que lo llama.
+        """
+        session = db.session
+        try:
+            entry = session.get(InvoiceSearchIndex, invoice.id)
+            if ocr_text is None:
+                if entry is not None:
+                    ocr_text = entry.ocr_text
+                else:
+                    checkpoint = InvoiceCheckpoint.query.filter_by(invoice_id=invoice.id, stage=CheckpointStage.OCR).first()
+                    ocr_text = checkpoint.payload if checkpoint and isinstance(checkpoint.payload, str) else None
+
+            if entry is None:
+                entry = InvoiceSearchIndex(invoice_id=invoice.id)
+                session.add(entry)
+            entry.filename = invoice.filename
+            entry.fields_text = SearchService.build_fields_text(invoice, ocr_text)
+            entry.ocr_text = ocr_text
+            if commit:
+                session.commit()
+            return entry
+        except SQLAlchemyError as e:
+            session.rollback()
+            LogService.warning(invoice.id, "search_index_failed", f"No se pudo actualizar el índice de búsqueda: {e}", LogCategory.DATABASE)
+            return None
+
+    @staticmethod
+    def to_boolean_query(term: str) -> str | None:
+        """
+        Convierte el texto del usuario en una consulta booleana: todos los términos son obligatorios y por prefijo.
+        Los números con separadores se buscan compactados. None si no queda ningún término indexable.
+        """
+        tokens = []
+        for word in BOOLEAN_OPERATORS.sub(" ", term).split():
+            compact = _compact_digits(word)
+            if compact:
+                tokens.append(compact)
+                continue
+            # Palabras con puntuación interna (ej. "A-0001") se indexan como tokens separados
+            tokens.extend(part for part in re.findall(r"\w+", word) if len(part) >= MIN_TOKEN_SIZE)
+        if not tokens:
+            return None
+        return " ".join(f"+{token}*" for token in dict.fromkeys(tokens))
+
+    @staticmethod
+    def match_clause(boolean_query: str):
+        """Condición FULLTEXT para filtrar facturas (usa el índice ft_invoice_search_all)."""
+        return match(
+            InvoiceSearchIndex.filename,
+            InvoiceSearchIndex.fields_text,
+            InvoiceSearchIndex.ocr_text,
+            against=boolean_query
+        ).in_boolean_mode()
+
+    @staticmethod
+    def search(term: str, limit: int = 20, statuses: list[str] | None = None) -> list[dict]:
+        """
+        Devuelve las facturas que coinciden con el término, ordenadas por relevancia.
+        Las coincidencias en nombre de archivo y campos extraídos pesan el doble que las del texto OCR.
+
+        Raises:
+            ValueError: Si el término no tiene palabras indexables.
+        """
+        boolean_query = SearchService.to_boolean_query(term)
+        if not boolean_query:
+            raise ValueError(f"El término de búsqueda debe tener al menos una palabra de {MIN_TOKEN_SIZE} caracteres.")
+
+        all_match = SearchService.match_clause(boolean_query)
+        fields_match = match(InvoiceSearchIndex.filename, InvoiceSearchIndex.fields_text, against=boolean_query).in_boolean_mode()
+        score = (all_match + 2 * fields_match).label("score")
+
+        query = (
+            db.session.query(
+                Invoice.id,
+                Invoice.filename,
+                Invoice.status,
+                Invoice.created_at,
+                Company.name.label("company_name"),
+                score
+            )
+            .join(InvoiceSearchIndex, InvoiceSearchIndex.invoice_id == Invoice.id)
+            .outerjoin(Company, Company.id == Invoice.company_id)
+            .filter(all_match)
+        )
+        if statuses:
+            query = query.filter(Invoice.status.in_(statuses))
+
+        rows = query.order_by(text("score DESC"), Invoice.id.desc()).limit(limit).all()
+        return [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "status": row.status,
+                "company_name": row.company_name or "Sin compañía",
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "score": round(float(row.score or 0), 4),
+            }
+            for row in rows
+        ]
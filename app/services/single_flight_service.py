@@ -0,0 +1,136 @@
+import json
+import time
+import uuid
+import redis
+from app.core.config import Config
+from app.core.redis_client import get_redis
+from app.services.log_service import LogService, LogCategory
+
+# Libera el lock solo si sigue perteneciendo a quien lo tomó
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class SingleFlightTimeout(Exception):
+    """El trabajo en curso de otro worker no terminó dentro del tiempo de espera."""
+    pass
+
+class SingleFlightBusy(Exception):
+    """Otro worker tiene el lock de la clave y el llamador pidió no esperar."""
+    pass
+
+class SingleFlightService:
+    """
+    De-duplica trabajo en curso entre workers usando Redis.
+    El primer llamador para una clave ejecuta la función y publica el resultado;
+    los siguientes esperan a que termine y reutilizan ese resultado (o, con wait=False, se descartan).
+    """
+
+    def __init__(self, namespace: str, lock_ttl: int | None = None, result_ttl: int | None = None,
+                 wait_timeout: int | None = None, poll_interval: float = 0.5):
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl or Config.SINGLE_FLIGHT_LOCK_TTL
+        self.result_ttl = result_ttl or Config.SINGLE_FLIGHT_RESULT_TTL
+        self.wait_timeout = wait_timeout or Config.SINGLE_FLIGHT_WAIT_TIMEOUT
+        self.poll_interval = poll_interval
+
+    def _lock_key(self, key: str) -> str:
+        return f"singleflight:{self.namespace}:{key}:lock"
+
+    def _result_key(self, key: str) -> str:
+        return f"singleflight:{self.namespace}:{key}:result"
+
+    def _get_result(self, client, key: str):
+        """Devuelve (encontrado, valor) del resultado publicado para la clave."""
+        cached = client.get(self._result_key(key))
+        if cached is None:
+            return False, None
+        return True, json.loads(cached)["value"]
+
+    def do(self, key: str, fn, wait: bool = True, should_cache=None):
+        """
+        Ejecuta fn una sola vez por clave entre todos los workers.
+
+        Args:
+            key: Identificador del trabajo (ID de factura, hash de contenido, etc.).
+            fn: Función sin argumentos que calcula el resultado (debe ser serializable a JSON).
+            wait: Si es False y otro worker tiene el lock, lanza SingleFlightBusy en lugar de esperar.
+            should_cache: Predicado opcional sobre el resultado; si devuelve False el resultado no se publica
+                (los siguientes llamadores vuelven a ejecutar fn).
+
+        Returns:
+            El resultado de fn, propio o de otro worker.
+
+        Raises:
+            SingleFlightTimeout: Si otro worker mantiene el lock más allá de wait_timeout.
+            SingleFlightBusy: Si wait es False y el trabajo está en curso en otro worker.
+        """
+        try:
+            client = get_redis()
+            found, value = self._get_result(client, key)
+        except redis.RedisError as e:
+            # Sin Redis no hay coordinación posible: se ejecuta el trabajo localmente
+            LogService.warning(None, "single_flight_unavailable", f"Redis no disponible para single-flight ({self.namespace}): {e}", LogCategory.SYSTEM)
+            return fn()
+        if found:
+            LogService.debug(None, "single_flight_result_reused", f"Resultado reutilizado para {self.namespace}:{key}", LogCategory.WORKER)
+            return value
+
+        token = uuid.uuid4().hex
+        lock_key = self._lock_key(key)
+        deadline = time.time() + self.wait_timeout
+        waited = False
+
+        while True:
+            if client.set(lock_key, token, nx=True, ex=self.lock_ttl):
+                try:
+                    # Otro worker pudo haber terminado justo antes de que tomáramos el lock
+                    found, value = self._get_result(client, key)
+                    if found:
+                        return value
+                    value = fn()
+                    if should_cache is None or should_cache(value):
+                        client.set(self._result_key(key), json.dumps({"value": value}), ex=self.result_ttl)
+                    return value
+                finally:
+                    try:
+                        client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    except redis.RedisError as e:
+                        LogService.warning(None, "single_flight_release_failed", f"No se pudo liberar el lock {lock_key}: {e}", LogCategory.SYSTEM)
+
+            if not wait:
+                # El resultado pudo publicarse entre la lectura inicial y el intento de lock
+                found, value = self._get_result(client, key)
+                if found:
+                    return value
+                raise SingleFlightBusy(f"Trabajo {self.namespace}:{key} en curso en otro worker")
+
+            if not waited:
+                LogService.info(None, "single_flight_waiting", f"Trabajo {self.namespace}:{key} en curso en otro worker, esperando su resultado.", LogCategory.WORKER)
+                waited = True
+
+            found, value = self._get_result(client, key)
+            if found:
+                return value
+            if time.time() >= deadline:
+                raise SingleFlightTimeout(f"Tiempo de espera agotado para {self.namespace}:{key}")
+            time.sleep(self.poll_interval)
+
+    def forget(self, key: str) -> None:
+        """Descarta el resultado publicado para que la próxima llamada vuelva a ejecutar el trabajo."""
+        try:
+            get_redis().delete(self._result_key(key))
+        except redis.RedisError as e:
+            LogService.warning(None, "single_flight_forget_failed", f"No se pudo descartar el resultado de {self.namespace}:{key}: {e}", LogCategory.SYSTEM)
+
+    def forget_many(self, keys: list[str]) -> None:
+        """Como forget, para varias claves en un solo DEL."""
+        if not keys:
+            return
+        try:
+            get_redis().delete(*[self._result_key(key) for key in keys])
+        except redis.RedisError as e:
+            LogService.warning(None, "single_flight_forget_failed", f"No se pudieron descartar {len(keys)} resultados de {self.namespace}: {e}", LogCategory.SYSTEM)
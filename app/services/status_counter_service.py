@@ -0,0 +1,212 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.mysql import insert
+from app.core.config import Config
+from app.core.extensions import db
+from app.models.invoice import Invoice
+from app.models.invoice_status_daily import InvoiceStatusDaily, InvoiceStatusHourly, NO_COMPANY
+from app.services.log_service import LogService, LogCategory
+
+_listeners_registered = False
+
+def _hour(created_at: datetime) -> datetime:
+    return created_at.replace(minute=0, second=0, microsecond=0)
+
+def _hourly_cutoff() -> datetime:
+    """Primera hora con contadores por hora; los cambios de facturas más antiguas solo afectan al diario."""
+    return _hour(datetime.utcnow()) - timedelta(days=Config.STATUS_HOURLY_RETENTION_DAYS)
+
+def _previous(history, current):
+    """Valor anterior de un atributo en el flush (el actual si no cambió)."""
+    if history.deleted:
+        return history.deleted[0]
+    return current if not history.added else None
+
+def _collect_changes(session) -> Counter:
+    """Cambios de facturas pendientes en el flush actual, como {(created_at, estado, company_id): delta}."""
+    changes = Counter()
+    for obj in session.new:
+        if isinstance(obj, Invoice) and obj.status and obj.created_at:
+            changes[(obj.created_at, obj.status, obj.company_id or NO_COMPANY)] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Invoice) or not obj.created_at:
+            continue
+        state = inspect(obj).attrs
+        status_history = state.status.history
+        company_history = state.company_id.history
+        if not status_history.added and not company_history.added:
+            continue
+        old_status = _previous(status_history, obj.status)
+        old_company = _previous(company_history, obj.company_id)
+        old_key = (obj.created_at, old_status, old_company or NO_COMPANY)
+        new_key = (obj.created_at, obj.status, obj.company_id or NO_COMPANY)
+        if old_key == new_key:
+            continue
+        if obj.status:
+            changes[new_key] += 1
+        # Si el estado anterior no estaba cargado no se puede descontar: lo corrige la reconciliación
+        if old_status:
+            changes[old_key] -= 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Invoice) and obj.created_at:
+            state = inspect(obj).attrs
+            status = _previous(state.status.history, obj.status)
+            company_id = _previous(state.company_id.history, obj.company_id)
+            if status:
+                changes[(obj.created_at, status, company_id or NO_COMPANY)] -= 1
+
+    return changes
+
+def _after_flush(session, flush_context):
+    changes = _collect_changes(session)
+    if changes:
+        StatusCounterService.record_changes(changes, session.connection())
+
+def _apply_rows(model, bucket_column: str, deltas: dict, connection):
+    rows = [
+        {bucket_column: bucket, "status": status, "company_id": company_id, "total": delta}
+        for (bucket, status, company_id), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+    table = model.__table__
+    statement = insert(table).values(rows)
+    statement = statement.on_duplicate_key_update(total=table.c.total + statement.inserted.total)
+    connection.execute(statement)
+
+class StatusCounterService:
+    """
+    Rollups de facturas por (día, estado, empresa) en invoice_status_daily y por hora en invoice_status_hourly.
+    Un listener after_flush de la sesión aplica los cambios de estado de cualquier Invoice en la misma transacción
+    (db_session_context_with_event, confirm/reject/retry); las escrituras masivas que no pasan por el flush del ORM
+    deben llamar a record_changes o apply_deltas. reconcile() corrige cualquier desvío y sirve de backfill del histórico.
+    """
+
+    @staticmethod
+    def register_listeners():
+        """Registra el listener de la sesión (una vez por proceso)."""
+        global _listeners_registered
+        if _listeners_registered:
+            return
+        event.listen(db.session, "after_flush", _after_flush)
+        _listeners_registered = True
+
+    @staticmethod
+    def record_changes(changes: dict, connection=None):
+        """
+        Aplica cambios de facturas {(created_at, estado, company_id): delta} a los rollups diario y por hora.
+        Lo usa el listener y cualquier escritura que no pasa por el flush del ORM (inserciones masivas).
+        """
+        daily = Counter()
+        hourly = Counter()
+        cutoff = _hourly_cutoff()
+        for (created_at, status, company_id), delta in changes.items():
+            daily[(created_at.date(), status, company_id or NO_COMPANY)] += delta
+            if created_at >= cutoff:
+                hourly[(_hour(created_at), status, company_id or NO_COMPANY)] += delta
+        connection = connection or db.session.connection()
+        StatusCounterService.apply_deltas(daily, connection)
+        StatusCounterService.apply_deltas(hourly, connection, hourly=True)
+
+    @staticmethod
+    def apply_deltas(deltas: dict, connection=None, hourly: bool = False):
+        """
+        Suma los deltas {(día u hora, estado, company_id): n} con INSERT ... ON DUPLICATE KEY UPDATE (atómico por fila).
+        Usa la conexión indicada para quedar dentro de la transacción que produjo los cambios.
+        """
+        connection = connection or db.session.connection()
+        if hourly:
+            _apply_rows(InvoiceStatusHourly, "hour", deltas, connection)
+        else:
+            _apply_rows(InvoiceStatusDaily, "day", deltas, connection)
+
+    @staticmethod
+    def summary(start_date: date | None = None, end_date: date | None = None, company_id: int | None = None) -> dict:
+        """Total de facturas por estado, creadas entre start_date y end_date (inclusive)."""
+        query = db.session.query(InvoiceStatusDaily.status, func.sum(InvoiceStatusDaily.total).label('total'))
+        if start_date:
+            query = query.filter(InvoiceStatusDaily.day >= start_date)
+        if end_date:
+            query = query.filter(InvoiceStatusDaily.day <= end_date)
+        if company_id is not None:
+            query = query.filter(InvoiceStatusDaily.company_id == company_id)
+        results = query.group_by(InvoiceStatusDaily.status).all()
+        return {r.status: int(r.total) for r in results if r.total}
+
+    @staticmethod
+    def series(status: str, start: date | datetime, end: date | datetime, hourly: bool = False,
+               company_id: int | None = None, by_company: bool = False) -> dict:
+        """
+        Facturas con el estado indicado por día (o por hora) de creación.
+
+        Returns:
+            {bucket: total}, o {bucket: {company_id: total}} si by_company.
+        """
+        model = InvoiceStatusHourly if hourly else InvoiceStatusDaily
+        bucket = model.hour if hourly else model.day
+        columns = [bucket.label('bucket'), func.sum(model.total).label('total')]
+        if by_company:
+            columns.insert(1, model.company_id)
+        query = db.session.query(*columns).filter(model.status == status, bucket >= start, bucket <= end)
+        if company_id is not None:
+            query = query.filter(model.company_id == company_id)
+        query = query.group_by(bucket, model.company_id) if by_company else query.group_by(bucket)
+
+        series = {}
+        for row in query.all():
+            if by_company:
+                series.setdefault(row.bucket, {})[row.company_id or None] = int(row.total)
+            else:
+                series[row.bucket] = int(row.total)
+        return series
+
+    @staticmethod
+    def _reconcile_table(model, bucket_column, bucket_expression, since: datetime | None = None) -> int:
+        """Compara un rollup con el conteo real desde invoices y aplica la diferencia como delta."""
+        filters = [Invoice.created_at.isnot(None)]
+        if since is not None:
+            filters.append(Invoice.created_at >= since)
+        company = func.coalesce(Invoice.company_id, NO_COMPANY)
+        actual = {
+            (row.bucket, row.status, row.company_id): row.total
+            for row in db.session.execute(
+                select(bucket_expression.label('bucket'), Invoice.status, company.label('company_id'), func.count(Invoice.id).label('total'))
+                .where(*filters)
+                .group_by(bucket_expression, Invoice.status, company)
+            )
+        }
+        stored_query = model.query
+        if since is not None:
+            stored_query = stored_query.filter(bucket_column >= since)
+        stored = {(getattr(row, bucket_column.key), row.status, row.company_id): row.total for row in stored_query.all()}
+
+        # Delta relativo (no un valor absoluto): no pisa incrementos concurrentes aplicados tras la lectura
+        deltas = {key: actual.get(key, 0) - stored.get(key, 0) for key in actual.keys() | stored.keys()}
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if deltas:
+            StatusCounterService.apply_deltas(deltas, hourly=model is InvoiceStatusHourly)
+        return len(deltas)
+
+    @staticmethod
+    def reconcile() -> int:
+        """
+        Recalcula los rollups desde invoices, corrige las filas que difieren y descarta las horas vencidas.
+        Con las tablas vacías equivale a un backfill completo del histórico.
+
+        Returns:
+            Cantidad de filas corregidas.
+        """
+        cutoff = _hourly_cutoff()
+        corrected = StatusCounterService._reconcile_table(InvoiceStatusDaily, InvoiceStatusDaily.day, func.date(Invoice.created_at))
+        hour_expression = func.str_to_date(func.date_format(Invoice.created_at, '%Y-%m-%d %H:00:00'), '%Y-%m-%d %H:%i:%s')
+        corrected += StatusCounterService._reconcile_table(InvoiceStatusHourly, InvoiceStatusHourly.hour, hour_expression, since=cutoff)
+
+        InvoiceStatusDaily.query.filter(InvoiceStatusDaily.total == 0).delete(synchronize_session=False)
+        InvoiceStatusHourly.query.filter((InvoiceStatusHourly.total == 0) | (InvoiceStatusHourly.hour < cutoff)).delete(synchronize_session=False)
+        db.session.commit()
+        if corrected:
+            LogService.warning(None, "status_counters_drift", f"Contadores de estado corregidos: {corrected} filas", LogCategory.DATABASE)
+        return corrected
@@ -0,0 +1,439 @@
+import hashlib
+import os
+import shutil
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from celery import group
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+from app.core.config import Config
+from app.core.extensions import db, socketio
+from app.models.invoice import Invoice
+from app.models.invoice_search_index import InvoiceSearchIndex
+from app.models.invoice_status_daily import NO_COMPANY
+from app.models.upload_session import UploadSession, UploadSessionFile, UploadSessionStatus, UploadFileStatus
+from app.services.log_service import LogService, LogCategory
+from app.services.status_counter_service import StatusCounterService
+from app.utils.file_storage import ALLOWED_MIME_TYPES, copy_stream, hash_file, sniff_content_type, store_file, stored_path
+
+# Bytes necesarios para reconocer el tipo de archivo (la firma más larga es la de PNG)
+SNIFF_BYTES = 8
+
+# SHA-256 en curso por archivo, con el offset hasta el que cubre: evita releer el parcial en cada fragmento.
+# Es por proceso; si el fragmento anterior lo recibió otro proceso se recalcula desde el disco.
+_hashers: dict[int, tuple[int, object]] = {}
+
+class UploadOffsetMismatch(Exception):
+    """El fragmento no empieza donde terminó lo ya recibido; el cliente debe reanudar desde expected_offset."""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f"El fragmento debe empezar en el offset {expected_offset}")
+        self.expected_offset = expected_offset
+
+class UploadService:
+    """
+    Registro de archivos subidos como facturas.
+    - register_files: lotes ya guardados (multipart, ZIP) con operaciones masivas.
+    - Subida reanudable por fragmentos: init declara los archivos, cada fragmento se agrega al parcial
+      (detectando el tipo por los primeros bytes y calculando el SHA-256 mientras se escribe) y cada archivo
+      se registra como factura y se encola apenas recibe su último byte, sin esperar al resto del lote.
+    """
+
+    @staticmethod
+    def create_session(files: list[dict], company_id: int | None = None) -> UploadSession:
+        """
+        Crea la sesión con los archivos declarados ({"filename", "size"}).
+
+        Raises:
+            ValueError: Si la lista de archivos no es válida.
+        """
+        if not files:
+            raise ValueError("Se debe declarar al menos un archivo.")
+        if len(files) > Config.UPLOAD_MAX_FILES:
+            raise ValueError(f"Se permiten como máximo {Config.UPLOAD_MAX_FILES} archivos por sesión.")
+
+        upload = UploadSession(id=uuid.uuid4().hex, company_id=company_id, status=UploadSessionStatus.OPEN)
+        for declared in files:
+            filename = secure_filename(str((declared or {}).get("filename") or ""))
+            size = (declared or {}).get("size")
+            if not filename:
+                raise ValueError("Cada archivo debe tener un 'filename' válido.")
+            if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+                raise ValueError(f"El 'size' de '{filename}' debe ser un entero positivo.")
+            if size > Config.UPLOAD_MAX_FILE_SIZE:
+                raise ValueError(f"'{filename}' supera el tamaño máximo de {Config.UPLOAD_MAX_FILE_SIZE} bytes.")
+            upload.files.append(UploadSessionFile(filename=filename, size=size, received=0, status=UploadFileStatus.PENDING))
+
+        db.session.add(upload)
+        db.session.commit()
+        return upload
+
+    @staticmethod
+    def get_session(upload_id: str) -> UploadSession | None:
+        return db.session.get(UploadSession, upload_id)
+
+    @staticmethod
+    def session_dir(upload_id: str) -> str:
+        return os.path.join(Config.UPLOAD_PARTIAL_DIR, upload_id)
+
+    @staticmethod
+    def partial_path(upload_file: UploadSessionFile) -> str:
+        return os.path.join(UploadService.session_dir(upload_file.session_id), f"{upload_file.id}.part")
+
+    @staticmethod
+    def _hasher(upload_file: UploadSessionFile, path: str):
+        cached = _hashers.get(upload_file.id)
+        if cached is not None and cached[0] == upload_file.received:
+            return cached[1]
+        return hash_file(path) if upload_file.received else hashlib.sha256()
+
+    @staticmethod
+    def write_chunk(upload_id: str, file_id: int, offset: int, stream, length: int) -> dict | None:
+        """
+        Agrega un fragmento al archivo. Con el último byte registra la factura y encola su procesamiento.
+
+        Returns:
+            Estado del archivo (to_dict), o None si la sesión o el archivo no existen.
+
+        Raises:
+            UploadOffsetMismatch: Si offset no coincide con lo ya recibido.
+            ValueError: Si la sesión está cerrada, el archivo terminado o el fragmento excede el tamaño declarado.
+        """
+        # Import diferido: invoice_tasks importa servicios
+        from app.tasks.invoice_tasks import db_session_context_with_event
+
+        created = None
+        with db_session_context_with_event() as session:
+            # Lock de la fila: dos fragmentos del mismo archivo no se escriben a la vez
+            upload_file = (
+                session.query(UploadSessionFile)
+                .filter_by(id=file_id, session_id=upload_id)
+                .with_for_update()
+                .first()
+            )
+            if upload_file is None:
+                return None
+            upload = upload_file.session
+            if upload.status != UploadSessionStatus.OPEN:
+                raise ValueError("La sesión de subida ya no acepta fragmentos.")
+            if upload_file.status not in (UploadFileStatus.PENDING, UploadFileStatus.UPLOADING):
+                raise ValueError("El archivo ya fue recibido por completo.")
+            if offset != upload_file.received:
+                raise UploadOffsetMismatch(upload_file.received)
+            if offset + length > upload_file.size:
+                raise ValueError(f"El fragmento excede el tamaño declarado ({upload_file.size} bytes).")
+
+            path = UploadService.partial_path(upload_file)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if upload_file.received:
+                # Descarta bytes escritos por un fragmento que falló antes de registrar su offset
+                os.truncate(path, upload_file.received)
+            hasher = UploadService._hasher(upload_file, path)
+
+            with open(path, "ab" if upload_file.received else "wb") as target:
+                copied = 0
+                if offset == 0:
+                    head = stream.read(min(SNIFF_BYTES, length))
+                    content_type = sniff_content_type(head)
+                    if content_type not in ALLOWED_MIME_TYPES:
+                        upload_file.status = UploadFileStatus.ERROR
+                        upload_file.message = f"Tipo de archivo no permitido. Permitidos: {', '.join(ALLOWED_MIME_TYPES)}"
+                        target.close()
+                        os.remove(path)
+                        return upload_file.to_dict()
+                    upload_file.content_type = content_type
+                    hasher.update(head)
+                    target.write(head)
+                    copied = len(head)
+                # Un cuerpo más corto (conexión cortada) deja el archivo listo para reanudar desde lo recibido
+                copied += copy_stream(stream, target, hasher, limit=length - copied)
+
+            upload_file.received += copied
+            upload_file.status = UploadFileStatus.UPLOADING
+            upload.updated_at = datetime.utcnow()
+            _hashers[upload_file.id] = (upload_file.received, hasher)
+
+            if upload_file.received == upload_file.size:
+                _hashers.pop(upload_file.id, None)
+                upload_file.content_hash = hasher.hexdigest()
+                upload_dir = os.path.join(Config.UPLOAD_FOLDER, datetime.utcnow().strftime("%Y-%m-%d"))
+                created = UploadService._register_invoice(session, upload_file, upload.company_id, upload_dir)
+                content_hash = upload_file.content_hash
+                filename = upload_file.filename
+            result = upload_file.to_dict()
+
+        if created is None:
+            return result
+
+        # El parcial se mueve recién con el registro confirmado: si el flush o el commit fallan sigue en su lugar
+        # y el cliente puede reenviar el último fragmento
+        if created["status"] == "duplicated":
+            # La factura apunta al archivo del original
+            os.remove(path)
+        else:
+            store_file(path, upload_dir, filename, content_hash)
+            # Encolar después del commit y del movimiento: la tarea siempre encuentra la factura y su archivo
+            from app.tasks.invoice_tasks import process_invoice_task
+            process_invoice_task.delay(created["id"])
+
+        try:
+            socketio.emit('invoices_created', {"invoices": [created]}, namespace='/invoices')
+        except Exception as socket_err:
+            # El registro ya está confirmado: un fallo al notificar no lo revierte
+            print(f"Error al emitir evento SocketIO: {socket_err}")
+        return result
+
+    @staticmethod
+    def _register_invoice(session, upload_file: UploadSessionFile, company_id: int | None, upload_dir: str) -> dict:
+        """
+        Crea la factura del archivo completo (o la marca como duplicada por hash) con su ruta definitiva en upload_dir.
+        No mueve el parcial: write_chunk lo hace después del commit.
+
+        Returns:
+            La factura creada, con la forma de los ítems de invoices_created.
+        """
+        filepath = stored_path(upload_dir, upload_file.filename, upload_file.content_hash)
+
+        invoice = None
+        original = session.query(Invoice.id, Invoice.file_path).filter(Invoice.content_hash == upload_file.content_hash).first()
+        if original is None:
+            invoice = Invoice(
+                filename=upload_file.filename,
+                file_path=filepath,
+                content_hash=upload_file.content_hash,
+                status="pending_processing",
+                company_id=company_id
+            )
+            try:
+                # Savepoint: si otra subida registró el mismo contenido en paralelo, el índice único lo rechaza
+                with session.begin_nested():
+                    session.add(invoice)
+                    session.flush()
+            except IntegrityError:
+                invoice = None
+                original = session.query(Invoice.id, Invoice.file_path).filter(Invoice.content_hash == upload_file.content_hash).first()
+
+        if invoice is not None:
+            session.add(InvoiceSearchIndex(invoice_id=invoice.id, filename=invoice.filename))
+            upload_file.invoice_id = invoice.id
+            upload_file.status = UploadFileStatus.COMPLETED
+            upload_file.message = "La factura está siendo procesada automáticamente"
+            return {"id": invoice.id, "status": invoice.status, "filename": invoice.filename, "company_id": company_id}
+
+        duplicate = Invoice(
+            filename=upload_file.filename,
+            file_path=original.file_path,
+            status="duplicated",
+            company_id=company_id,
+            duplicate_of_id=original.id
+        )
+        session.add(duplicate)
+        session.flush()
+        session.add(InvoiceSearchIndex(invoice_id=duplicate.id, filename=duplicate.filename))
+        upload_file.invoice_id = duplicate.id
+        upload_file.status = UploadFileStatus.DUPLICATED
+        upload_file.message = f"Factura ya fue procesada anteriormente (mismo contenido que la factura {original.id})."
+        return {
+            "id": duplicate.id, "status": duplicate.status, "filename": duplicate.filename,
+            "company_id": company_id, "duplicate_of": original.id
+        }
+
+    @staticmethod
+    def _classify(files: list[dict], company_id: int | None, created_at: datetime):
+        """
+        Separa el lote en facturas nuevas y duplicadas con una sola consulta IN por hash.
+
+        Returns:
+            (nuevas [(fila, resultado)], duplicadas [(fila, hash, archivo subido, resultado)], resultados en orden).
+            El original de un duplicado dentro del mismo lote se resuelve después de insertar las nuevas.
+        """
+        hashes = {entry["content_hash"] for entry in files}
+        existing_by_hash = {
+            row.content_hash: row
+            for row in db.session.query(Invoice.id, Invoice.content_hash, Invoice.file_path).filter(Invoice.content_hash.in_(hashes))
+        } if hashes else {}
+
+        new_rows, duplicate_rows, results = [], [], []
+        batch_paths = {}
+        for entry in files:
+            content_hash = entry["content_hash"]
+            original = existing_by_hash.get(content_hash)
+            if original is not None or content_hash in batch_paths:
+                # Mismo contenido ya subido (antes o en este lote): reutiliza el archivo y no se procesa de nuevo
+                row = {
+                    "filename": entry["filename"],
+                    "file_path": original.file_path if original is not None else batch_paths[content_hash],
+                    "status": "duplicated",
+                    "company_id": company_id,
+                    "duplicate_of_id": original.id if original is not None else None,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+                result = {
+                    "invoice_id": None,
+                    "filename": entry["filename"],
+                    "status": "duplicated",
+                    "duplicate_of": row["duplicate_of_id"],
+                    "message": "Factura ya fue procesada anteriormente (mismo contenido)."
+                }
+                duplicate_rows.append((row, content_hash, entry["filepath"], result))
+            else:
+                batch_paths[content_hash] = entry["filepath"]
+                row = {
+                    "filename": entry["filename"],
+                    "file_path": entry["filepath"],
+                    "content_hash": content_hash,
+                    "status": "pending_processing",
+                    "company_id": company_id,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+                result = {
+                    "invoice_id": None,
+                    "filename": entry["filename"],
+                    "company_id": company_id,
+                    "status": "processing",
+                    "message": "La factura está siendo procesada automáticamente"
+                }
+                new_rows.append((row, result))
+            results.append(result)
+        return new_rows, duplicate_rows, results
+
+    @staticmethod
+    def _bulk_insert(rows: list[dict]) -> list[int]:
+        """INSERT multi-fila con RETURNING (MariaDB 10.5+); devuelve los IDs en el orden de las filas."""
+        if not rows:
+            return []
+        statement = insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True)
+        return list(db.session.scalars(statement, rows))
+
+    @staticmethod
+    def _index_filenames(rows, created_at: datetime):
+        """
+        Documento de búsqueda inicial (solo el nombre de archivo) de las facturas recién insertadas, para que
+        el listado las encuentre por nombre desde que se suben, incluidas las pendientes y las duplicadas.
+        SearchService.index_invoice lo completa con el OCR y los campos al terminar el procesamiento.
+        """
+        entries = [{"invoice_id": invoice_id, "filename": row["filename"], "updated_at": created_at} for invoice_id, row in rows]
+        if entries:
+            db.session.execute(insert(InvoiceSearchIndex), entries)
+
+    @staticmethod
+    def register_files(files: list[dict], company_id: int | None = None) -> list[dict]:
+        """
+        Registra un lote de archivos ya guardados ({"filename", "filepath", "content_hash"}) con una cantidad
+        constante de idas a la base y al broker: una consulta IN de duplicados, un INSERT multi-fila para las nuevas
+        (y otro para las duplicadas), un commit, un grupo de Celery publicado con una conexión del pool
+        y un único evento Socket.IO con todas las facturas creadas.
+
+        Returns:
+            Un resultado por archivo, en el mismo orden.
+        """
+        if not files:
+            return []
+
+        created_at = datetime.utcnow()
+        for attempt in range(2):
+            new_rows, duplicate_rows, results = UploadService._classify(files, company_id, created_at)
+            try:
+                new_ids = UploadService._bulk_insert([row for row, _ in new_rows])
+                ids_by_hash = {row["content_hash"]: invoice_id for (row, _), invoice_id in zip(new_rows, new_ids)}
+                for row, content_hash, _, _ in duplicate_rows:
+                    row["duplicate_of_id"] = row["duplicate_of_id"] or ids_by_hash[content_hash]
+                duplicate_ids = UploadService._bulk_insert([row for row, _, _, _ in duplicate_rows])
+                UploadService._index_filenames(
+                    zip(new_ids + duplicate_ids, [row for row, _ in new_rows] + [row for row, _, _, _ in duplicate_rows]),
+                    created_at
+                )
+
+                # El INSERT masivo no pasa por el flush del ORM: los contadores por estado se actualizan aquí
+                changes = Counter()
+                for row in [row for row, _ in new_rows] + [row for row, _, _, _ in duplicate_rows]:
+                    changes[(created_at, row["status"], company_id or NO_COMPANY)] += 1
+                StatusCounterService.record_changes(changes)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Otra subida registró el mismo contenido en paralelo: se vuelve a clasificar con ese hash ya guardado
+                db.session.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+
+        created = []
+        for (row, result), invoice_id in zip(new_rows, new_ids):
+            result["invoice_id"] = invoice_id
+            created.append({"id": invoice_id, "status": row["status"], "filename": row["filename"], "company_id": company_id})
+        for (row, _, uploaded_path, result), invoice_id in zip(duplicate_rows, duplicate_ids):
+            result["invoice_id"] = invoice_id
+            result["duplicate_of"] = row["duplicate_of_id"]
+            created.append({
+                "id": invoice_id, "status": row["status"], "filename": row["filename"],
+                "company_id": company_id, "duplicate_of": row["duplicate_of_id"]
+            })
+            # La copia subida no se conserva: la factura apunta al archivo del original
+            if uploaded_path != row["file_path"] and os.path.exists(uploaded_path):
+                os.remove(uploaded_path)
+
+        # Encolar después del commit, en un solo envío al broker con una conexión del pool
+        if new_ids:
+            from app.core.celery_app import celery
+            from app.tasks.invoice_tasks import process_invoice_task
+            with celery.producer_or_acquire() as producer:
+                group(process_invoice_task.s(invoice_id) for invoice_id in new_ids).apply_async(producer=producer)
+
+        try:
+            socketio.emit('invoices_created', {"invoices": created}, namespace='/invoices')
+        except Exception as socket_err:
+            # El registro ya está confirmado: un fallo al notificar no lo revierte
+            print(f"Error al emitir evento SocketIO: {socket_err}")
+        return results
+
+    @staticmethod
+    def incomplete_files(upload: UploadSession) -> list[UploadSessionFile]:
+        return [file for file in upload.files if file.status in (UploadFileStatus.PENDING, UploadFileStatus.UPLOADING)]
+
+    @staticmethod
+    def complete(upload: UploadSession) -> UploadSession:
+        """Cierra la sesión: los archivos sin terminar se descartan y quedan con estado error."""
+        for upload_file in UploadService.incomplete_files(upload):
+            _hashers.pop(upload_file.id, None)
+            upload_file.status = UploadFileStatus.ERROR
+            upload_file.message = f"Subida incompleta: {upload_file.received} de {upload_file.size} bytes."
+        upload.status = UploadSessionStatus.COMPLETED
+        db.session.commit()
+        shutil.rmtree(UploadService.session_dir(upload.id), ignore_errors=True)
+        return upload
+
+    @staticmethod
+    def cleanup_sessions(ttl_hours: int | None = None) -> int:
+        """
+        Expira las sesiones abiertas sin actividad durante ttl_hours (borrando sus parciales)
+        y elimina los registros de las sesiones cerradas más antiguas que ese plazo.
+
+        Returns:
+            Cantidad de sesiones abiertas expiradas.
+        """
+        ttl_hours = Config.UPLOAD_SESSION_TTL_HOURS if ttl_hours is None else ttl_hours
+        cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+
+        expired = UploadSession.query.filter(UploadSession.status == UploadSessionStatus.OPEN, UploadSession.updated_at < cutoff).all()
+        for upload in expired:
+            for upload_file in UploadService.incomplete_files(upload):
+                upload_file.status = UploadFileStatus.ERROR
+                upload_file.message = "La sesión de subida expiró."
+            upload.status = UploadSessionStatus.EXPIRED
+            shutil.rmtree(UploadService.session_dir(upload.id), ignore_errors=True)
+
+        UploadSession.query.filter(
+            UploadSession.status != UploadSessionStatus.OPEN,
+            UploadSession.updated_at < cutoff - timedelta(hours=ttl_hours)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        if expired:
+            LogService.info(None, "upload_sessions_expired", f"Sesiones de subida expiradas: {len(expired)}", LogCategory.SYSTEM)
+        return len(expired)
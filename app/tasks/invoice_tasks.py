@@ -1,4 +1,5 @@
 from app.core.celery_app import celery
+from app.core.config import Config
 from app.core.extensions import db, socketio
 from app.models.invoice import Invoice
 from app.models.invoice_log import InvoiceLog
@@ -6,20 +7,32 @@ from app.models.company_prompt import CompanyPrompt
 from app.services.openai_service import OpenAIService
 from app.services.ocr_service import OCRService
 from app.services.company_service import CompanyService
+from app.services.checkpoint_service import CheckpointService
+from app.services.single_flight_service import SingleFlightService, SingleFlightBusy
+from app.services.progress_service import ProgressReporter, ProgressStage
+from app.models.invoice_checkpoint import CheckpointStage
+from app.services.resource_monitor_service import ResourceMonitor
+from app.services.log_service import LogService, LogCategory
+from app.services.search_service import SearchService
+from app.services.near_duplicate_service import NearDuplicateService
+from celery.signals import worker_process_init, worker_process_shutdown, task_postrun
 import time
 import contextlib
 import os
-import psutil
-import gc
-
-# Monitoreo sencillo de recursos
-def get_resource_usage():
-    process = psutil.Process(os.getpid())
-    mem_info = process.memory_info()
-    return {
-        "memory_mb": mem_info.rss / 1024 / 1024,
-        "cpu_percent": process.cpu_percent(interval=0.1)
-    }
+
+# Un sampler de recursos en segundo plano por proceso worker (se inicia tras el fork)
+@worker_process_init.connect
+def start_resource_monitor(**kwargs):
+    ResourceMonitor.instance().start()
+
+# Los logs se escriben en lotes: garantizar que lo encolado por una tarea llegue a la BD al terminarla
+@task_postrun.connect
+def flush_task_logs(**kwargs):
+    LogService.flush()
+
+@worker_process_shutdown.connect
+def flush_logs_on_shutdown(**kwargs):
+    LogService.flush(timeout=5.0)
 
 # Context manager para administrar sesiones de base de datos y emitir eventos
 @contextlib.contextmanager
@@ -83,21 +96,42 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
     - Control de recursos con rate_limit
     - Reintentos automáticos con backoff
     - Manejo optimizado de sesiones de base de datos
-    - Monitoreo de uso de recursos
+    - Monitoreo de recursos con un sampler en segundo plano (delta por tarea en el log de fin de procesamiento)
     - Caché para reducir procesamiento repetido
+    - Checkpoints por etapa (OCR, extracción, resumen): los reintentos retoman desde la primera etapa incompleta
+    - Single-flight por factura (una ejecución duplicada se descarta sin ocupar el worker) y por contenido
+      (OCR, extracción y resumen compartidos entre facturas con el mismo archivo)
     - Liberación explícita de memoria
     - Emisión de eventos SocketIO en cambios de estado
     """
+    # Un doble reintento o una re-entrega de Celery (task_acks_late) no procesa dos veces la misma factura.
+    # Si la factura ya se está procesando no se espera: bloquearía uno de los pocos slots del worker hasta el
+    # soft time limit. Si esa ejecución muere, acks_late vuelve a entregar su mensaje.
+    try:
+        return SingleFlightService("invoice").do(
+            str(invoice_id),
+            lambda: _process_invoice(invoice_id, rejection_reason),
+            wait=False
+        )
+    except SingleFlightBusy:
+        LogService.info(invoice_id, "duplicate_task_skipped", "La factura ya se está procesando en otro worker; se descarta la ejecución duplicada.", LogCategory.WORKER)
+        return {"status": "skipped", "message": "Factura en procesamiento en otro worker"}
+
+def _process_invoice(invoice_id, rejection_reason: str | None = None):
+    """Pipeline completo de una factura (OCR, extracción, resumen y actualización de la BD)."""
     from app import create_app
     app = create_app()
 
     task_start_time = time.time()
     print(f"Iniciando procesamiento de factura ID: {invoice_id}")
     
-    initial_resources = get_resource_usage()
-    print(f"Recursos iniciales: {initial_resources}")
+    # Snapshot barato (sin dormir ni recorrer hijos); el detalle lo aporta el sampler de fondo
+    resource_monitor = ResourceMonitor.instance()
+    resource_monitor.start()
+    initial_resources = resource_monitor.snapshot()
     
     file_path = None
+    content_hash = None
     company_id_for_prompt = None
     
     with app.app_context():
@@ -110,6 +144,7 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
                     return {"status": "error", "message": "Factura no encontrada"}
                 
                 file_path = invoice.file_path
+                content_hash = invoice.content_hash
                 company_id_for_prompt = invoice.company_id
                 
                 invoice.status = "processing"
@@ -118,11 +153,36 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
             if not file_path or not os.path.exists(file_path):
                 raise FileNotFoundError(f"No se encontró el archivo en la ruta: {file_path}")
 
-            # 1. OCR
-            ocr_start_time = time.time()
+            # Fingerprint del archivo: los checkpoints solo se invalidan si cambia el archivo o el prompt
+            # (el SHA-256 calculado al subir el archivo, si existe, evita volver a leerlo)
+            file_fingerprint = content_hash or CheckpointService.file_fingerprint(file_path)
+
+            progress = ProgressReporter(invoice_id)
+
+            # 1. OCR (se reutiliza el checkpoint si el archivo no cambió)
+            progress.start_stage(ProgressStage.OCR)
             ocr_service = OCRService(cache_enabled=True)
-            raw_text = ocr_service.extract_text_from_pdf(file_path)
-            ocr_time = time.time() - ocr_start_time
+            ocr_fingerprint = CheckpointService.fingerprint(file_fingerprint, ocr_service.lang)
+            raw_text = CheckpointService.load(invoice_id, CheckpointStage.OCR, ocr_fingerprint)
+
+            if raw_text is None:
+                ocr_start_time = time.time()
+                # Mismo contenido subido dos veces: un solo OCR compartido entre workers.
+                # Un texto vacío no se publica: los reintentos (automáticos o manuales) deben repetir el OCR
+                raw_text = SingleFlightService("ocr").do(
+                    ocr_fingerprint,
+                    lambda: ocr_service.extract_text_from_pdf(file_path, invoice_id=invoice_id, progress_callback=progress.page_callback()),
+                    should_cache=lambda text: bool(text and text.strip())
+                )
+                ocr_time = time.time() - ocr_start_time
+
+                # Un texto vacío no se guarda: el reintento debe volver a intentar el OCR
+                if raw_text and raw_text.strip():
+                    CheckpointService.save(invoice_id, CheckpointStage.OCR, ocr_fingerprint, raw_text)
+                ocr_details = f"OCR completado en {ocr_time:.2f} segundos."
+            else:
+                ocr_details = "OCR reutilizado desde checkpoint."
+            progress.end_stage(ProgressStage.OCR)
 
             with db_session_context_with_event() as session:
                 invoice = session.query(Invoice).filter_by(id=invoice_id).first()
@@ -131,11 +191,55 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
                 session.add(InvoiceLog(
                     invoice_id=invoice_id,
                     event="ocr_extracted", 
-                    details=f"OCR completado en {ocr_time:.2f} segundos."
+                    details=ocr_details
                 ))
 
             if not raw_text or raw_text.strip() == "":
                 raise ValueError("El texto extraído por OCR está vacío")
+
+            # Casi duplicados: firma MinHash del texto OCR y búsqueda de candidatas por LSH antes de llamar a OpenAI
+            near_duplicate = None
+            reused_extraction = None
+            signature = NearDuplicateService.signature(raw_text)
+            if signature is not None:
+                NearDuplicateService.index(invoice_id, signature)
+                db.session.commit()
+                near_duplicate = NearDuplicateService.find_similar(invoice_id, signature)
+
+            original = db.session.get(Invoice, near_duplicate[0]) if near_duplicate else None
+            if original is None:
+                # La candidata pudo eliminarse entre la búsqueda y la lectura
+                near_duplicate = None
+
+            if near_duplicate:
+                original_id, similarity = near_duplicate
+                # Solo extracciones vigentes: la confirmada de una procesada o la pendiente de revisión, nunca una rechazada
+                if original.status == "processed":
+                    original_data = original.final_data
+                elif original.status == "waiting_validation":
+                    original_data = original.preview_data
+                else:
+                    original_data = None
+                # Solo se reutiliza si la extracción usaría el mismo prompt, no es un reintento tras rechazo y el número
+                # y el importe de la original figuran en este texto (misma plantilla no implica misma factura)
+                if (Config.NEAR_DUPLICATE_REUSE_EXTRACTION and not rejection_reason
+                        and original.company_id == company_id_for_prompt and original_data and original.agent_response
+                        and NearDuplicateService.key_fields_match(original_data, raw_text)):
+                    reused_extraction = (original_data, original.agent_response)
+                with db_session_context_with_event() as session:
+                    invoice = session.query(Invoice).filter_by(id=invoice_id).first()
+                    invoice.duplicate_of_id = original_id
+                    near_duplicate_log = InvoiceLog(
+                        invoice_id=invoice_id,
+                        event="near_duplicate_detected",
+                        details=f"Probable duplicado de la factura {original_id} (similitud {similarity:.2f})."
+                    )
+                    near_duplicate_log.extra = {
+                        "duplicate_of": original_id,
+                        "similarity": round(similarity, 3),
+                        "extraction_reused": reused_extraction is not None,
+                    }
+                    session.add(near_duplicate_log)
                 
             # --- Determinar qué prompt usar --- 
             target_prompt_path = None
@@ -152,22 +256,52 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
             # Si target_prompt_path sigue siendo None, OpenAIService usará su default
             # --- Fin determinación de prompt --- 
                 
-            # 2. OpenAI
+            # 2. OpenAI (extracción y resumen con checkpoints independientes)
             openai_start_time = time.time()
-            openai_service = OpenAIService(cache_enabled=True)
-            # Pasar el prompt_path encontrado (o None) y la razón de rechazo
-            structured_data, raw_response = openai_service.extract_structured_data_and_raw(
-                raw_text, 
-                invoice_id=invoice_id, # Aseguramos que el invoice_id se pasa aquí explícitamente
-                prompt_path=target_prompt_path, 
-                rejection_reason=rejection_reason
-            )
+            if reused_extraction is not None:
+                # Casi duplicado de una factura ya extraída: se reutiliza su resultado sin llamar a OpenAI
+                structured_data, raw_response = reused_extraction
+                progress.start_stage(ProgressStage.EXTRACTION, reused_from=near_duplicate[0])
+                progress.end_stage(ProgressStage.EXTRACTION)
+            else:
+                openai_service = OpenAIService(cache_enabled=True)
+
+                # La razón de rechazo forma parte de las entradas: un reintento tras rechazo vuelve a extraer
+                extraction_fingerprint = CheckpointService.fingerprint(
+                    file_fingerprint,
+                    openai_service.extract_prompt_fingerprint(target_prompt_path),
+                    rejection_reason
+                )
+                progress.start_stage(ProgressStage.EXTRACTION)
+                structured_data = CheckpointService.load(invoice_id, CheckpointStage.EXTRACTION, extraction_fingerprint)
+                if structured_data is None:
+                    structured_data = SingleFlightService("extraction").do(
+                        extraction_fingerprint,
+                        lambda: openai_service.extract_structured_data(
+                            raw_text,
+                            prompt_path=target_prompt_path,
+                            rejection_reason=rejection_reason,
+                            invoice_id=invoice_id
+                        )
+                    )
+                    CheckpointService.save(invoice_id, CheckpointStage.EXTRACTION, extraction_fingerprint, structured_data)
+                progress.end_stage(ProgressStage.EXTRACTION)
+
+                progress.start_stage(ProgressStage.SUMMARY)
+                summary_fingerprint = CheckpointService.fingerprint(file_fingerprint, openai_service.summary_prompt_fingerprint())
+                raw_response = CheckpointService.load(invoice_id, CheckpointStage.SUMMARY, summary_fingerprint)
+                if raw_response is None:
+                    raw_response = SingleFlightService("summary").do(
+                        summary_fingerprint,
+                        lambda: openai_service.summarize_invoice_text(raw_text, invoice_id=invoice_id)
+                    )
+                    CheckpointService.save(invoice_id, CheckpointStage.SUMMARY, summary_fingerprint, raw_response)
+                progress.end_stage(ProgressStage.SUMMARY)
+
             openai_time = time.time() - openai_start_time
             
-            del raw_text
-            gc.collect()
-            
             # 3. Actualizar base de datos
+            progress.start_stage(ProgressStage.SAVING)
             with db_session_context_with_event() as session:
                 invoice = session.query(Invoice).filter_by(id=invoice_id).first()
                 if not invoice:
@@ -178,12 +312,25 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
                 invoice.status = "waiting_validation"
                 
                 session.add(invoice)
-                session.add(InvoiceLog(
+                completed_log = InvoiceLog(
                     invoice_id=invoice_id,
                     event="processing_completed", 
-                    details=f"Datos extraídos en {openai_time:.2f} segundos."
-                ))
+                    details=(
+                        f"Datos reutilizados de la factura {near_duplicate[0]}." if reused_extraction is not None
+                        else f"Datos extraídos en {openai_time:.2f} segundos."
+                    )
+                )
+                completed_log.extra = {"resources": resource_monitor.task_delta(initial_resources, resource_monitor.snapshot())}
+                session.add(completed_log)
+
+            # Documento de búsqueda (texto OCR + datos extraídos)
+            invoice = db.session.get(Invoice, invoice_id)
+            if invoice:
+                SearchService.index_invoice(invoice, ocr_text=raw_text)
+
+            del raw_text
 
+            progress.end_stage(ProgressStage.SAVING)
             print(f"Procesamiento exitoso de factura {invoice_id}")
             
         except Exception as e:
@@ -194,17 +341,21 @@ def process_invoice_task(self, invoice_id, rejection_reason: str | None = None):
                     if invoice:
                         invoice.status = "failed"
                         session.add(invoice)
-                        session.add(InvoiceLog(
+                        failed_log = InvoiceLog(
                             invoice_id=invoice_id,
                             event="processing_failed", 
                             details=f"Error: {str(e)[:500]}"
-                        ))
+                        )
+                        failed_log.extra = {"resources": resource_monitor.task_delta(initial_resources, resource_monitor.snapshot())}
+                        session.add(failed_log)
+                # Las facturas fallidas también se pueden buscar (por nombre de archivo y el OCR, si hubo)
+                invoice = db.session.get(Invoice, invoice_id)
+                if invoice:
+                    SearchService.index_invoice(invoice)
             except Exception as db_error:
                 print(f"Error adicional al registrar falla: {str(db_error)}")
             raise
         finally:
-            final_resources = get_resource_usage()
+            LogService.flush()
             total_time = time.time() - task_start_time
-            print(f"Recursos finales: {final_resources}")
             print(f"Procesamiento de factura {invoice_id} completado en {total_time:.2f} segundos")
-            gc.collect()
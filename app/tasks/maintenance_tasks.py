@@ -0,0 +1,179 @@
+from celery.signals import worker_ready
+from app.core.celery_app import celery
+
+@celery.task(name="archive_invoice_log_partitions")
+def archive_invoice_log_partitions():
+    """Crea las particiones futuras de invoice_logs y archiva (NDJSON comprimido) las vencidas."""
+    from app import create_app
+    from app.models.invoice_log import InvoiceLog
+    from app.services.log_retention_service import LogRetentionService
+    app = create_app()
+
+    with app.app_context():
+        InvoiceLog.ensure_partitions()
+        archived = LogRetentionService.archive_expired_partitions()
+        print(f"Particiones de invoice_logs archivadas: {archived}")
+        return archived
+
+@celery.task(name="reindex_invoice_search")
+def reindex_invoice_search(batch_size: int = 500, only_missing: bool = True):
+    """Genera el documento de búsqueda de las facturas existentes (por lotes de id)."""
+    from app import create_app
+    from app.core.extensions import db
+    from app.models.invoice import Invoice
+    from app.models.invoice_search_index import InvoiceSearchIndex
+    from app.services.search_service import SearchService
+    app = create_app()
+
+    with app.app_context():
+        indexed = 0
+        last_id = 0
+        while True:
+            query = Invoice.query.filter(Invoice.id > last_id)
+            if only_missing:
+                query = query.outerjoin(InvoiceSearchIndex, InvoiceSearchIndex.invoice_id == Invoice.id).filter(InvoiceSearchIndex.invoice_id.is_(None))
+            invoices = query.order_by(Invoice.id).limit(batch_size).all()
+            if not invoices:
+                break
+            for invoice in invoices:
+                if SearchService.index_invoice(invoice, commit=False) is not None:
+                    indexed += 1
+            db.session.commit()
+            last_id = invoices[-1].id
+            db.session.expunge_all()
+        print(f"Facturas indexadas para búsqueda: {indexed}")
+        return indexed
+
+@worker_ready.connect
+def reindex_missing_on_startup(sender=None, **kwargs):
+    """Al arrancar el worker (cada despliegue) indexa las facturas sin documento de búsqueda."""
+    reindex_invoice_search.delay()
+
+@celery.task(name="backfill_invoices_data")
+def backfill_invoices_data(batch_size: int = 500):
+    """Vuelve a generar invoices_data e invoice_items desde final_data (por ejemplo, tras cambiar el parseo de importes o fechas)."""
+    from app import create_app
+    from app.services.invoice_data_service import InvoiceDataService
+    app = create_app()
+
+    with app.app_context():
+        return InvoiceDataService.backfill(batch_size=batch_size)
+
+@celery.task(name="reconcile_status_counters")
+def reconcile_status_counters():
+    """Recalcula invoice_status_daily desde invoices y corrige los desvíos."""
+    from app import create_app
+    from app.services.status_counter_service import StatusCounterService
+    app = create_app()
+
+    with app.app_context():
+        corrected = StatusCounterService.reconcile()
+        print(f"Contadores de estado reconciliados: {corrected} filas corregidas")
+        return corrected
+
+@celery.task(name="archive_old_invoices")
+def archive_old_invoices(months: int | None = None):
+    """Comprime en invoice_payloads_archive los datos pesados de las facturas finalizadas más antiguas."""
+    from app import create_app
+    from app.services.invoice_archive_service import InvoiceArchiveService
+    app = create_app()
+
+    with app.app_context():
+        archived = InvoiceArchiveService.archive_old_invoices(months=months)
+        print(f"Facturas archivadas: {archived}")
+        return archived
+
+@celery.task(name="backfill_content_hashes")
+def backfill_content_hashes(batch_size: int = 200):
+    """
+    Calcula content_hash de las facturas subidas antes de la detección por contenido.
+    Si el hash ya pertenece a otra factura (copia subida con otro nombre) se registra en duplicate_of_id.
+    """
+    import os
+    from app import create_app
+    from app.core.extensions import db
+    from app.models.invoice import Invoice
+    from app.services.checkpoint_service import CheckpointService
+    app = create_app()
+
+    with app.app_context():
+        hashed = 0
+        last_id = 0
+        while True:
+            invoices = (
+                Invoice.query
+                .filter(Invoice.id > last_id, Invoice.content_hash.is_(None), Invoice.duplicate_of_id.is_(None), Invoice.status != "duplicated")
+                .order_by(Invoice.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not invoices:
+                break
+            hashes = {
+                invoice.id: CheckpointService.file_fingerprint(invoice.file_path)
+                for invoice in invoices if invoice.file_path and os.path.isfile(invoice.file_path)
+            }
+            owners = dict(
+                db.session.query(Invoice.content_hash, Invoice.id).filter(Invoice.content_hash.in_(set(hashes.values()))).all()
+            ) if hashes else {}
+            for invoice in invoices:
+                content_hash = hashes.get(invoice.id)
+                if content_hash is None:
+                    continue
+                if content_hash in owners:
+                    invoice.duplicate_of_id = owners[content_hash]
+                else:
+                    invoice.content_hash = content_hash
+                    owners[content_hash] = invoice.id
+                    hashed += 1
+            db.session.commit()
+            last_id = invoices[-1].id
+            db.session.expunge_all()
+        print(f"Facturas con hash de contenido calculado: {hashed}")
+        return hashed
+
+@celery.task(name="backfill_near_duplicate_fingerprints")
+def backfill_near_duplicate_fingerprints(batch_size: int = 500):
+    """Genera la firma MinHash de las facturas existentes a partir del texto OCR guardado en invoice_search_index."""
+    from app import create_app
+    from app.core.extensions import db
+    from app.models.invoice_fingerprint import InvoiceFingerprint
+    from app.models.invoice_search_index import InvoiceSearchIndex
+    from app.services.near_duplicate_service import NearDuplicateService
+    app = create_app()
+
+    with app.app_context():
+        indexed = 0
+        last_id = 0
+        while True:
+            rows = (
+                db.session.query(InvoiceSearchIndex.invoice_id, InvoiceSearchIndex.ocr_text)
+                .outerjoin(InvoiceFingerprint, InvoiceFingerprint.invoice_id == InvoiceSearchIndex.invoice_id)
+                .filter(InvoiceSearchIndex.invoice_id > last_id, InvoiceFingerprint.invoice_id.is_(None))
+                .order_by(InvoiceSearchIndex.invoice_id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            for invoice_id, ocr_text in rows:
+                signature = NearDuplicateService.signature(ocr_text) if ocr_text else None
+                if signature is not None:
+                    NearDuplicateService.index(invoice_id, signature)
+                    indexed += 1
+            db.session.commit()
+            last_id = rows[-1].invoice_id
+        print(f"Firmas de casi duplicados generadas: {indexed}")
+        return indexed
+
+@celery.task(name="cleanup_upload_sessions")
+def cleanup_upload_sessions():
+    """Expira las sesiones de subida por fragmentos sin actividad y elimina sus archivos parciales."""
+    from app import create_app
+    from app.services.upload_service import UploadService
+    app = create_app()
+
+    with app.app_context():
+        expired = UploadService.cleanup_sessions()
+        print(f"Sesiones de subida expiradas: {expired}")
+        return expired
@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import datetime
+
+def encode_cursor(*values) -> str:
+    """
+    Codifica la clave de la última fila de una página (ej. created_at, id) como un cursor opaco para la URL.
+    Las fechas se guardan en ISO 8601.
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> list:
+    """
+    Decodifica un cursor generado por encode_cursor convirtiendo cada valor al tipo indicado.
+
+    Raises:
+        ValueError: Si el cursor está mal formado o no coincide con los tipos esperados.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Cursor inválido")
+
+    decoded = []
+    for value, expected in zip(values, types):
+        try:
+            decoded.append(datetime.fromisoformat(value) if expected is datetime else expected(value))
+        except (TypeError, ValueError):
+            raise ValueError("Cursor inválido")
+    return decoded
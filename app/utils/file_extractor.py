@@ -1,19 +1,118 @@
 import os
 import zipfile
 from werkzeug.utils import secure_filename
+from app.utils.file_storage import ALLOWED_MIME_TYPES, save_stream_with_hash, sniff_content_type
 
-def extract_pdfs_from_zip(zip_file, extract_to="uploads/tmp"):
-    os.makedirs(extract_to, exist_ok=True)
-    pdf_paths = []
+# Bytes leídos de cada miembro para detectar su tipo (la firma más larga es la de PNG)
+SNIFF_BYTES = 8
+
+class ZipLimitExceeded(ValueError):
+    """El ZIP supera la cantidad de archivos o el tamaño descomprimido permitidos."""
+    pass
+
+def _skip_reason(file_info: zipfile.ZipInfo, max_file_size: int | None) -> str | None:
+    name = file_info.filename
+    base = os.path.basename(name.rstrip("/"))
+    if file_info.is_dir():
+        return "directory"
+    if name.startswith("__MACOSX/") or base.startswith("."):
+        return "metadata"
+    if file_info.flag_bits & 0x1:
+        return "encrypted"
+    if max_file_size is not None and file_info.file_size > max_file_size:
+        return "too_large"
+    return None
+
+def remove_extracted(extracted: list[dict]):
+    """Elimina los archivos creados por una extracción (no los que ya existían con el mismo contenido)."""
+    for path in {entry["filepath"] for entry in extracted if entry.get("created")}:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def extract_invoices_from_zip(zip_file, extract_to: str, max_file_size: int | None = None, max_files: int | None = None,
+                              max_total_size: int | None = None) -> tuple[list[dict], list[dict]]:
+    """
+    Extrae las facturas (PDF, JPEG, PNG) de un ZIP leyendo cada miembro en streaming (memoria acotada por bloque)
+    y guardándolas por contenido como <extract_to>/<sha256[:16]>_<nombre>, así miembros con el mismo nombre no se pisan.
+    El tipo se decide por los primeros bytes, no por la extensión; el resto de las entradas se omite.
+
+    Los límites de cantidad de miembros y tamaño descomprimido se validan con el directorio central antes de extraer
+    (zipfile no entrega más bytes que el tamaño declarado de cada miembro) y de nuevo mientras se extrae.
+
+    Returns:
+        (extraídos [{"filename", "filepath", "content_hash", "content_type", "size", "created"}],
+         omitidos [{"filename", "reason"}])
+
+    Raises:
+        ZipLimitExceeded: Si el ZIP supera max_files o max_total_size; los archivos ya extraídos se eliminan.
+    """
+    extracted = []
+    skipped = []
 
     with zipfile.ZipFile(zip_file, 'r') as archive:
+        members = []
         for file_info in archive.infolist():
-            if file_info.filename.lower().endswith(".pdf"):
-                # Sanitizar el nombre
-                filename = secure_filename(os.path.basename(file_info.filename))
-                path = os.path.join(extract_to, filename)
-                with open(path, 'wb') as f:
-                    f.write(archive.read(file_info))
-                pdf_paths.append(path)
-
-    return pdf_paths
+            reason = _skip_reason(file_info, max_file_size)
+            if reason:
+                if reason != "directory":
+                    skipped.append({"filename": file_info.filename, "reason": reason})
+                continue
+            members.append(file_info)
+
+        if max_files is not None and len(members) > max_files:
+            raise ZipLimitExceeded(f"El ZIP contiene {len(members)} archivos; el máximo es {max_files}.")
+        if max_total_size is not None and sum(info.file_size for info in members) > max_total_size:
+            raise ZipLimitExceeded(f"El contenido descomprimido del ZIP supera el máximo de {max_total_size} bytes.")
+
+        # Archivos previos del directorio: si un miembro coincide con uno existente (mismo contenido y nombre)
+        # no se considera creado por esta extracción y no se elimina en caso de error
+        existing = set(os.listdir(extract_to)) if os.path.isdir(extract_to) else set()
+        try:
+            total_size = 0
+            for file_info in members:
+                entry = _extract_member(archive, file_info, extract_to, existing, skipped)
+                if entry is None:
+                    continue
+                extracted.append(entry)
+                total_size += entry["size"]
+                if max_total_size is not None and total_size > max_total_size:
+                    raise ZipLimitExceeded(f"El contenido descomprimido del ZIP supera el máximo de {max_total_size} bytes.")
+        except BaseException:
+            remove_extracted(extracted)
+            raise
+
+    return extracted, skipped
+
+def _extract_member(archive: zipfile.ZipFile, file_info: zipfile.ZipInfo, extract_to: str, existing: set, skipped: list) -> dict | None:
+    """Guarda un miembro si es una factura; si no, lo agrega a skipped y devuelve None."""
+    # Sanitizar el nombre
+    filename = secure_filename(os.path.basename(file_info.filename))
+    if not filename:
+        skipped.append({"filename": file_info.filename, "reason": "invalid_name"})
+        return None
+
+    try:
+        with archive.open(file_info) as member:
+            head = member.read(SNIFF_BYTES)
+            content_type = sniff_content_type(head)
+            if content_type not in ALLOWED_MIME_TYPES:
+                skipped.append({"filename": file_info.filename, "reason": "not_an_invoice"})
+                return None
+            filepath, content_hash, size = save_stream_with_hash(member, extract_to, filename, head=head)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError, NotImplementedError, RuntimeError) as e:
+        skipped.append({"filename": file_info.filename, "reason": f"error: {e}"})
+        return None
+
+    name = os.path.basename(filepath)
+    created = name not in existing
+    existing.add(name)
+    return {
+        "filename": filename,
+        "filepath": filepath,
+        "content_hash": content_hash,
+        "content_type": content_type,
+        "size": size,
+        "created": created,
+    }
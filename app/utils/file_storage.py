@@ -0,0 +1,84 @@
+import hashlib
+import os
+import uuid
+
+# Bytes leídos por vuelta al copiar un archivo subido a disco
+SAVE_CHUNK_SIZE = 1024 * 1024
+
+# Tipos de archivo permitidos para facturas
+ALLOWED_MIME_TYPES = {'application/pdf', 'image/jpeg', 'image/png'}
+
+# Firmas (magic bytes) de los tipos permitidos
+FILE_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+def sniff_content_type(head: bytes) -> str | None:
+    """Tipo real del archivo según sus primeros bytes (None si no es uno de los permitidos)."""
+    for signature, content_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+def copy_stream(stream, target, hasher=None, limit: int | None = None) -> int:
+    """
+    Copia un stream a un archivo abierto por bloques, actualizando el hash en el mismo recorrido.
+
+    Returns:
+        Bytes copiados (nunca más de limit, si se indica).
+    """
+    copied = 0
+    while limit is None or copied < limit:
+        chunk = stream.read(SAVE_CHUNK_SIZE if limit is None else min(SAVE_CHUNK_SIZE, limit - copied))
+        if not chunk:
+            break
+        if hasher is not None:
+            hasher.update(chunk)
+        target.write(chunk)
+        copied += len(chunk)
+    return copied
+
+def hash_file(path: str, hasher=None):
+    """Hash (SHA-256 por defecto) del contenido de un archivo, leído por bloques."""
+    hasher = hasher or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(SAVE_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+def stored_path(directory: str, filename: str, content_hash: str) -> str:
+    """Ruta definitiva de un archivo: <directory>/<sha256[:16]>_<filename> (mismo nombre, distinto contenido: no se pisan)."""
+    return os.path.join(directory, f"{content_hash[:16]}_{filename}")
+
+def store_file(tmp_path: str, directory: str, filename: str, content_hash: str) -> str:
+    """Mueve un archivo completo a su ruta definitiva (ver stored_path)."""
+    os.makedirs(directory, exist_ok=True)
+    path = stored_path(directory, filename, content_hash)
+    os.replace(tmp_path, path)
+    return path
+
+def save_stream_with_hash(stream, directory: str, filename: str, head: bytes = b"") -> tuple[str, str, int]:
+    """
+    Copia un stream a <directory>/<sha256[:16]>_<filename> calculando el SHA-256 mientras se escribe,
+    sin volver a leer el archivo. head son bytes ya leídos del stream (por ejemplo, para detectar el tipo).
+
+    Returns:
+        (ruta final, sha256 en hexadecimal, tamaño en bytes)
+    """
+    os.makedirs(directory, exist_ok=True)
+    sha = hashlib.sha256()
+    tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    try:
+        with open(tmp_path, "wb") as target:
+            sha.update(head)
+            target.write(head)
+            size = len(head) + copy_stream(stream, target, sha)
+        content_hash = sha.hexdigest()
+        path = store_file(tmp_path, directory, filename, content_hash)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path, content_hash, size
@@ -4,7 +4,7 @@ import React, { useState, useEffect, useCallback, useRef } from "react";
 import { formatDistanceToNow } from "date-fns";
 import { es } from "date-fns/locale";
 import { fetchRecentInvoices } from "@/lib/api/invoices";
-import { useWebSocket, type InvoiceStatusUpdateData } from "@/contexts/websocket-context";
+import { useWebSocket, type InvoiceStatusUpdateData, type InvoicesBatchUpdateData, type BatchEventName } from "@/contexts/websocket-context";
 import {
     Card,
     CardContent,
@@ -96,7 +96,9 @@ export default function RecentInvoices() {
         isConnected: isWsConnectedState, 
         connectError: wsConnectError, 
         addStatusUpdateListener, // Obtener funciones del contexto
-        removeStatusUpdateListener 
+        removeStatusUpdateListener,
+        addBatchUpdateListener,
+        removeBatchUpdateListener
     } = useWebSocket();
 
     // Fetch inicial de datos
@@ -165,20 +167,49 @@ export default function RecentInvoices() {
         });
     }, [loadRecentInvoices]);
 
+    // --- Handler para eventos por lote ---
+    // Un solo toast y una sola recarga por lote, en lugar de uno por factura
+    const handleBatchUpdate = useCallback((update: InvoicesBatchUpdateData, eventName: BatchEventName) => {
+        console.log(`RecentInvoices WS Batch Update (${eventName}): ${update.invoices.length} facturas`);
+        const statusById = new Map(update.invoices.map(inv => [inv.id, inv.status as InvoiceStatus]));
+        triggerHighlight(update.invoices[0].id);
+
+        setInvoices(currentInvoices => currentInvoices.some(inv => statusById.has(inv.id))
+            ? currentInvoices.map(inv => statusById.has(inv.id) ? { ...inv, status: statusById.get(inv.id)! } : inv)
+            : currentInvoices
+        );
+
+        if (eventName === "invoices_created") {
+            const duplicated = update.invoices.filter(inv => inv.status === "duplicated").length;
+            toast.info(`${update.invoices.length} factura(s) nueva(s) recibida(s)`, {
+                description: duplicated ? `${duplicated} duplicada(s) de facturas existentes` : "Enviadas a procesamiento"
+            });
+        } else {
+            const status = update.invoices[0].status as InvoiceStatus;
+            toast.info(`${update.invoices.length} factura(s) actualizada(s) a ${getStatusText(status)}`, {
+                description: "Acción masiva aplicada."
+            });
+        }
+        // Las nuevas (o las que no están en el top) pueden cambiar la lista: una sola recarga
+        setTimeout(loadRecentInvoices, 100);
+    }, [loadRecentInvoices]);
+
     // --- Efecto para suscribirse/desuscribirse a los updates --- 
     useEffect(() => {
         console.log("[RecentInvoices] Efecto: Añadiendo listener de status.");
         addStatusUpdateListener(handleStatusUpdate);
+        addBatchUpdateListener(handleBatchUpdate);
 
         // Limpieza: eliminar el listener cuando el componente se desmonte
         return () => {
             console.log("[RecentInvoices] Limpieza Efecto: Eliminando listener de status.");
             removeStatusUpdateListener(handleStatusUpdate);
+            removeBatchUpdateListener(handleBatchUpdate);
             if (highlightTimeoutRef.current) {
                 clearTimeout(highlightTimeoutRef.current); // Limpiar timeout al desmontar
             }
         };
-    }, [addStatusUpdateListener, removeStatusUpdateListener, handleStatusUpdate]); // Dependencias correctas
+    }, [addStatusUpdateListener, removeStatusUpdateListener, handleStatusUpdate, addBatchUpdateListener, removeBatchUpdateListener, handleBatchUpdate]); // Dependencias correctas
 
     // --- Efecto para mostrar errores de conexión WS (del contexto) ---
     useEffect(() => {
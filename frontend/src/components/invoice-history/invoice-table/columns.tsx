@@ -10,6 +10,14 @@ import { statusColorMap } from "./constants";
 
 type InvoiceCellContext = CellContext<InvoiceListItem, unknown>;
 
+// Etapas del evento invoice_progress
+const progressStageLabels: Record<string, string> = {
+    ocr: "OCR",
+    extraction: "Extracción",
+    summary: "Resumen",
+    saving: "Guardando",
+};
+
 // Definición de las columnas para la tabla de facturas
 export const getInvoiceTableColumns = (
     onViewDetails: (invoiceId: number) => void // Callback para abrir modal
@@ -59,10 +67,19 @@ export const getInvoiceTableColumns = (
         cell: ({ row }: InvoiceCellContext) => {
             const status = row.getValue("status") as InvoiceStatus;
             const colorClass = statusColorMap[status] || statusColorMap.duplicated;
+            const progress = row.original.progress;
             return (
-                <Badge variant="outline" className={`border-none capitalize text-xs ${colorClass}`}>
-                    {status.replace('_', ' ')}
-                </Badge>
+                <div className="flex flex-col gap-1">
+                    <Badge variant="outline" className={`border-none capitalize text-xs ${colorClass}`}>
+                        {status.replace('_', ' ')}
+                    </Badge>
+                    {progress && (
+                        <span className="text-xs text-muted-foreground">
+                            {progressStageLabels[progress.stage] ?? progress.stage}
+                            {progress.total ? ` ${progress.current ?? 0}/${progress.total}` : ''}
+                        </span>
+                    )}
+                </div>
             );
         },
         size: 150,
@@ -7,6 +7,8 @@ import { fetchInvoiceHistory } from "@/lib/api/invoices";
 import {
     useWebSocket,
     type InvoiceStatusUpdateData,
+    type InvoicesBatchUpdateData,
+    type InvoiceProgressData,
 } from "@/contexts/websocket-context";
 import { InvoiceListItem, InvoiceStatus, FetchInvoiceHistoryOptions } from "@/lib/api/types";
 import { toast } from 'sonner';
@@ -48,6 +50,10 @@ export function useInvoiceTable() {
         connectError: wsConnectError,
         addStatusUpdateListener,
         removeStatusUpdateListener,
+        addBatchUpdateListener,
+        removeBatchUpdateListener,
+        addProgressUpdateListener,
+        removeProgressUpdateListener,
     } = useWebSocket();
 
     // --- Estado para Highlights --- 
@@ -160,7 +166,7 @@ export function useInvoiceTable() {
                 // Doble check por si acaso, aunque ya sabemos que existe
                 if (invoiceIndex !== -1) {
                     const updatedData = [...currentData];
-                    updatedData[invoiceIndex] = { ...updatedData[invoiceIndex], status: update.status as InvoiceStatus };
+                    updatedData[invoiceIndex] = { ...updatedData[invoiceIndex], status: update.status as InvoiceStatus, progress: undefined };
                     console.log("[useInvoiceTable] Actualizando estado in-place.");
                     return updatedData;
                 }
@@ -176,10 +182,46 @@ export function useInvoiceTable() {
         }
     }, [fetchData, triggerRowHighlight]); // Ya no depende de data
 
+    // --- Handler para eventos por lote (subidas múltiples y acciones masivas) ---
+    // Un solo evento con N facturas: actualiza en sitio las conocidas y recarga una sola vez si hay nuevas
+    const handleWsBatchUpdate = useCallback((update: InvoicesBatchUpdateData) => {
+        console.log(`[useInvoiceTable] WS Batch Update: ${update.invoices.length} facturas`);
+        const statusById = new Map(update.invoices.map(inv => [inv.id, inv.status as InvoiceStatus]));
+        statusById.forEach((_, id) => triggerRowHighlight(id));
+
+        const knownIds = new Set(dataRef.current.map(inv => inv.id));
+        const hasUnknown = update.invoices.some(inv => !knownIds.has(inv.id));
+
+        setData(currentData => {
+            if (!currentData.some(inv => statusById.has(inv.id))) {
+                return currentData;
+            }
+            return currentData.map(inv => statusById.has(inv.id) ? { ...inv, status: statusById.get(inv.id)!, progress: undefined } : inv);
+        });
+        if (hasUnknown) {
+            console.log("[useInvoiceTable] Lote con facturas no presentes en los datos actuales, recargando...");
+            fetchData(false);
+        }
+    }, [fetchData, triggerRowHighlight]);
+
+    // --- Handler para el progreso de procesamiento ---
+    // Solo actualiza filas visibles; el cambio de estado final llega por invoice_status_update y limpia el progreso
+    const handleWsProgressUpdate = useCallback((update: InvoiceProgressData) => {
+        if (!dataRef.current.some(inv => inv.id === update.id)) {
+            return;
+        }
+        setData(currentData => currentData.map(inv => inv.id === update.id
+            ? { ...inv, progress: { stage: update.stage, current: update.current, total: update.total } }
+            : inv
+        ));
+    }, []);
+
     // --- Efecto para suscribirse/desuscribirse a los updates --- 
     useEffect(() => {
         console.log("[useInvoiceTable] Efecto: Añadiendo listener de status.");
         addStatusUpdateListener(handleWsStatusUpdate);
+        addBatchUpdateListener(handleWsBatchUpdate);
+        addProgressUpdateListener(handleWsProgressUpdate);
         
         // Capturar la referencia actual para usarla en la limpieza
         const currentTimeoutMap = highlightTimeoutRef.current;
@@ -187,11 +229,13 @@ export function useInvoiceTable() {
         return () => {
             console.log("[useInvoiceTable] Limpieza Efecto: Eliminando listener de status.");
             removeStatusUpdateListener(handleWsStatusUpdate);
+            removeBatchUpdateListener(handleWsBatchUpdate);
+            removeProgressUpdateListener(handleWsProgressUpdate);
             // Limpiar todos los timeouts pendientes al desmontar usando la referencia capturada
             currentTimeoutMap.forEach(timeoutId => clearTimeout(timeoutId));
             currentTimeoutMap.clear();
         };
-    }, [addStatusUpdateListener, removeStatusUpdateListener, handleWsStatusUpdate]);
+    }, [addStatusUpdateListener, removeStatusUpdateListener, handleWsStatusUpdate, addBatchUpdateListener, removeBatchUpdateListener, handleWsBatchUpdate, addProgressUpdateListener, removeProgressUpdateListener, handleWsProgressUpdate]);
     
     // --- Efecto para mostrar errores de conexión WS (del contexto) ---
     useEffect(() => {
@@ -8,13 +8,17 @@ import {
     removeStatusUpdateListener as removeWsStatusUpdateListener,
     addPreviewUpdateListener as addWsPreviewUpdateListener,
     removePreviewUpdateListener as removeWsPreviewUpdateListener,
+    addBatchUpdateListener as addWsBatchUpdateListener,
+    removeBatchUpdateListener as removeWsBatchUpdateListener,
+    addProgressUpdateListener as addWsProgressUpdateListener,
+    removeProgressUpdateListener as removeWsProgressUpdateListener,
     joinRoom as wsJoinRoom,
     leaveRoom as wsLeaveRoom,
     _setManagedSocket,
 } from "@/lib/ws/invoice-updates";
 
 // Tipos específicos si los necesitamos para pasar a los listeners globales
-export type { InvoiceStatusUpdateData, InvoicePreviewUpdateData } from "@/lib/ws/invoice-updates";
+export type { InvoiceStatusUpdateData, InvoicePreviewUpdateData, InvoicesBatchUpdateData, BatchEventName, InvoiceProgressData } from "@/lib/ws/invoice-updates";
 
 // --- Tipos del Contexto ---
 export interface WebSocketContextState {
@@ -25,6 +29,10 @@ export interface WebSocketContextState {
     removeStatusUpdateListener: typeof removeWsStatusUpdateListener;
     addPreviewUpdateListener: typeof addWsPreviewUpdateListener;
     removePreviewUpdateListener: typeof removeWsPreviewUpdateListener;
+    addBatchUpdateListener: typeof addWsBatchUpdateListener;
+    removeBatchUpdateListener: typeof removeWsBatchUpdateListener;
+    addProgressUpdateListener: typeof addWsProgressUpdateListener;
+    removeProgressUpdateListener: typeof removeWsProgressUpdateListener;
     joinRoom: typeof wsJoinRoom;
     leaveRoom: typeof wsLeaveRoom;
 }
@@ -125,6 +133,10 @@ export const WebSocketProvider: React.FC<WebSocketProviderProps> = ({ children }
         removeStatusUpdateListener: removeWsStatusUpdateListener,
         addPreviewUpdateListener: addWsPreviewUpdateListener,
         removePreviewUpdateListener: removeWsPreviewUpdateListener,
+        addBatchUpdateListener: addWsBatchUpdateListener,
+        removeBatchUpdateListener: removeWsBatchUpdateListener,
+        addProgressUpdateListener: addWsProgressUpdateListener,
+        removeProgressUpdateListener: removeWsProgressUpdateListener,
         joinRoom: wsJoinRoom,
         leaveRoom: wsLeaveRoom,
     };
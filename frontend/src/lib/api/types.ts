@@ -13,6 +13,8 @@ export interface InvoiceListItem {
   filename: string
   status: InvoiceStatus
   created_at: string // ISO 8601 date string
+  // Solo en el cliente: último progreso recibido por WebSocket mientras se procesa
+  progress?: { stage: string; current?: number; total?: number }
 }
 
 export interface PaginatedInvoices<T> {
@@ -49,9 +49,34 @@ export interface InvoicePreviewUpdateData {
     preview_data: Record<string, any>; // O un tipo más específico si lo tienes
 }
 
+// Progreso del procesamiento en el worker (etapa y páginas OCR)
+export interface InvoiceProgressData {
+    id: number;
+    stage: 'ocr' | 'extraction' | 'summary' | 'saving';
+    state: 'started' | 'progress' | 'completed';
+    current?: number;
+    total?: number;
+    stage_elapsed: number | null;
+    elapsed: number;
+    timings: Record<string, number>;
+}
+
+// Eventos por lote: un solo evento con varias facturas (subidas múltiples, acciones masivas)
+export interface InvoiceBatchItem extends InvoiceStatusUpdateData {
+    company_id?: number | null;
+    duplicate_of?: number | null;
+}
+
+export interface InvoicesBatchUpdateData {
+    invoices: InvoiceBatchItem[];
+}
+
 // --- Tipos de Listener (sin cambios) ---
 export type StatusUpdateListener = (data: InvoiceStatusUpdateData) => void;
 export type PreviewUpdateListener = (data: InvoicePreviewUpdateData) => void;
+export type ProgressUpdateListener = (data: InvoiceProgressData) => void;
+// Recibe también el nombre del evento para distinguir facturas nuevas de cambios de estado
+export type BatchUpdateListener = (data: InvoicesBatchUpdateData, eventName: BatchEventName) => void;
 // Ya no necesitamos ConnectListener, ConnectErrorListener aquí para uso público general
 
 // --- Constantes de Nombres de Eventos --- 
@@ -62,10 +87,19 @@ export const Event = {
     // CONNECT_ERROR: 'connect_error', // Gestionado por el provider
     STATUS_UPDATE: 'invoice_status_update',
     PREVIEW_UPDATE: 'invoice_preview_updated',
+    PROGRESS_UPDATE: 'invoice_progress', // Throttled al namespace; completo en el room de la factura
+    INVOICES_CREATED: 'invoices_created', // Lote de facturas creadas por una subida
+    STATUS_BATCH_UPDATE: 'invoices_status_update', // Confirmar/rechazar/reintentar masivo
     JOIN: 'join', // Para join/leave room
     LEAVE: 'leave'
 } as const;
 
+// Eventos por lote que se entregan a los listeners registrados con addBatchUpdateListener
+const BATCH_EVENTS = [Event.INVOICES_CREATED, Event.STATUS_BATCH_UPDATE] as const;
+export type BatchEventName = typeof BATCH_EVENTS[number];
+// Clave interna en activeListeners para los listeners de eventos por lote
+const BATCH_LISTENERS_KEY = 'invoices_batch';
+
 // --- Gestión Simplificada de Listeners --- 
 // Usaremos un Map local para seguir la pista de los listeners añadidos
 // a través de nuestras funciones, para poder quitarlos correctamente.
@@ -75,6 +109,8 @@ function setupGenericListeners(socketInstance: Socket): void {
     // Limpiar listeners de datos previos en esta instancia específica
     socketInstance.off(Event.STATUS_UPDATE);
     socketInstance.off(Event.PREVIEW_UPDATE);
+    socketInstance.off(Event.PROGRESS_UPDATE);
+    BATCH_EVENTS.forEach(eventName => socketInstance.off(eventName));
 
     // Listener para STATUS_UPDATE
     socketInstance.on(Event.STATUS_UPDATE, (data: InvoiceStatusUpdateData) => {
@@ -101,6 +137,34 @@ function setupGenericListeners(socketInstance: Socket): void {
              }
          });
     });
+
+    // Listener para PROGRESS_UPDATE (frecuente: sin log por evento)
+    socketInstance.on(Event.PROGRESS_UPDATE, (data: InvoiceProgressData) => {
+        activeListeners.get(Event.PROGRESS_UPDATE)?.forEach((_, listener) => {
+            try {
+                (listener as ProgressUpdateListener)(data);
+            } catch (error) {
+                console.error(`[WS Lib] Error en listener ${Event.PROGRESS_UPDATE}:`, error);
+            }
+        });
+    });
+
+    // Listeners para eventos por lote (todas las facturas en un solo evento)
+    BATCH_EVENTS.forEach(eventName => {
+        socketInstance.on(eventName, (data: InvoicesBatchUpdateData) => {
+            console.log(`[WS Lib] Evento '${eventName}' recibido: ${data?.invoices?.length ?? 0} facturas`);
+            if (!Array.isArray(data?.invoices) || data.invoices.length === 0) {
+                return;
+            }
+            activeListeners.get(BATCH_LISTENERS_KEY)?.forEach((_, listener) => {
+                try {
+                    (listener as BatchUpdateListener)(data, eventName);
+                } catch (error) {
+                    console.error(`[WS Lib] Error en listener ${eventName}:`, error);
+                }
+            });
+        });
+    });
     
     // Podríamos tener un onAny para debug si quisiéramos
     // socketInstance.onAny((eventName: string, ...args: any[]) => {
@@ -190,6 +254,76 @@ export function removePreviewUpdateListener(listener: PreviewUpdateListener): vo
     }
 }
 
+/**
+ * Registra un listener para el progreso de procesamiento de facturas.
+ */
+export function addProgressUpdateListener(listener: ProgressUpdateListener): void {
+    if (!managedSocket) {
+        console.warn("[WS Lib] Intento de añadir listener de progreso sin socket gestionado.");
+        return;
+    }
+    if (!activeListeners.has(Event.PROGRESS_UPDATE)) {
+        activeListeners.set(Event.PROGRESS_UPDATE, new Map());
+    }
+    if (!activeListeners.get(Event.PROGRESS_UPDATE)!.has(listener)) {
+        activeListeners.get(Event.PROGRESS_UPDATE)!.set(listener, listener);
+        console.log(`[WS Lib] Listener añadido para ${Event.PROGRESS_UPDATE}. Total: ${activeListeners.get(Event.PROGRESS_UPDATE)?.size}`);
+    } else {
+         console.log(`[WS Lib] Listener para ${Event.PROGRESS_UPDATE} ya estaba añadido.`);
+    }
+}
+
+/**
+ * Elimina un listener de progreso de procesamiento.
+ */
+export function removeProgressUpdateListener(listener: ProgressUpdateListener): void {
+    const eventListeners = activeListeners.get(Event.PROGRESS_UPDATE);
+    if (eventListeners?.has(listener)) {
+        eventListeners.delete(listener);
+        console.log(`[WS Lib] Listener eliminado para ${Event.PROGRESS_UPDATE}. Restantes: ${eventListeners.size}`);
+        if (eventListeners.size === 0) {
+            activeListeners.delete(Event.PROGRESS_UPDATE);
+        }
+    } else {
+         console.log(`[WS Lib] Intento de eliminar listener no encontrado para ${Event.PROGRESS_UPDATE}.`);
+    }
+}
+
+/**
+ * Registra un listener para eventos por lote (varias facturas en un solo evento).
+ */
+export function addBatchUpdateListener(listener: BatchUpdateListener): void {
+    if (!managedSocket) {
+        console.warn("[WS Lib] Intento de añadir listener de lote sin socket gestionado.");
+        return;
+    }
+    if (!activeListeners.has(BATCH_LISTENERS_KEY)) {
+        activeListeners.set(BATCH_LISTENERS_KEY, new Map());
+    }
+    if (!activeListeners.get(BATCH_LISTENERS_KEY)!.has(listener)) {
+        activeListeners.get(BATCH_LISTENERS_KEY)!.set(listener, listener);
+        console.log(`[WS Lib] Listener añadido para eventos por lote. Total: ${activeListeners.get(BATCH_LISTENERS_KEY)?.size}`);
+    } else {
+         console.log("[WS Lib] Listener para eventos por lote ya estaba añadido.");
+    }
+}
+
+/**
+ * Elimina un listener de eventos por lote.
+ */
+export function removeBatchUpdateListener(listener: BatchUpdateListener): void {
+    const eventListeners = activeListeners.get(BATCH_LISTENERS_KEY);
+    if (eventListeners?.has(listener)) {
+        eventListeners.delete(listener);
+        console.log(`[WS Lib] Listener eliminado para eventos por lote. Restantes: ${eventListeners.size}`);
+        if (eventListeners.size === 0) {
+            activeListeners.delete(BATCH_LISTENERS_KEY);
+        }
+    } else {
+         console.log("[WS Lib] Intento de eliminar listener de lote no encontrado.");
+    }
+}
+
 /**
  * Se une a un room específico en el servidor.
  * @param roomName Nombre del room (ej: 'invoice_123')
@@ -0,0 +1,24 @@
+"""Índice de invoice_logs por factura y evento
+
+Revision ID: invoice_logs_event_index
+Revises: partition_invoice_logs
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'invoice_logs_event_index'
+down_revision = 'partition_invoice_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Búsqueda del último evento de un tipo para una factura (reintento tras rechazo, historial filtrado por evento)
+    op.create_index('ix_invoice_logs_invoice_id_event_created_at', 'invoice_logs', ['invoice_id', 'event', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invoice_logs_invoice_id_event_created_at', table_name='invoice_logs')
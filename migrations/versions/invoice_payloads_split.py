@@ -0,0 +1,48 @@
+"""Datos pesados de facturas en invoice_payloads
+
+Revision ID: invoice_payloads_split
+Revises: status_rollups_by_company
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'invoice_payloads_split'
+down_revision = 'status_rollups_by_company'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all puede haber creado ya la tabla (vacía) al arrancar la aplicación
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS invoice_payloads (
+            invoice_id INTEGER NOT NULL,
+            preview_data JSON NULL,
+            final_data JSON NULL,
+            agent_response MEDIUMTEXT NULL,
+            updated_at DATETIME NULL,
+            PRIMARY KEY (invoice_id),
+            CONSTRAINT invoice_payloads_ibfk_1 FOREIGN KEY (invoice_id) REFERENCES invoices (id) ON DELETE CASCADE
+        )
+    """)
+    op.execute("""
+        INSERT IGNORE INTO invoice_payloads (invoice_id, preview_data, final_data, agent_response, updated_at)
+        SELECT id, preview_data, final_data, agent_response, updated_at
+        FROM invoices
+        WHERE preview_data IS NOT NULL OR final_data IS NOT NULL OR agent_response IS NOT NULL
+    """)
+    op.drop_column('invoices', 'agent_response')
+    op.drop_column('invoices', 'final_data')
+    op.drop_column('invoices', 'preview_data')
+
+
+def downgrade():
+    op.execute("ALTER TABLE invoices ADD COLUMN preview_data JSON NULL, ADD COLUMN final_data JSON NULL, ADD COLUMN agent_response TEXT NULL")
+    op.execute("""
+        UPDATE invoices i JOIN invoice_payloads p ON p.invoice_id = i.id
+        SET i.preview_data = p.preview_data, i.final_data = p.final_data, i.agent_response = p.agent_response
+    """)
+    op.execute("DROP TABLE IF EXISTS invoice_payloads")
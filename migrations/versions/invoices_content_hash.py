@@ -0,0 +1,31 @@
+"""Hash de contenido de facturas para detectar duplicados
+
+Revision ID: invoices_content_hash
+Revises: invoice_payloads_split
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'invoices_content_hash'
+down_revision = 'invoice_payloads_split'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('invoices', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('invoices', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_unique_constraint('uq_invoices_content_hash', 'invoices', ['content_hash'])
+    op.create_foreign_key('fk_invoices_duplicate_of_id', 'invoices', 'invoices', ['duplicate_of_id'], ['id'])
+    # Las facturas existentes se completan con la tarea backfill_content_hashes
+
+
+def downgrade():
+    op.drop_constraint('fk_invoices_duplicate_of_id', 'invoices', type_='foreignkey')
+    op.drop_constraint('uq_invoices_content_hash', 'invoices', type_='unique')
+    op.drop_column('invoices', 'duplicate_of_id')
+    op.drop_column('invoices', 'content_hash')
@@ -0,0 +1,25 @@
+"""Índices para la paginación por cursor de invoices
+
+Revision ID: invoices_list_indexes
+Revises: invoice_logs_event_index
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'invoices_list_indexes'
+down_revision = 'invoice_logs_event_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_invoices_created_at_id', 'invoices', ['created_at', 'id'], unique=False)
+    op.create_index('ix_invoices_status_created_at_id', 'invoices', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invoices_status_created_at_id', table_name='invoices')
+    op.drop_index('ix_invoices_created_at_id', table_name='invoices')
@@ -0,0 +1,27 @@
+"""Reserva de facturas en la cola de revisión
+
+Revision ID: invoices_review_claims
+Revises: invoices_content_hash
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'invoices_review_claims'
+down_revision = 'invoices_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('invoices', sa.Column('claimed_by', sa.String(length=100), nullable=True))
+    op.add_column('invoices', sa.Column('claim_expires_at', sa.DateTime(), nullable=True))
+    # La cola recorre ix_invoices_status_created_at_id (status, created_at, id); no hace falta un índice nuevo
+
+
+def downgrade():
+    op.drop_column('invoices', 'claim_expires_at')
+    op.drop_column('invoices', 'claimed_by')
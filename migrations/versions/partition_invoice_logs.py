@@ -0,0 +1,81 @@
+"""Particionar invoice_logs por mes
+
+Revision ID: partition_invoice_logs
+Revises: upgrade_invoice_logs
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_invoice_logs'
+down_revision = 'upgrade_invoice_logs'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month_start, months):
+    month_index = month_start.month - 1 + months
+    return date(month_start.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    # Las tablas particionadas no admiten foreign keys
+    fk_names = conn.execute(sa.text("""
+        SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'invoice_logs'
+    """)).scalars().all()
+    for fk_name in fk_names:
+        op.drop_constraint(fk_name, 'invoice_logs', type_='foreignkey')
+
+    # created_at pasa a ser clave de partición: no puede ser NULL y debe formar parte de la PK
+    op.execute("UPDATE invoice_logs SET created_at = UTC_TIMESTAMP() WHERE created_at IS NULL")
+    op.execute("ALTER TABLE invoice_logs MODIFY created_at DATETIME NOT NULL")
+    op.execute("ALTER TABLE invoice_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)")
+
+    # extra_data: de TEXT a JSON nativo
+    op.execute("ALTER TABLE invoice_logs MODIFY extra_data JSON NULL")
+
+    # Índice compuesto para el historial de una factura; reemplaza al índice simple que creaba la FK
+    op.create_index('ix_invoice_logs_invoice_id_created_at', 'invoice_logs', ['invoice_id', 'created_at'], unique=False)
+    single_indexes = conn.execute(sa.text("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'invoice_logs'
+          AND COLUMN_NAME = 'invoice_id' AND SEQ_IN_INDEX = 1
+          AND INDEX_NAME <> 'ix_invoice_logs_invoice_id_created_at'
+    """)).scalars().all()
+    for index_name in single_indexes:
+        op.drop_index(index_name, table_name='invoice_logs')
+
+    # Particiones mensuales desde el log más antiguo hasta MONTHS_AHEAD meses en el futuro
+    oldest = conn.execute(sa.text("SELECT MIN(created_at) FROM invoice_logs")).scalar()
+    current_month = date.today().replace(day=1)
+    month_start = oldest.date().replace(day=1) if oldest else current_month
+    last_month = _add_months(current_month, MONTHS_AHEAD)
+    partitions = []
+    while month_start <= last_month:
+        next_month = _add_months(month_start, 1)
+        partitions.append(f"PARTITION p{month_start.strftime('%Y%m')} VALUES LESS THAN (TO_DAYS('{next_month.isoformat()}'))")
+        month_start = next_month
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    op.execute(f"ALTER TABLE invoice_logs PARTITION BY RANGE (TO_DAYS(created_at)) ({', '.join(partitions)})")
+
+
+def downgrade():
+    op.execute("ALTER TABLE invoice_logs REMOVE PARTITIONING")
+
+    op.create_index('ix_invoice_logs_invoice_id', 'invoice_logs', ['invoice_id'], unique=False)
+    op.drop_index('ix_invoice_logs_invoice_id_created_at', table_name='invoice_logs')
+
+    op.execute("ALTER TABLE invoice_logs MODIFY extra_data TEXT NULL")
+    op.execute("ALTER TABLE invoice_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE invoice_logs MODIFY created_at DATETIME NULL")
+
+    op.create_foreign_key('invoice_logs_ibfk_1', 'invoice_logs', 'invoices', ['invoice_id'], ['id'])
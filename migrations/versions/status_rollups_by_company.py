@@ -0,0 +1,26 @@
+"""Rollups de estado por empresa y por hora
+
+Revision ID: status_rollups_by_company
+Revises: invoices_list_indexes
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'status_rollups_by_company'
+down_revision = 'invoices_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Los contadores son derivables: create_all recrea la tabla con company_id en la clave primaria
+    # y create_app la vuelve a poblar desde invoices (StatusCounterService.reconcile).
+    op.execute("DROP TABLE IF EXISTS invoice_status_daily")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS invoice_status_hourly")
+    op.execute("DROP TABLE IF EXISTS invoice_status_daily")
@@ -0,0 +1,50 @@
+from app.core.config import Config
+from app.services.near_duplicate_service import NearDuplicateService
+
+TEMPLATE = """
+ACME SERVICIOS S.A.  CUIT 30-71234567-8
+Av. Corrientes 1234, Piso 5, Ciudad Autónoma de Buenos Aires
+FACTURA A  N° {number}          Fecha de emisión: {date}
+Cliente: Distribuidora del Sur S.R.L.  CUIT 30-70987654-3
+Condición de venta: Cuenta corriente 30 días
+Descripción                          Cantidad   Precio unitario   Subtotal
+Servicio de mantenimiento mensual      1        {net}          {net}
+Soporte técnico remoto                 1        15.000,00          15.000,00
+Subtotal: {net}   IVA 21%: {vat}
+TOTAL: $ {total}
+CAE: {cae}   Vencimiento CAE: {cae_due}
+"""
+
+JANUARY = TEMPLATE.format(number="0003-00001234", date="05/01/2026", net="110.900,00", vat="23.289,00",
+                          total="149.189,00", cae="76012345678901", cae_due="15/01/2026")
+FEBRUARY = TEMPLATE.format(number="0003-00001301", date="05/02/2026", net="112.400,00", vat="23.604,00",
+                           total="151.004,00", cae="76054321098765", cae_due="15/02/2026")
+
+JANUARY_EXTRACTION = {"invoice_number": "0003-00001234", "amount_total": "149.189,00", "date": "2026-01-05"}
+
+
+def test_same_template_invoices_are_similar_but_not_reused():
+    """Dos meses del mismo proveedor superan el umbral de similitud, pero la extracción de enero no sirve para febrero."""
+    january = NearDuplicateService.signature(JANUARY)
+    february = NearDuplicateService.signature(FEBRUARY)
+    assert NearDuplicateService.similarity(january, february) >= 0.9
+
+    assert not NearDuplicateService.key_fields_match(JANUARY_EXTRACTION, FEBRUARY)
+
+
+def test_reuse_is_disabled_by_default():
+    assert Config.NEAR_DUPLICATE_REUSE_EXTRACTION is False
+
+
+def test_rescanned_copy_matches_key_fields():
+    """La misma factura con otro formato de OCR (espacios, separadores) conserva número e importe."""
+    rescanned = JANUARY.replace("  ", " ").replace("N° 0003-00001234", "Nro 0003 00001234").replace("149.189,00", "149189.00")
+    assert NearDuplicateService.key_fields_match(JANUARY_EXTRACTION, rescanned)
+
+
+def test_key_fields_require_both_number_and_amount():
+    other_total = JANUARY.replace("149.189,00", "149.190,00")
+    assert not NearDuplicateService.key_fields_match(JANUARY_EXTRACTION, other_total)
+    # El número debe aparecer completo, no como parte de otro
+    assert not NearDuplicateService.key_fields_match({"invoice_number": "00001", "amount_total": 149189}, JANUARY)
+    assert not NearDuplicateService.key_fields_match({"invoice_number": None, "amount_total": 149189}, JANUARY)